@@ -0,0 +1,199 @@
+import io
+import struct
+import zipfile
+
+from entropy import byte_histogram, entropy_from_histogram
+
+# Hard limits so a 200 MB APK (or a zip bomb named .apk) costs the same bounded memory as a small one
+APK_MAX_CENTRAL_DIRECTORY = 4 * 1024 * 1024   # bytes of central directory we agree to load (~40k entries)
+APK_MANIFEST_LIMIT = 1024 * 1024              # decompressed manifest bytes searched for permissions
+APK_DEX_SAMPLE = 1024 * 1024                  # decompressed bytes per dex used for its entropy
+APK_READ_CHUNK = 64 * 1024                    # streaming read size inside compressed entries
+APK_MAX_DEX = 32                              # classes*.dex files inspected per APK
+APK_MAX_PAYLOADS = 16                         # embedded payload names kept in the feature set
+
+# Upper bound of score_apk(), declared to the engine pipeline for early exit
+APK_CONTENT_MAX_SCORE = 100
+
+# Permissions that banking trojans / SMS fraud / overlay malware ask for
+SENSITIVE_PERMISSIONS = [
+    'SEND_SMS', 'RECEIVE_SMS', 'READ_SMS', 'BIND_ACCESSIBILITY_SERVICE', 'BIND_DEVICE_ADMIN',
+    'REQUEST_INSTALL_PACKAGES', 'SYSTEM_ALERT_WINDOW', 'READ_CALL_LOG', 'PROCESS_OUTGOING_CALLS',
+]
+# Code hidden outside the places Android loads it from (dropped and loaded at runtime)
+PAYLOAD_EXTENSIONS = ('.dex', '.apk', '.jar')
+
+DEX_MAGIC = b"dex\n0"
+DEX_HEADER_SIZE = 0x70
+AXML_MAGIC = b"\x03\x00\x08\x00"
+EOCD_SIGNATURE = b"PK\x05\x06"
+
+class _ViewReader(io.RawIOBase):
+    """Seekable file object over the engine's shared view (bytes or mmap) without copying it"""
+    def __init__(self, data):
+        self._view = memoryview(data)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        chunk = bytes(self._view[self._pos:end])
+        self._pos = max(self._pos, end)
+        return chunk
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+def _central_directory_size(view):
+    """Size of the central directory from the end record, or None if there is no end record"""
+    # The end record is 22 bytes plus a comment of at most 64 KB
+    tail_start = max(0, len(view) - (22 + 0xFFFF))
+    pos = bytes(view[tail_start:]).rfind(EOCD_SIGNATURE)
+    if pos < 0:
+        return None
+    record = view[tail_start + pos:tail_start + pos + 22]
+    if len(record) < 22:
+        return None
+    return struct.unpack_from("<I", record, 12)[0]
+
+def _stream(zf, info, limit):
+    """Decompressed chunks of one entry, stopping after `limit` bytes"""
+    remaining = limit
+    with zf.open(info) as entry:
+        while remaining > 0:
+            chunk = entry.read(min(APK_READ_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def _inspect_dex(zf, info):
+    header = b""
+    counts = None
+    sampled = 0
+    for chunk in _stream(zf, info, APK_DEX_SAMPLE):
+        if len(header) < DEX_HEADER_SIZE:
+            header += chunk[:DEX_HEADER_SIZE - len(header)]
+        hist = byte_histogram(chunk)
+        if counts is None:
+            counts = hist
+        elif isinstance(counts, list):
+            counts = [a + b for a, b in zip(counts, hist)]
+        else:
+            counts = counts + hist
+        sampled += len(chunk)
+
+    dex = {"name": info.filename, "size": info.file_size, "entropy": 0.0, "valid_header": False}
+    if counts is not None:
+        dex["entropy"] = entropy_from_histogram(counts, sampled)
+    if len(header) >= DEX_HEADER_SIZE and header.startswith(DEX_MAGIC) and header[7:8] == b"\0":
+        # file_size in the header must match the entry; tampered or truncated dex files disagree
+        dex["valid_header"] = struct.unpack_from("<I", header, 0x20)[0] == info.file_size
+        dex["classes"] = struct.unpack_from("<I", header, 0x60)[0]
+    return dex
+
+def inspect_apk(data):
+    """
+    Feature set of an APK from its central directory, AndroidManifest.xml and classes*.dex
+    (header + first MB), read straight from `data` without extracting anything.
+    Returns None if `data` is not a readable zip.
+    """
+    view = memoryview(data)
+    try:
+        cd_size = _central_directory_size(view)
+    finally:
+        view.release()
+    if cd_size is None:
+        return None
+    if cd_size > APK_MAX_CENTRAL_DIRECTORY:
+        return {"oversized_directory": True, "central_directory_bytes": cd_size}
+
+    reader = _ViewReader(data)
+    try:
+        with zipfile.ZipFile(reader) as zf:
+            infos = zf.infolist()
+            features = {
+                "entries": len(infos),
+                "uncompressed_bytes": sum(i.file_size for i in infos),
+                "manifest": False,
+                "binary_manifest": False,
+                "permissions": [],
+                "dex": [],
+                "native_libs": 0,
+                "abis": [],
+                "payloads": [],
+            }
+            abis = set()
+            for info in infos:
+                name = info.filename
+                if name == 'AndroidManifest.xml':
+                    features["manifest"] = True
+                    manifest = b"".join(_stream(zf, info, APK_MANIFEST_LIMIT))
+                    features["binary_manifest"] = manifest.startswith(AXML_MAGIC)
+                    # Binary manifests keep their strings as UTF-16, text ones (tests, some repackers) as UTF-8
+                    features["permissions"] = [
+                        p for p in SENSITIVE_PERMISSIONS
+                        if p.encode('utf-16-le') in manifest or p.encode() in manifest
+                    ]
+                elif '/' not in name and name.startswith('classes') and name.endswith('.dex'):
+                    if len(features["dex"]) < APK_MAX_DEX:
+                        features["dex"].append(_inspect_dex(zf, info))
+                elif name.startswith('lib/') and name.endswith('.so'):
+                    features["native_libs"] += 1
+                    abis.add(name.split('/')[1])
+                elif name.lower().endswith(PAYLOAD_EXTENSIONS) and not name.startswith('META-INF/'):
+                    if len(features["payloads"]) < APK_MAX_PAYLOADS:
+                        features["payloads"].append(name)
+            features["abis"] = sorted(abis)
+            return features
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError, EOFError, ValueError):
+        # Encrypted entries, unsupported compression, truncated streams
+        return None
+    finally:
+        reader.close()
+
+def score_apk(features):
+    """(points, details) for an inspect_apk() feature set"""
+    if features is None:
+        return 30, ["APK: Corrupt or disguised package (not a readable ZIP)"]
+    if features.get("oversized_directory"):
+        return 30, [f"APK: Oversized central directory ({features['central_directory_bytes'] // 1024} KB)"]
+
+    points, details = 0, []
+    if not features["manifest"]:
+        points += 30
+        details.append("APK: No AndroidManifest.xml")
+    for dex in features["dex"]:
+        if not dex["valid_header"]:
+            points += 40
+            details.append(f"APK: Malformed DEX header ({dex['name']})")
+            break
+        if dex["entropy"] > 7.6:
+            # Plain dex bytecode sits well below this; encrypted/packed payloads are near 8.0
+            points += 40
+            details.append(f"APK: Encrypted DEX ({dex['name']}, {dex['entropy']:.2f})")
+            break
+    if features["payloads"]:
+        points += 30
+        details.append(f"APK: Embedded code payload ({', '.join(features['payloads'][:3])})")
+    for perm in features["permissions"][:3]:
+        points += 10
+        details.append(f"APK: Sensitive permission {perm}")
+    return min(points, APK_CONTENT_MAX_SCORE), details
@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+
+from scan_config import SCAN_CACHE_ENABLED, EAGER_ENGINE, STARTUP_TRACE, PROFILE_STAGES, PROFILE_TOP_N
+
+class BootTimer:
+    """Milliseconds from boot start to named milestones (first view, engine ready, ...)"""
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, (time.perf_counter() - self.t0) * 1000)
+        if STARTUP_TRACE:
+            print(f"⏱️ Boot: {name} at {self.marks[name]:.0f} ms")
+
+    def summary(self):
+        with self._lock:
+            return dict(self.marks)
+
+def build_engine(rules_path='yara_rules.yar', cache=SCAN_CACHE_ENABLED, cache_path=None, timings=False):
+    """A ThreatEngine with the verdict cache and stage profiler configured for this install"""
+    from threat_engine import ThreatEngine
+    engine = ThreatEngine(rules_path, timings=timings)
+    # Verdict cache is an optimization only: never fail the engine on it
+    if cache:
+        try:
+            from scan_cache import VerdictCache
+            engine.attach_cache(VerdictCache(cache_path))
+        except Exception as e:
+            logging.error(f"Verdict cache disabled: {e}")
+    if PROFILE_STAGES:
+        from scan_profiler import ScanProfiler
+        engine.attach_profiler(ScanProfiler(top_n=PROFILE_TOP_N))
+    return engine
+
+class EngineWarmup:
+    """
+    Builds the ThreatEngine on a background thread: importing NumPy/pefile/yara, loading compiled
+    rules and opening the verdict cache all happen while the user is already on the login or
+    dashboard screen. Scans and the shield call get(), which only blocks if warm-up is unfinished.
+    """
+    def __init__(self, timer=None, rules_path='yara_rules.yar'):
+        self.timer = timer
+        self.rules_path = rules_path
+        self.engine = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._build, name="engine-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _build(self):
+        try:
+            self.engine = build_engine(self.rules_path)
+        except Exception as e:
+            self.error = e
+            logging.error(f"Threat Engine Warm-up Error: {e}")
+        finally:
+            if self.timer:
+                self.timer.mark("engine_ready")
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def get(self, timeout=None):
+        """The engine, waiting for warm-up if needed. Raises if warm-up failed."""
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError("Threat engine is still loading")
+        if self.error:
+            raise self.error
+        return self.engine
+
+def boot(eager_engine=None, timer=None):
+    """
+    Startup critical path shared by the app and the startup benchmark.
+    Returns (db, engine_warmup, timer); the engine is only built inline when eager_engine is set.
+    """
+    timer = timer or BootTimer()
+    from db_manager import DBManager
+    timer.mark("db_import")
+    db = DBManager()
+    timer.mark("db_ready")
+
+    warmup = EngineWarmup(timer)
+    if EAGER_ENGINE if eager_engine is None else eager_engine:
+        warmup.get()
+    else:
+        warmup.start()
+    return db, warmup, timer
@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+"""
+ThreatViper Performance Benchmarks
+Micro and end-to-end measurements for the scan engine.
+
+Usage:
+    python benchmark.py entropy [--size-mb 4] [--rounds 5]
+    python benchmark.py backends [--files 400] [--size-kb 512] [--workers N]
+    python benchmark.py pe [--files 300] [--path DIR] [--rounds 3]
+    python benchmark.py ui [--files 20000] [--latency-ms 5] [--rate 4]
+    python benchmark.py governor [--files 6000] [--knee 8] [--workers 50]
+    python benchmark.py whitelist [--entries 10000] [--lookups 20000]
+    python benchmark.py cloud [--calls 200] [--latency 0.0]
+    python benchmark.py startup [--rounds 5] [--top 12]
+    python benchmark.py analyzers [--files 600] [--size-kb 64] [--rounds 3]
+    python benchmark.py suite [--files 1000] [--size-kb 64] [--output bench_results.json] [--baseline old.json]
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+import tempfile
+import shutil
+
+import entropy
+
+def _timed(fn, rounds):
+    """Best-of-N wall clock in seconds"""
+    best = float('inf')
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+# --- ENTROPY ---
+
+def _legacy_entropy(data):
+    """The original ThreatEngine._get_entropy loop: 256 full passes with bytes.count"""
+    entropy_value = 0
+    for x in range(256):
+        p_x = float(data.count(x)) / len(data)
+        if p_x > 0:
+            entropy_value += - p_x * math.log(p_x, 2)
+    return entropy_value
+
+def _python_entropy(data):
+    """Single-pass engine with NumPy forced off (the Android fallback path)"""
+    saved = entropy.HAS_NUMPY
+    entropy.HAS_NUMPY = False
+    try:
+        return entropy.shannon_entropy(data)
+    finally:
+        entropy.HAS_NUMPY = saved
+
+def bench_entropy(args):
+    size = int(args.size_mb * 1024 * 1024)
+    samples = {
+        "random": os.urandom(size),
+        "text": (b"The quick brown fox jumps over the lazy dog. " * (size // 45 + 1))[:size],
+        "zeros": bytes(size),
+    }
+    engines = [("legacy (256x count)", _legacy_entropy), ("single-pass python", _python_entropy)]
+    if entropy.HAS_NUMPY:
+        engines.append(("single-pass numpy", entropy.shannon_entropy))
+
+    print(f"Entropy cost per MB (best of {args.rounds}, {args.size_mb} MB buffers)")
+    print(f"{'engine':<22}" + "".join(f"{k:>12}" for k in samples))
+    for name, fn in engines:
+        row = f"{name:<22}"
+        for data in samples.values():
+            secs = _timed(lambda: fn(data), args.rounds)
+            row += f"{secs * 1000 / args.size_mb:>9.2f} ms"
+        print(row)
+
+    # Sanity: every engine must agree with the legacy implementation
+    for data in samples.values():
+        ref = _legacy_entropy(data)
+        for name, fn in engines[1:]:
+            if abs(fn(data) - ref) > 1e-9:
+                print(f"❌ {name} disagrees with legacy entropy ({fn(data)} vs {ref})")
+                return 1
+    return 0
+
+# --- SCAN BACKENDS ---
+
+def _make_flat_corpus(folder, count, size):
+    """Quick corpus of high-entropy .exe files and scripts (no cache, so every file is analyzed)"""
+    paths = []
+    for i in range(count):
+        if i % 4 == 0:
+            fp = os.path.join(folder, f"script_{i}.ps1")
+            with open(fp, 'w') as f:
+                f.write("Write-Host 'benign build step'\n" * (size // 32))
+        else:
+            fp = os.path.join(folder, f"tool_{i}.exe")
+            with open(fp, 'wb') as f:
+                f.write(b"MZ" + os.urandom(size - 2))
+        paths.append(fp)
+    return paths
+
+def bench_backends(args):
+    from threat_engine import ThreatEngine
+    from scan_backend import ThreadScanBackend, ProcessScanBackend
+
+    folder = tempfile.mkdtemp(prefix="tv_bench_")
+    try:
+        paths = _make_flat_corpus(folder, args.files, int(args.size_kb * 1024))
+        engine = ThreatEngine()
+        cpus = os.cpu_count() or 1
+        print(f"Backend throughput: {args.files} files x {args.size_kb} KB on {cpus} CPUs")
+        backends = [
+            ("thread", lambda: ThreadScanBackend(engine, args.workers or 50)),
+            ("process", lambda: ProcessScanBackend(engine, args.workers or cpus)),
+        ]
+        for name, factory in backends:
+            backend = factory()
+            # Warm-up: spawns worker processes and compiles rules outside the timed region
+            list(backend.scan_many(paths[:min(len(paths), backend.workers)]))
+            t0 = time.perf_counter()
+            scanned = sum(1 for _ in backend.scan_many(paths))
+            elapsed = time.perf_counter() - t0
+            backend.shutdown()
+            print(f"{name:<8} workers={backend.workers:<3} {scanned / elapsed:>9.1f} files/s  ({elapsed:.2f} s)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return 0
+
+# --- PE PARSING ---
+
+def _legacy_analyze_pe(data):
+    """The original ThreatEngine._analyze_pe: full parse of every data directory, copied sections"""
+    import pefile
+    issues = []
+    try:
+        pe = pefile.PE(data=data)
+        for section in pe.sections:
+            if entropy.shannon_entropy(section.get_data()) > 7.4:
+                issues.append(f"Packed Section: {section.Name.decode('utf-8', 'ignore').strip()}")
+        if hasattr(pe, 'DIRECTORY_ENTRY_IMPORT'):
+            for entry in pe.DIRECTORY_ENTRY_IMPORT:
+                for imp in entry.imports:
+                    if imp.name and imp.name.decode('utf-8', 'ignore') in ['WriteProcessMemory', 'CreateRemoteThread', 'VirtualAllocEx']:
+                        issues.append(f"Suspicious API: {imp.name.decode('utf-8', 'ignore')}")
+    except Exception:
+        pass
+    return issues
+
+def bench_pe(args):
+    from threat_engine import ThreatEngine, HAS_PEFILE
+    if not HAS_PEFILE:
+        print("pefile is not installed")
+        return 1
+
+    folder = None
+    if args.path:
+        paths = [os.path.join(root, f) for root, _dirs, files in os.walk(args.path)
+                 for f in files if f.lower().endswith(('.exe', '.dll', '.sys'))]
+    else:
+        from create_safe_test_txt import generate_corpus
+        folder = tempfile.mkdtemp(prefix="tv_pe_")
+        mix = {"pe_low": 40, "pe_mixed": 30, "pe_packed": 20, "keylogger_pe": 10}
+        paths = [fp for fp, _k in generate_corpus(folder, args.files, args.size_kb, seed=args.seed, mix=mix)]
+    try:
+        blobs = []
+        for fp in paths[:args.files]:
+            with open(fp, 'rb') as f:
+                blobs.append(f.read())
+    finally:
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+    if not blobs:
+        print("No PE files found")
+        return 1
+
+    engine = ThreatEngine()
+    print(f"PE analysis: {len(blobs)} files, {sum(map(len, blobs)) / 1e6:.1f} MB (best of {args.rounds})")
+    legacy = _timed(lambda: [_legacy_analyze_pe(b) for b in blobs], args.rounds)
+    fast = _timed(lambda: [engine._analyze_pe(b) for b in blobs], args.rounds)
+    print(f"full parse        {legacy * 1000 / len(blobs):>8.2f} ms/file")
+    print(f"fast + imports    {fast * 1000 / len(blobs):>8.2f} ms/file  ({legacy / fast if fast else 0:.1f}x)")
+
+    # Sanity: the fast path must report exactly what the full parse did
+    mismatches = sum(_legacy_analyze_pe(b) != engine._analyze_pe(b) for b in blobs)
+    if mismatches:
+        print(f"❌ {mismatches} files differ from the full-parse analysis")
+        return 1
+    return 0
+
+# --- UI PROGRESS ---
+
+def bench_ui(args):
+    from progress_reporter import ProgressReporter
+
+    latency = args.latency_ms / 1000
+    def slow_ui(*_a):
+        time.sleep(latency)  # Stands in for one Flet round-trip (page.update / page.open)
+
+    def threat(i):
+        return i % args.threat_every == 0
+
+    print(f"Result loop: {args.files} results, {args.latency_ms:.0f} ms per UI call, "
+          f"a threat every {args.threat_every} files")
+
+    # Inline: page.update() every 10 files and one snackbar per threat, on the scan thread
+    calls = 0
+    t0 = time.perf_counter()
+    for i in range(1, args.files + 1):
+        if threat(i):
+            slow_ui()
+            calls += 1
+        if i % 10 == 0:
+            slow_ui()
+            calls += 1
+    inline = time.perf_counter() - t0
+    print(f"inline     {args.files / inline:>12.0f} results/s  {calls:>6} UI calls")
+
+    notified = []
+    reporter = ProgressReporter(slow_ui, lambda count, names: (slow_ui(), notified.append(count)),
+                                rate=args.rate).start()
+    t0 = time.perf_counter()
+    for i in range(1, args.files + 1):
+        if threat(i):
+            reporter.threat(f"file_{i}.exe")
+        reporter.publish(scanned=i, current=f"file_{i}.exe")
+    ticked = time.perf_counter() - t0
+    reporter.stop()
+    print(f"reporter   {args.files / ticked:>12.0f} results/s  {reporter.renders + len(notified):>6} UI calls "
+          f"({len(notified)} notifications for {sum(notified)} threats)")
+    return 0
+
+# --- CONCURRENCY GOVERNOR ---
+
+class _SimulatedDevice:
+    """
+    Backend stand-in for a storage device with `knee` useful parallel requests: beyond that every
+    extra request in flight slows all of them down (seek thrash, controller queueing).
+    """
+    name = "thread"
+    chunk_size = 1
+
+    def __init__(self, workers, base_ms, knee, penalty):
+        import threading
+        import concurrent.futures
+        self.workers = workers
+        self.base = base_ms / 1000
+        self.knee = knee
+        self.penalty = penalty
+        self.active = 0
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    def _read(self, items):
+        with self._lock:
+            self.active += 1
+            active = self.active
+        try:
+            time.sleep(self.base * (1 + max(0, active - self.knee) * self.penalty))
+        finally:
+            with self._lock:
+                self.active -= 1
+        return [(item, {"severity": "SAFE"}) for item in items]
+
+    def submit(self, items):
+        return self._executor.submit(self._read, items)
+
+    def shutdown(self, cancel=False):
+        self._executor.shutdown(wait=not cancel, cancel_futures=cancel)
+
+def bench_governor(args):
+    from scan_pipeline import ScanPipeline
+    from scan_governor import ConcurrencyGovernor
+
+    def run(window, governor=None):
+        device = _SimulatedDevice(args.workers, args.base_ms, args.knee, args.penalty)
+        paths = [f"file_{i}" for i in range(args.files)]
+        pipeline = ScanPipeline(device, lambda root: iter(paths), ["sim"], max_in_flight=window, governor=governor)
+        t0 = time.perf_counter()
+        scanned = sum(1 for _ in pipeline.results())
+        elapsed = time.perf_counter() - t0
+        device.shutdown()
+        return scanned / elapsed
+
+    print(f"Simulated device: {args.base_ms:.0f} ms/file, {args.knee} useful parallel reads, "
+          f"{args.files} files, pool ceiling {args.workers}")
+    for window in sorted({2, args.knee, 10, args.workers}):
+        print(f"fixed {window:<4}      {run(window):>9.0f} files/s")
+    governor = ConcurrencyGovernor(max_level=args.workers, interval=args.interval, log=args.verbose)
+    rate = run(args.workers, governor)
+    levels = [c["to"] for c in governor.history]
+    print(f"governor        {rate:>9.0f} files/s  settled at {governor.level} "
+          f"({len(levels)} changes: {' '.join(map(str, levels[:40]))}{' ...' if len(levels) > 40 else ''})")
+    return 0
+
+# --- WHITELIST MATCHING ---
+
+def bench_whitelist(args):
+    import random
+    from path_matcher import SubstringMatcher
+
+    rng = random.Random(42)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789_-"
+    def word(lo, hi):
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(lo, hi)))
+
+    entries = [word(5, 14) + rng.choice(["", ".exe", "_svc", "helper"]) for _ in range(args.entries)]
+    folders = [word(4, 10) for _ in range(50)]
+    paths = [
+        "C:\\Users\\" + "\\".join(rng.sample(folders, 4)) + "\\" + word(4, 12) + ".exe"
+        for _ in range(args.lookups)
+    ]
+    # A handful of real hits so both paths exercise the early-return
+    for i in range(0, len(paths), 97):
+        paths[i] = paths[i][:-4] + rng.choice(entries) + ".exe"
+
+    t0 = time.perf_counter()
+    matcher = SubstringMatcher(entries)
+    build = time.perf_counter() - t0
+
+    # The old scan_file check: re-lowercase every entry per file, linear scan.
+    # Too slow for the full set, so it runs on a 5% sample.
+    legacy_lookups = paths[:max(1, args.lookups // 20)]
+    t0 = time.perf_counter()
+    for p in legacy_lookups:
+        any(e.lower() in p.lower() for e in entries)
+    legacy_time = (time.perf_counter() - t0) / len(legacy_lookups)
+
+    t0 = time.perf_counter()
+    hits = sum(1 for p in paths if matcher.search(p))
+    matcher_time = (time.perf_counter() - t0) / len(paths)
+
+    agree = all(matcher.search(p) == any(e.lower() in p.lower() for e in entries) for p in legacy_lookups)
+    print(f"Whitelist matching: {args.entries} entries, {len(paths)} paths (~{sum(map(len, paths)) // len(paths)} chars)")
+    print(f"automaton build        {build * 1000:>10.1f} ms (once per engine)")
+    print(f"legacy any() per file  {legacy_time * 1e6:>10.1f} us")
+    print(f"automaton per file     {matcher_time * 1e6:>10.1f} us  ({hits} hits)")
+    print(f"speedup                {legacy_time / matcher_time:>10.1f} x")
+    if not agree:
+        print("❌ Matcher disagrees with the legacy check")
+        return 1
+    return 0
+
+# --- CLOUD HTTP ---
+
+def bench_cloud(args):
+    import json
+    import requests
+    from mock_appwrite import start_mock_server
+    from cloud_http import AppwriteHttp
+
+    server, url = start_mock_server(latency=args.latency)
+    control = url[:-len("/v1")] + "/__mock"
+    def connections():
+        # Minus the connection this stats call itself opened
+        return requests.get(control + "/stats").json()["connections"] - 1
+    try:
+        headers = {"X-Appwrite-Project": "bench"}
+        requests.post(url + "/account", json={"userId": "bench", "email": "b@bench", "password": "benchpass", "name": "Bench"}, headers=headers)
+        login = requests.post(url + "/account/sessions/email", json={"email": "b@bench", "password": "benchpass"}, headers=headers)
+        cookie = "; ".join(f"{c.name}={c.value}" for c in login.cookies)
+        print(f"Cloud calls against the local mock: {args.calls} x GET /account (+{args.latency * 1000:.0f} ms server latency)")
+
+        # The old way: bare requests.* call per request, a fresh connection each time
+        before = connections()
+        t0 = time.perf_counter()
+        for _ in range(args.calls):
+            requests.get(url + "/account", headers=dict(headers, Cookie=cookie)).json()
+        bare = time.perf_counter() - t0
+        bare_conns = connections() - before - 1
+
+        http = AppwriteHttp(url, "bench")
+        http.set_cookie(cookie)
+        before = connections()
+        t0 = time.perf_counter()
+        for _ in range(args.calls):
+            http.request("GET", "/account")
+        pooled = time.perf_counter() - t0
+        pooled_conns = connections() - before - 1
+        stats = http.stats()
+        http.close()
+
+        print(f"bare requests   {bare / args.calls * 1000:>8.2f} ms/call  {bare_conns:>5} TCP connections")
+        print(f"pooled session  {pooled / args.calls * 1000:>8.2f} ms/call  {pooled_conns:>5} TCP connections")
+        print(f"instrumentation {json.dumps({k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()})}")
+        if stats["new_connections"] != pooled_conns:
+            print("❌ Reuse instrumentation disagrees with the server's connection count")
+            return 1
+    finally:
+        server.shutdown()
+    return 0
+
+# --- STARTUP ---
+
+# Runs in a fresh interpreter: the same boot path as main(), minus the Flet window
+_STARTUP_CHILD = r'''
+import sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+try:
+    import flet  # main.py imports it before anything else
+except ImportError:
+    pass
+from app_boot import boot, BootTimer
+timer = BootTimer(t0)
+timer.mark("flet_import")
+db, warmup, _ = boot(eager_engine={eager}, timer=timer)
+db.get_current_user()
+timer.mark("first_view")
+warmup.get()
+print(json.dumps(timer.summary()))
+'''
+
+def _run_startup_child(eager, importtime=False):
+    import json
+    import subprocess
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + [
+        "-c", _STARTUP_CHILD.format(root=os.path.dirname(os.path.abspath(__file__)), eager=eager)]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    wall = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "startup child failed")
+    marks = json.loads(proc.stdout.strip().splitlines()[-1])
+    marks["process_exit"] = wall
+    return marks, proc.stderr
+
+def _import_breakdown(stderr, top):
+    """Top-level modules by cumulative import time (microseconds) from -X importtime output"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue  # Header line, or a nested import already counted in its parent
+        name = name.strip()
+        totals[name] = totals.get(name, 0) + int(cumulative)
+    return sorted(totals.items(), key=lambda kv: -kv[1])[:top]
+
+def bench_startup(args):
+    import statistics
+    print(f"Startup: {args.rounds} fresh interpreters per mode (ms since interpreter start, median)")
+    milestones = ["flet_import", "db_import", "db_ready", "first_view", "engine_ready", "process_exit"]
+    print(f"{'mode':<8}" + "".join(f"{m:>14}" for m in milestones))
+    for label, eager in (("lazy", False), ("eager", True)):
+        runs = [_run_startup_child(eager)[0] for _ in range(args.rounds)]
+        row = [statistics.median(r.get(m, float('nan')) for r in runs) for m in milestones]
+        print(f"{label:<8}" + "".join(f"{v:>14.1f}" for v in row))
+
+    _marks, stderr = _run_startup_child(False, importtime=True)
+    print(f"\nImport-time breakdown (lazy mode, top {args.top} top-level modules, cumulative):")
+    for name, us in _import_breakdown(stderr, args.top):
+        print(f"  {name:<32} {us / 1000:>8.1f} ms")
+    return 0
+
+# --- END-TO-END SUITE ---
+
+def bench_analyzers(args):
+    from create_safe_test_txt import generate_corpus
+    from scan_profiler import ScanProfiler
+    from threat_engine import ThreatEngine
+
+    folder = tempfile.mkdtemp(prefix="tv_analyzers_")
+    try:
+        manifest = generate_corpus(folder, args.files, args.size_kb, seed=args.seed)
+        engines = {"full": ThreatEngine(early_exit=False), "early exit": ThreatEngine(early_exit=True)}
+        for engine in engines.values():
+            engine.attach_profiler(ScanProfiler())
+        per_kind = {name: {} for name in engines}
+        verdicts = {name: {} for name in engines}
+        # Interleaved rounds (alternating which mode goes first) so both see the same page cache / CPU frequency
+        for i in range(args.rounds):
+            for name, engine in sorted(engines.items(), reverse=i % 2 == 1):
+                for fp, kind in manifest:
+                    t0 = time.perf_counter()
+                    res = engine.scan_file(fp)
+                    ms = (time.perf_counter() - t0) * 1000
+                    per_kind[name].setdefault(kind, []).append(ms)
+                    verdicts[name][fp] = res.get('severity', 'SAFE')
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    changed = sum(verdicts["full"][fp] != verdicts["early exit"][fp] for fp, _k in manifest)
+    print(f"Analyzer pipeline: {len(manifest)} files x {args.size_kb} KB, {args.rounds} rounds, mean ms/file")
+    print(f"{'kind':<14}{'full':>10}{'early exit':>12}{'saved':>9}")
+    totals = {name: sum(sum(v) for v in per_kind[name].values()) for name in engines}
+    for kind in sorted(per_kind["full"]):
+        full = per_kind["full"][kind]
+        early = per_kind["early exit"][kind]
+        a, b = sum(full) / len(full), sum(early) / len(early)
+        print(f"{kind:<14}{a:>10.2f}{b:>12.2f}{1 - b / a if a else 0:>9.1%}")
+    n = len(manifest) * args.rounds
+    print(f"{'all':<14}{totals['full'] / n:>10.2f}{totals['early exit'] / n:>12.2f}"
+          f"{1 - totals['early exit'] / totals['full'] if totals['full'] else 0:>9.1%}")
+
+    print("Stage runs (full -> early exit):")
+    stages = {name: engine.profiler.summary()["stages"] for name, engine in engines.items()}
+    for stage in sorted(stages["full"], key=lambda st: -stages["full"][st]["total_ms"]):
+        before = stages["full"][stage]["count"]
+        after = stages["early exit"].get(stage, {}).get("count", 0)
+        print(f"  {stage:<10}{before:>8} -> {after:<8}")
+    print(f"Severity changes: {changed}" + (" ❌" if changed else " ✅"))
+    return 1 if changed else 0
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far (MB), None if the platform can't tell"""
+    # Linux: VmHWM belongs to this process image. ru_maxrss survives exec, so a child started from a
+    # big benchmark process would report the parent's peak.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+def _percentiles(values_ms):
+    ordered = sorted(values_ms)
+    if not ordered:
+        return {}
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return {
+        "p50_ms": pct(0.50), "p90_ms": pct(0.90), "p99_ms": pct(0.99),
+        "max_ms": ordered[-1], "mean_ms": sum(ordered) / len(ordered)
+    }
+
+_MEMORY_CHILD = r'''
+import sys, json
+sys.path.insert(0, {root!r})
+from benchmark import _peak_rss_mb
+from discovery import DiscoveryFilter, walk_files
+from threat_engine import ThreatEngine
+from scan_cache import VerdictCache
+from scan_backend import create_backend
+from scan_pipeline import ScanPipeline
+from scan_summary import ScanSummary
+engine = ThreatEngine()
+engine.attach_cache(VerdictCache({cache!r}))
+flt = DiscoveryFilter()
+backend = create_backend(engine, kind={backend!r}, workers={workers!r} or None)
+# The same tree walked `repeat` times stands in for a drive `repeat` times larger
+pipeline = ScanPipeline(backend, lambda root: walk_files(root, flt), [{folder!r}] * {repeat})
+summary = ScanSummary()
+try:
+    for fp, res in pipeline.results():
+        summary.add(fp, res)
+finally:
+    backend.shutdown()
+engine.cache.flush()
+print(json.dumps({{"files": summary.files, "threats": summary.threats, "peak_rss_mb": _peak_rss_mb()}}))
+'''
+
+def _run_memory_child(folder, repeat, cache, backend, workers):
+    import json
+    import subprocess
+    code = _MEMORY_CHILD.format(root=os.path.dirname(os.path.abspath(__file__)), folder=folder, repeat=repeat,
+                                cache=cache, backend=backend, workers=workers)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "memory child failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _memory_scaling(folder, repeat, backend, workers):
+    """
+    Peak RSS of a full scan (pipeline + summary) in fresh processes over 1x and `repeat`x the corpus.
+    A warm-up run fills a private verdict cache first, so both measured runs do the same work per file
+    and any difference is per-file bookkeeping.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="tv_memcache_")
+    try:
+        cache = os.path.join(cache_dir, "verdicts.db")
+        _run_memory_child(folder, 1, cache, backend, workers)
+        small = _run_memory_child(folder, 1, cache, backend, workers)
+        large = _run_memory_child(folder, repeat, cache, backend, workers)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    if small["peak_rss_mb"] is None or large["peak_rss_mb"] is None:
+        return None
+    return {
+        "files_small": small["files"], "peak_rss_small_mb": small["peak_rss_mb"],
+        "files_large": large["files"], "peak_rss_large_mb": large["peak_rss_mb"],
+        "growth_mb": large["peak_rss_mb"] - small["peak_rss_mb"],
+    }
+
+# Metric paths compared against --baseline: (section, key, higher_is_better)
+_SUITE_KEY_METRICS = [
+    ("discovery", "files_per_s", True),
+    ("engine", "files_per_s", True),
+    ("engine", "p90_ms", False),
+    ("engine", "p99_ms", False),
+    ("pipeline", "files_per_s", True),
+    ("pipeline", "peak_rss_mb", False),
+]
+
+def _compare_baseline(results, baseline_path, tolerance):
+    import json
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\nAgainst baseline {baseline_path} (tolerance {tolerance:.0%}):")
+    for section, key, higher_better in _SUITE_KEY_METRICS:
+        old = baseline.get(section, {}).get(key)
+        new = results.get(section, {}).get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_better else change
+        flag = "❌" if worse > tolerance else "  "
+        regressions += worse > tolerance
+        print(f"{flag} {section + '.' + key:<24} {old:>10.2f} -> {new:>10.2f}  ({change:+.1%})")
+    return regressions
+
+def bench_suite(args):
+    import json
+    import platform
+    from datetime import datetime, timezone
+    from create_safe_test_txt import generate_corpus
+    from discovery import DiscoveryFilter, walk_files
+    from threat_engine import ThreatEngine, ENGINE_VERSION
+    from scan_backend import create_backend
+    from scan_pipeline import ScanPipeline
+
+    own_corpus = not args.corpus
+    folder = args.corpus or tempfile.mkdtemp(prefix="tv_suite_")
+    results = {"meta": {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "engine_version": ENGINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": entropy.HAS_NUMPY,
+        "args": {k: v for k, v in vars(args).items() if k != "func"},
+    }}
+    try:
+        # Corpus (generated once per seed/size; an existing --corpus folder is reused as-is)
+        t0 = time.perf_counter()
+        os.makedirs(folder, exist_ok=True)
+        if own_corpus or not os.listdir(folder):
+            manifest = generate_corpus(folder, args.files, args.size_kb, args.depth, args.fanout, args.seed)
+        else:
+            # Generated names are <kind>_<n>.<ext>
+            manifest = [(fp, os.path.basename(fp).rsplit('_', 1)[0]) for fp, _st in walk_files(folder, DiscoveryFilter())]
+        kinds = {}
+        for _fp, kind in manifest:
+            kinds[kind] = kinds.get(kind, 0) + 1
+        results["corpus"] = {
+            "files": len(manifest), "kinds": kinds, "bytes": sum(os.path.getsize(fp) for fp, _k in manifest),
+            "generate_s": time.perf_counter() - t0,
+        }
+        kind_of = dict(manifest)
+        print(f"Suite corpus: {len(manifest)} files, {results['corpus']['bytes'] / 1e6:.1f} MB in {folder}")
+
+        # 1. Discovery alone (best of N walks; the first one also warms the OS dentry cache)
+        flt = DiscoveryFilter()
+        best, found = float('inf'), 0
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            found = sum(1 for _ in walk_files(folder, flt))
+            best = min(best, time.perf_counter() - t0)
+        results["discovery"] = {"files": found, "seconds": best, "files_per_s": found / best if best else 0.0}
+
+        # 2. ThreatEngine.scan_file, one file at a time (no verdict cache: every file is analyzed)
+        engine = ThreatEngine()
+        if args.profile:
+            from scan_profiler import ScanProfiler
+            engine.attach_profiler(ScanProfiler(top_n=10))
+        latencies, per_kind = [], {}
+        severities = {}
+        t0 = time.perf_counter()
+        for fp, st in walk_files(folder, flt):
+            t1 = time.perf_counter()
+            res = engine.scan_file(fp, st)
+            ms = (time.perf_counter() - t1) * 1000
+            latencies.append(ms)
+            per_kind.setdefault(kind_of.get(fp, "other"), []).append(ms)
+            severities[res.get('severity', 'SAFE')] = severities.get(res.get('severity', 'SAFE'), 0) + 1
+        elapsed = time.perf_counter() - t0
+        results["engine"] = dict(
+            files=len(latencies), seconds=elapsed, files_per_s=len(latencies) / elapsed if elapsed else 0.0,
+            severities=severities, peak_rss_mb=_peak_rss_mb(), **_percentiles(latencies),
+            per_kind_mean_ms={k: sum(v) / len(v) for k, v in sorted(per_kind.items())},
+        )
+        if engine.profiler:
+            results["stages"] = engine.profiler.summary()
+            engine.attach_profiler(None)  # The pipeline run below is timed unprofiled
+
+        # 3. Full streaming pipeline: discovery + backend + result consumption
+        backend = create_backend(engine, kind=args.backend, workers=args.workers or None)
+        pipeline = ScanPipeline(backend, lambda root: walk_files(root, flt), [folder])
+        t0 = time.perf_counter()
+        try:
+            scanned = sum(1 for _ in pipeline.results())
+        finally:
+            backend.shutdown()
+        elapsed = time.perf_counter() - t0
+        results["pipeline"] = {
+            "backend": backend.name, "workers": backend.workers, "files": scanned, "seconds": elapsed,
+            "files_per_s": scanned / elapsed if elapsed else 0.0, "peak_rss_mb": _peak_rss_mb(),
+        }
+
+        # 4. Memory must not grow with the number of files scanned
+        if args.memory_repeat > 1:
+            memory = _memory_scaling(folder, args.memory_repeat, args.backend, args.workers)
+            if memory is not None:
+                memory["slack_mb"] = args.memory_slack_mb
+                memory["ok"] = memory["growth_mb"] <= args.memory_slack_mb
+                results["memory"] = memory
+    finally:
+        if own_corpus and not args.keep:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    d, e, p = results["discovery"], results["engine"], results["pipeline"]
+    print(f"discovery  {d['files_per_s']:>10.0f} files/s  ({d['files']} files)")
+    print(f"engine     {e['files_per_s']:>10.1f} files/s  p50 {e['p50_ms']:.1f} ms  p90 {e['p90_ms']:.1f} ms  "
+          f"p99 {e['p99_ms']:.1f} ms  max {e['max_ms']:.1f} ms")
+    for kind, ms in e["per_kind_mean_ms"].items():
+        print(f"  {kind:<14} {ms:>8.2f} ms/file")
+    if "stages" in results:
+        from scan_profiler import format_summary
+        print(format_summary(results["stages"]))
+    print(f"pipeline   {p['files_per_s']:>10.1f} files/s  ({p['backend']} x{p['workers']}, {p['seconds']:.2f} s)")
+    if p["peak_rss_mb"] is not None:
+        print(f"peak RSS   {p['peak_rss_mb']:>10.1f} MB")
+    m = results.get("memory")
+    if m:
+        print(f"memory     {m['files_small']} files {m['peak_rss_small_mb']:.1f} MB -> {m['files_large']} files "
+              f"{m['peak_rss_large_mb']:.1f} MB  ({m['growth_mb']:+.1f} MB) " + ("✅" if m["ok"] else "❌"))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline and _compare_baseline(results, args.baseline, args.tolerance):
+        return 1
+    if m and not m["ok"]:
+        print(f"❌ Peak RSS grew {m['growth_mb']:.1f} MB with {m['files_large'] // max(1, m['files_small'])}x the files")
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ThreatViper performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("entropy", help="Per-MB cost of the entropy engine vs the legacy loop")
+    p.add_argument("--size-mb", type=float, default=4)
+    p.add_argument("--rounds", type=int, default=5)
+    p.set_defaults(func=bench_entropy)
+
+    p = sub.add_parser("backends", help="Files/second for the thread vs process scan backends")
+    p.add_argument("--files", type=int, default=400)
+    p.add_argument("--size-kb", type=float, default=512)
+    p.add_argument("--workers", type=int, default=0, help="0 = backend default")
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("pe", help="Fast PE parsing (headers + imports only) vs the full pefile parse")
+    p.add_argument("--files", type=int, default=300)
+    p.add_argument("--size-kb", type=float, default=64)
+    p.add_argument("--seed", type=int, default=1337)
+    p.add_argument("--path", help="Benchmark the .exe/.dll/.sys files under this folder instead of a synthetic set")
+    p.add_argument("--rounds", type=int, default=3)
+    p.set_defaults(func=bench_pe)
+
+    p = sub.add_parser("ui", help="Scan result loop with inline UI calls vs the rate-limited progress reporter")
+    p.add_argument("--files", type=int, default=20000)
+    p.add_argument("--latency-ms", type=float, default=5.0, help="Simulated cost of one UI round-trip")
+    p.add_argument("--threat-every", type=int, default=50)
+    p.add_argument("--rate", type=float, default=4.0, help="Reporter UI updates per second")
+    p.set_defaults(func=bench_ui)
+
+    p = sub.add_parser("governor", help="Adaptive scan concurrency vs fixed windows on a simulated device")
+    p.add_argument("--files", type=int, default=6000)
+    p.add_argument("--workers", type=int, default=50, help="Thread pool ceiling")
+    p.add_argument("--base-ms", type=float, default=10.0, help="Per-file service time without contention")
+    p.add_argument("--knee", type=int, default=8, help="Parallel requests the device serves without slowing down")
+    p.add_argument("--penalty", type=float, default=0.3, help="Slowdown per request beyond the knee")
+    p.add_argument("--interval", type=float, default=0.25, help="Governor decision interval (s)")
+    p.add_argument("--verbose", action="store_true", help="Print every level change")
+    p.set_defaults(func=bench_governor)
+
+    p = sub.add_parser("whitelist", help="Compiled whitelist matcher vs the linear any() check")
+    p.add_argument("--entries", type=int, default=10000)
+    p.add_argument("--lookups", type=int, default=20000)
+    p.set_defaults(func=bench_whitelist)
+
+    p = sub.add_parser("cloud", help="Pooled keep-alive session vs bare requests calls (local mock server)")
+    p.add_argument("--calls", type=int, default=200)
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated server latency per call")
+    p.set_defaults(func=bench_cloud)
+
+    p = sub.add_parser("startup", help="Time to first view and import-time breakdown, headless")
+    p.add_argument("--rounds", type=int, default=5)
+    p.add_argument("--top", type=int, default=12)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("analyzers", help="Time saved by stopping the analyzer pipeline once the verdict is settled")
+    p.add_argument("--files", type=int, default=600)
+    p.add_argument("--size-kb", type=float, default=64)
+    p.add_argument("--rounds", type=int, default=3)
+    p.add_argument("--seed", type=int, default=1337)
+    p.set_defaults(func=bench_analyzers)
+
+    p = sub.add_parser("suite", help="Synthetic corpus: discovery rate, engine latency, pipeline throughput, peak RSS (JSON)")
+    p.add_argument("--files", type=int, default=1000)
+    p.add_argument("--size-kb", type=float, default=64)
+    p.add_argument("--depth", type=int, default=4)
+    p.add_argument("--fanout", type=int, default=3)
+    p.add_argument("--seed", type=int, default=1337)
+    p.add_argument("--corpus", help="Use/keep the corpus in this folder instead of a temp dir")
+    p.add_argument("--keep", action="store_true", help="Don't delete the generated temp corpus")
+    p.add_argument("--rounds", type=int, default=3, help="Discovery walks (best is reported)")
+    p.add_argument("--backend", default=None, help="thread / process (default: THREATVIPER_SCAN_BACKEND)")
+    p.add_argument("--workers", type=int, default=0)
+    p.add_argument("--output", default="bench_results.json")
+    p.add_argument("--baseline", help="Earlier results JSON; exits 1 on regressions beyond --tolerance")
+    p.add_argument("--tolerance", type=float, default=0.15)
+    p.add_argument("--profile", action="store_true", help="Per-stage timing of the engine pass (adds \"stages\" to the JSON)")
+    p.add_argument("--memory-repeat", type=int, default=32,
+                   help="Also scan the corpus N times over in a fresh process and check peak RSS stays flat (0 = skip)")
+    p.add_argument("--memory-slack-mb", type=float, default=8.0)
+    p.set_defaults(func=bench_suite)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
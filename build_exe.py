@@ -13,10 +13,21 @@ def setup_environment():
     """Ensure all dependencies are ready for build"""
     print("🚀 Preparing build environment...")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller", "flet", "appwrite", "scikit-learn", "numpy", "python-dotenv"])
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller", "flet", "appwrite", "scikit-learn", "numpy", "python-dotenv", "pefile", "yara-python"])
     except:
         print("⚠️ Warning: Could not verify all dependencies, proceeding anyway...")
 
+def precompile_rules():
+    """Compile yara_rules.yar once at build time so the frozen app loads it with yara.load"""
+    try:
+        from rule_loader import precompile
+        artifact = precompile('yara_rules.yar', os.path.join('build', 'rules'))
+        print(f"📦 Precompiled YARA rules: {artifact}")
+        return artifact
+    except Exception as e:
+        print(f"⚠️ Warning: Could not precompile YARA rules ({e}). The app will compile them on first start.")
+        return None
+
 def build_executable():
     """Build the standalone EXE using PyInstaller"""
     print("🏗️ Building ThreatViper_Security.exe...")
@@ -25,6 +36,8 @@ def build_executable():
     for folder in ['dist', 'build']:
         if os.path.exists(folder):
             shutil.rmtree(folder)
+
+    rules_artifact = precompile_rules()
     
     # Define assets path
     # In Windows, we use ; for data separation in PyInstaller
@@ -44,10 +57,15 @@ def build_executable():
         '--hidden-import', 'sklearn.neighbors.typedefs',
         '--hidden-import', 'sklearn.neighbors.quad_tree',
         '--hidden-import', 'sklearn.tree._utils',
+        '--add-data', 'yara_rules.yar;.',
+        '--add-data', 'whitelist.json;.',
         '--clean',
         '--noconfirm',
         'main.py'
     ]
+    if rules_artifact:
+        # Ship the compiled rules next to the source inside the bundle (keyed by source hash)
+        cmd[-3:-3] = ['--add-data', f'{rules_artifact};.']
     
     try:
         subprocess.check_call(cmd)
@@ -0,0 +1,170 @@
+import os
+import time
+import threading
+from collections import deque
+
+# Pool sizing: the UI thread, the sync outbox and history refreshes share one host
+HTTP_POOL_SIZE = int(os.getenv("THREATVIPER_HTTP_POOL_SIZE", "8"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("THREATVIPER_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("THREATVIPER_HTTP_READ_TIMEOUT", "20"))
+# Log every cloud call with its latency and whether the connection was reused
+HTTP_TRACE = os.getenv("THREATVIPER_HTTP_TRACE", "0").lower() in ("1", "true", "yes", "on")
+
+def _appwrite_error(message, code, err_type=None, response=None):
+    # Imported on first error: keeps the appwrite package off the startup path
+    from appwrite.exception import AppwriteException
+    return AppwriteException(message, code, err_type, response)
+
+class CallRecord:
+    __slots__ = ("method", "path", "status", "elapsed_ms", "reused")
+
+    def __init__(self, method, path, status, elapsed_ms, reused):
+        self.method = method
+        self.path = path
+        self.status = status
+        self.elapsed_ms = elapsed_ms
+        self.reused = reused
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+class AppwriteHttp:
+    """
+    One keep-alive requests.Session for all Appwrite REST traffic.
+    The TCP+TLS handshake is paid once per pooled connection instead of once per call.
+    Responses are returned as plain dicts (the shape the app has always used); API errors
+    raise AppwriteException with the HTTP status in `.code`.
+    `requests` (and urllib3) are imported when the first call is made, not at app start.
+
+    Instrumentation: every call is recorded with its latency and whether it went over an
+    already-open connection (the urllib3 pool's connection count did not grow).
+    """
+    def __init__(self, endpoint, project_id, pool_size=None, timeout=None, history=256):
+        self.endpoint = endpoint.rstrip('/')
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self.pool_size = pool_size or HTTP_POOL_SIZE
+        # Auth/project headers live here until the session exists, then on the session itself
+        self.headers = {"X-Appwrite-Project": project_id or "", "Content-Type": "application/json"}
+        self._session = None
+        self._adapter = None
+
+        self.calls = deque(maxlen=history)
+        self.total_calls = 0
+        self.reused_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        session = requests.Session()
+        # Connect errors never reached the server, so they are safe to retry for any method
+        adapter = HTTPAdapter(
+            pool_connections=2, pool_maxsize=self.pool_size, pool_block=False,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, redirect=0, backoff_factor=0.2)
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        # Header changes from here on go straight to the live session
+        self.headers = session.headers
+        self._adapter = adapter
+        return session
+
+    # --- AUTH HEADERS ---
+
+    def set_cookie(self, cookie_header):
+        if cookie_header:
+            self.headers["Cookie"] = cookie_header
+        else:
+            self.headers.pop("Cookie", None)
+
+    def set_session(self, secret):
+        if secret:
+            self.headers["X-Appwrite-Session"] = secret
+        else:
+            self.headers.pop("X-Appwrite-Session", None)
+
+    def clear_auth(self):
+        self.set_cookie(None)
+        self.set_session(None)
+        if self._session is not None:
+            self._session.cookies.clear()
+
+    # --- REQUESTS ---
+
+    def _open_connections(self):
+        """Connections ever opened by the urllib3 pools (all for the one Appwrite host)"""
+        try:
+            pools = self._adapter.poolmanager.pools
+            return sum(pools[key].num_connections for key in pools.keys())
+        except Exception:
+            return None
+
+    def request(self, method, path, params=None, json_body=None, raw=False):
+        """Performs one API call. Returns the decoded JSON body (or the Response when raw=True)."""
+        import requests
+        session = self.session
+        url = self.endpoint + path
+        opened_before = self._open_connections()
+        t0 = time.perf_counter()
+        try:
+            resp = session.request(method, url, params=params, json=json_body, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._record(method, path, None, t0, False)
+            raise _appwrite_error(f"Network Error: {e}", 0, "network_error") from e
+        opened_after = self._open_connections()
+        # Approximate under concurrency: another thread may open a connection at the same moment
+        reused = opened_before is not None and opened_after == opened_before
+        self._record(method, path, resp.status_code, t0, reused)
+
+        if resp.status_code >= 400:
+            try:
+                body = resp.json()
+            except ValueError:
+                body = {"message": resp.text}
+            raise _appwrite_error(body.get("message", resp.reason), resp.status_code, body.get("type"), body)
+        if raw:
+            return resp
+        if not resp.content:
+            return {}
+        return resp.json()
+
+    def _record(self, method, path, status, t0, reused):
+        rec = CallRecord(method, path, status, (time.perf_counter() - t0) * 1000, reused)
+        with self._lock:
+            self.calls.append(rec)
+            self.total_calls += 1
+            self.reused_calls += reused
+        if HTTP_TRACE:
+            print(f"HTTP {method} {path} -> {status} {rec.elapsed_ms:.1f} ms ({'reused' if reused else 'new connection'})")
+
+    def stats(self):
+        """Latency and connection-reuse summary over the recent call window"""
+        with self._lock:
+            recent = list(self.calls)
+            total, reused = self.total_calls, self.reused_calls
+        latencies = sorted(c.elapsed_ms for c in recent)
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+        return {
+            "calls": total,
+            "reused": reused,
+            "new_connections": total - reused,
+            "reuse_rate": (reused / total) if total else 0.0,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "max_ms": latencies[-1] if latencies else 0.0,
+        }
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
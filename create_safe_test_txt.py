@@ -1,6 +1,11 @@
 import zipfile
 import os
+import io
+import sys
 import time
+import random
+import struct
+import argparse
 
 def create_dummy_apk(filename="benign_test_app.apk"):
     """
@@ -21,5 +26,227 @@ def create_dummy_apk(filename="benign_test_app.apk"):
     print(f"📍 Location: {os.path.abspath(filename)}")
     print("ℹ️  Copy this file to your 'Downloads' or 'Desktop' folder to trigger the Real-Time Shield.")
 
+# --- SYNTHETIC BENCHMARK CORPUS ---
+# Everything below is harmless filler shaped like the files the scanner cares about.
+# The same seed always produces byte-identical files, so benchmark runs are comparable.
+
+FILE_ALIGN = 0x200
+SECTION_ALIGN = 0x1000
+BENIGN_IMPORTS = {
+    b"KERNEL32.dll": [b"GetTickCount", b"GetModuleHandleA", b"ExitProcess", b"Sleep"],
+    b"USER32.dll": [b"MessageBoxA"],
+}
+
+def _align(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+def _section_payload(rng, size, entropy):
+    """'low' = text-like, 'mid' = small alphabet, 'high' = random (looks packed)"""
+    if entropy == "high":
+        return rng.randbytes(size)
+    if entropy == "mid":
+        return bytes(rng.choice(b"\x00\x01\x02\x03\x10\x20\x40\x80\xff\x90\xc3\x55") for _ in range(size))
+    return (b"benign padding for benchmark corpus. " * (size // 37 + 1))[:size]
+
+def _import_section(rva, imports):
+    """.idata body for `imports` placed at `rva`. Returns (bytes, directory size)."""
+    dlls = list(imports.items())
+    desc_size = (len(dlls) + 1) * 20
+    # Layout: descriptors | per dll: ILT, IAT | hint/name entries | dll names
+    offset = desc_size
+    thunks = []
+    for _dll, funcs in dlls:
+        ilt = offset
+        offset += (len(funcs) + 1) * 4
+        iat = offset
+        offset += (len(funcs) + 1) * 4
+        thunks.append((ilt, iat))
+    names = []
+    for _dll, funcs in dlls:
+        entries = []
+        for fn in funcs:
+            entries.append(offset)
+            offset += _align(2 + len(fn) + 1, 2)
+        names.append(entries)
+    dll_names = []
+    for dll, _funcs in dlls:
+        dll_names.append(offset)
+        offset += len(dll) + 1
+
+    body = bytearray(offset)
+    for i, (dll, funcs) in enumerate(dlls):
+        ilt, iat = thunks[i]
+        struct.pack_into("<IIIII", body, i * 20, rva + ilt, 0, 0, rva + dll_names[i], rva + iat)
+        for j, fn in enumerate(funcs):
+            struct.pack_into("<I", body, ilt + j * 4, rva + names[i][j])
+            struct.pack_into("<I", body, iat + j * 4, rva + names[i][j])
+            struct.pack_into("<H", body, names[i][j], j)
+            body[names[i][j] + 2:names[i][j] + 2 + len(fn)] = fn
+        body[dll_names[i]:dll_names[i] + len(dll)] = dll
+    return bytes(body), desc_size
+
+def build_pe(sections, imports=None):
+    """
+    Minimal well-formed PE32 image that pefile parses: `sections` is [(name, payload)], plus an
+    .idata section when `imports` ({dll: [function, ...]}) is given. The code never runs.
+    """
+    sections = list(sections)
+    n = len(sections) + (1 if imports else 0)
+    headers_size = _align(0x40 + 4 + 20 + 224 + 40 * n, FILE_ALIGN)
+
+    layout = []  # (name, payload, rva, raw_offset)
+    rva, raw = SECTION_ALIGN, headers_size
+    import_dir = (0, 0)
+    for name, payload in sections:
+        layout.append((name, payload, rva, raw))
+        rva += _align(max(len(payload), 1), SECTION_ALIGN)
+        raw += _align(len(payload), FILE_ALIGN)
+    if imports:
+        payload, dir_size = _import_section(rva, imports)
+        layout.append((b".idata", payload, rva, raw))
+        import_dir = (rva, dir_size)
+        rva += _align(len(payload), SECTION_ALIGN)
+        raw += _align(len(payload), FILE_ALIGN)
+    size_of_image = rva
+
+    out = bytearray(raw)
+    struct.pack_into("<2s58xI", out, 0, b"MZ", 0x40)
+    struct.pack_into("<4s", out, 0x40, b"PE\0\0")
+    struct.pack_into("<HHIIIHH", out, 0x44, 0x14C, n, 0x5F000000, 0, 0, 224, 0x0102)
+    code_rva = layout[0][2] if layout else 0
+    struct.pack_into(
+        "<HBBIIIIIIIIIHHHHHHIIIIHHIIIIII", out, 0x58,
+        0x10B, 14, 0, len(sections[0][1]) if sections else 0, 0, 0, code_rva, code_rva, code_rva,
+        0x400000, SECTION_ALIGN, FILE_ALIGN, 6, 0, 0, 0, 6, 0, 0, size_of_image, headers_size, 0,
+        2, 0, 0x100000, 0x1000, 0x100000, 0x1000, 0, 16
+    )
+    struct.pack_into("<II", out, 0x58 + 96 + 8, *import_dir)  # Data directory 1 = imports
+
+    table = 0x58 + 224
+    for i, (name, payload, s_rva, s_raw) in enumerate(layout):
+        characteristics = 0x60000020 if i == 0 else 0xC0000040
+        struct.pack_into("<8sIIIIIIHHI", out, table + i * 40, name[:8], len(payload), s_rva,
+                         _align(len(payload), FILE_ALIGN), s_raw, 0, 0, 0, 0, characteristics)
+        out[s_raw:s_raw + len(payload)] = payload
+    return bytes(out)
+
+def build_apk(rng, size, package):
+    """APK-shaped zip: manifest, a dex with a real header magic, resources and filler assets"""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as apk:
+        apk.writestr('AndroidManifest.xml',
+                     f'<manifest xmlns:android="http://schemas.android.com/apk/res/android" package="{package}">'
+                     '<uses-permission android:name="android.permission.INTERNET"/></manifest>')
+        apk.writestr('classes.dex', b"dex\n035\0" + rng.randbytes(max(0, size // 2 - 8)))
+        apk.writestr('resources.arsc', _section_payload(rng, max(64, size // 4), "mid"))
+        apk.writestr('assets/README.txt', 'BENIGN benchmark corpus file. It contains NO code.')
+        apk.writestr('META-INF/MANIFEST.MF', 'Manifest-Version: 1.0\r\nCreated-By: corpus\r\n')
+    return buf.getvalue()
+
+def _script_clean(size, ext):
+    line = {
+        '.ps1': "Write-Host 'benign build step'\n",
+        '.bat': "echo benign build step\r\n",
+        '.vbs': "WScript.Echo \"benign build step\"\n",
+    }[ext]
+    return (line * (size // len(line) + 1))[:size].encode()
+
+# Content that trips yara_rules.yar without doing anything: every rule gets exercised
+_RULE_MATCHES = {
+    '.ps1': "# benchmark fixture, never executed\n$cmd = 'powershell -nop -w hidden -c Write-Host hi'\n",
+    '.bat': "[autorun]\r\nopen=readme.txt\r\n",
+    '.vbs': "' benchmark fixture: YOUR FILES ARE ENCRYPTED? no. restore your files? not needed.\n",
+}
+
+# (kind, extension, default weight)
+CORPUS_KINDS = [
+    ("pe_low", ".exe", 20), ("pe_mixed", ".exe", 20), ("pe_packed", ".exe", 10),
+    ("apk", ".apk", 10), ("script_clean", None, 25), ("script_match", None, 10), ("keylogger_pe", ".exe", 5),
+]
+
+def generate_corpus(out_dir, files=1000, size_kb=64, depth=4, fanout=3, seed=1337, mix=None):
+    """
+    Writes `files` benign samples into a directory tree `depth` levels deep with `fanout`
+    subfolders per level. Sizes vary around size_kb. Returns [(path, kind)].
+    `mix` overrides kind weights, e.g. {"apk": 50, "script_clean": 50}.
+    """
+    rng = random.Random(seed)
+    weights = {k: w for k, _e, w in CORPUS_KINDS}
+    if mix:
+        weights = {k: float(mix.get(k, 0)) for k in weights}
+    kinds = [k for k in weights if weights[k] > 0]
+    ext_of = {k: e for k, e, _w in CORPUS_KINDS}
+
+    folders = [out_dir]
+    frontier = [out_dir]
+    for level in range(depth):
+        nxt = []
+        for parent in frontier:
+            for i in range(fanout):
+                nxt.append(os.path.join(parent, f"level{level}_{i}"))
+        folders.extend(nxt)
+        frontier = nxt
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    manifest = []
+    for n in range(files):
+        kind = rng.choices(kinds, weights=[weights[k] for k in kinds])[0]
+        size = max(1024, int(size_kb * 1024 * rng.uniform(0.5, 1.5)))
+        ext = ext_of[kind] or rng.choice(['.ps1', '.bat', '.vbs'])
+        path = os.path.join(rng.choice(folders), f"{kind}_{n:06d}{ext}")
+
+        if kind.startswith("pe_") or kind == "keylogger_pe":
+            text = {"pe_low": "low", "pe_mixed": "mid", "pe_packed": "high", "keylogger_pe": "low"}[kind]
+            chunk = size // 3
+            sections = [(b".text", _section_payload(rng, chunk, text)),
+                        (b".rdata", _section_payload(rng, chunk, "mid" if kind == "pe_mixed" else text)),
+                        (b".data", _section_payload(rng, chunk, "high" if kind != "pe_low" else "low"))]
+            if kind == "keylogger_pe":
+                sections[1] = (b".rdata", b"SetWindowsHookEx\0GetAsyncKeyState\0GetForegroundWindow\0" + sections[1][1])
+            data = build_pe(sections, BENIGN_IMPORTS)
+        elif kind == "apk":
+            data = build_apk(rng, size, f"com.bench.app{n}")
+        elif kind == "script_match":
+            data = (_RULE_MATCHES[ext].encode() + _script_clean(size, ext))[:size]
+        else:
+            data = _script_clean(size, ext)
+
+        with open(path, 'wb') as f:
+            f.write(data)
+        manifest.append((path, kind))
+    return manifest
+
+def _parse_mix(text):
+    mix = {}
+    for part in (text or "").split(','):
+        if '=' in part:
+            k, v = part.split('=', 1)
+            mix[k.strip()] = float(v)
+    return mix or None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Safe ThreatViper test files")
+    parser.add_argument("--corpus", metavar="DIR", help="Generate a synthetic benchmark corpus in DIR instead of one test APK")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--size-kb", type=float, default=64)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--mix", help="Kind weights, e.g. pe_low=20,apk=10 (kinds: " + ", ".join(k for k, _e, _w in CORPUS_KINDS) + ")")
+    args = parser.parse_args(argv)
+
+    if not args.corpus:
+        create_dummy_apk()
+        return 0
+    t0 = time.perf_counter()
+    manifest = generate_corpus(args.corpus, args.files, args.size_kb, args.depth, args.fanout, args.seed, _parse_mix(args.mix))
+    counts = {}
+    for _path, kind in manifest:
+        counts[kind] = counts.get(kind, 0) + 1
+    print(f"✅ {len(manifest)} files in {time.perf_counter() - t0:.1f}s -> {os.path.abspath(args.corpus)}")
+    print("   " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return 0
+
 if __name__ == "__main__":
-    create_dummy_apk()
+    sys.exit(main())
@@ -2,7 +2,6 @@
 import warnings
 import logging
 import os
-import sys
 
 # --- NUCLEAR WARNING SUPPRESSION (Applied before any imports) ---
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -10,43 +9,38 @@ warnings.filterwarnings("ignore", message=".*deprecated since 1.8.0.*")
 logging.getLogger('appwrite').setLevel(logging.CRITICAL)
 logging.getLogger('appwrite').propagate = False
 
-import requests
 import json
 import base64
 import time
-from dotenv import load_dotenv
-from appwrite.client import Client
-from appwrite.services.account import Account
-from appwrite.services.databases import Databases
-from appwrite.id import ID
-from appwrite.exception import AppwriteException
-from appwrite.query import Query
+import uuid
+import threading
 from datetime import datetime, timezone
+from scan_config import get_base_dir
+from sync_outbox import SyncOutbox
+from cloud_http import AppwriteHttp
+from history_store import HistoryStore
 
-# Helper to find files in EXE vs Source vs Android
-def get_base_dir():
-    # Robust check for Android
-    is_android = os.path.exists('/system/bin/app_process') or "ANDROID_ROOT" in os.environ
-    
-    if is_android:
-        # On Android, the home directory is usually the most reliable writable path
-        return os.path.expanduser("~")
-    
-    if getattr(sys, 'frozen', False):
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(os.path.abspath(__file__))
-
-# Load environment variables from the correct location
+# OPTIMIZATION: requests/urllib3 and appwrite are imported on first use (cloud_http), not here,
+# so building DBManager costs almost nothing on the startup path.
+
+# scan_config already loaded <base>/.env; only the working-directory fallback needs dotenv here
 env_path = os.path.join(get_base_dir(), ".env")
-if os.path.exists(env_path):
-    load_dotenv(env_path)
-else:
+if not os.path.exists(env_path):
+    from dotenv import load_dotenv
     load_dotenv() # Fallback
 
+# How long the cached profile is trusted without asking the server (seconds)
+PROFILE_CACHE_TTL = float(os.getenv("THREATVIPER_PROFILE_TTL", str(12 * 3600)))
+# After a failed restore, get_current_user() waits this long before trying the network again
+SESSION_RETRY_INTERVAL = 60
+
+def _unique_id():
+    # Same shape as appwrite's ID.unique() (hex timestamp + random padding), without importing the SDK
+    now = time.time()
+    return f"{int(now):08x}{int(now * 1e6) % 1000:05x}" + uuid.uuid4().hex[:7]
+
 class DBManager:
     def __init__(self):
-        self.client = Client()
-        
         # Configuration
         self.endpoint = os.getenv("APPWRITE_ENDPOINT", "https://cloud.appwrite.io/v1")
         self.project_id = os.getenv("APPWRITE_PROJECT_ID")
@@ -55,16 +49,35 @@ class DBManager:
         
         # Absolute path for session persistence (Always near the app)
         self.session_file = os.path.join(get_base_dir(), ".session.json")
+        # Cached account profile: lets the app route to the dashboard without a network round-trip
+        self.profile_file = os.path.join(get_base_dir(), ".profile.json")
+        self.profile_checked_at = 0.0   # When the server last confirmed the profile
+        self._restore_failed_at = None
+        self._auth_epoch = 0            # Bumped on login/logout so stale validations are ignored
+        self._validation_lock = threading.Lock()
+        self._on_invalid = None         # Callbacks of the validation in flight (None: nothing in flight)
         
-        self.client.set_endpoint(self.endpoint)
-        self.client.set_project(self.project_id)
-        
-        self.account = Account(self.client)
-        self.databases = Databases(self.client)
+        # OPTIMIZATION: every cloud call (login, account, history, sync) shares one pooled keep-alive session
+        self.http = AppwriteHttp(self.endpoint, self.project_id)
         
         self.current_user = None
         # DEFERRED: load_session() will be called by main.py or lazily
 
+        # Scan history is written to a local outbox and synced in the background,
+        # so scans and the shield never wait on the network and nothing is lost offline.
+        self.outbox = SyncOutbox(
+            self._create_history_document,
+            owner_fn=lambda: self.current_user['$id'] if self.current_user else None,
+            db_path=os.path.join(get_base_dir(), ".sync_outbox.db")
+        )
+        self.outbox.start()
+
+        # Local history cache: the history screen renders from it, then catches up in the background
+        self.history = HistoryStore(
+            self._list_history_documents,
+            db_path=os.path.join(get_base_dir(), ".history_cache.db")
+        )
+
     def _save_session_data(self, cookie_header, secret=None):
         try:
             data = {
@@ -80,7 +93,39 @@ class DBManager:
             # On Android, we MUST NOT crash here if storage is weird
             print(f"Session Save Warning: {e}")
 
+    def _save_profile(self, user):
+        self.profile_checked_at = time.time()
+        try:
+            with open(self.profile_file, "w") as f:
+                json.dump({"user": user, "timestamp": self.profile_checked_at}, f)
+        except Exception as e:
+            print(f"Profile Save Warning: {e}")
+
+    def _load_profile(self):
+        """(user, checked_at) from the profile cache, or (None, 0)"""
+        try:
+            with open(self.profile_file, "r") as f:
+                data = json.load(f)
+            return data.get('user'), float(data.get('timestamp', 0))
+        except Exception:
+            return None, 0.0
+
+    def _forget_session(self):
+        self.current_user = None
+        self.profile_checked_at = 0.0
+        self.http.clear_auth()
+        for path in (self.session_file, self.profile_file):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
+
     def load_session(self):
+        """
+        Restores the saved session. A cached profile (any age) is used as-is with no network call;
+        validate_session_async() then confirms it. Without a cached profile, the server is asked.
+        """
         if not os.path.exists(self.session_file):
             return False
         try:
@@ -90,13 +135,18 @@ class DBManager:
             if time.time() - data.get('timestamp', 0) > (30 * 24 * 3600):
                 return False
 
-            if data.get('cookie'):
-                self.client.add_header('Cookie', data['cookie'])
-            if data.get('secret'):
-                self.client.set_session(data['secret'])
+            self.http.set_cookie(data.get('cookie'))
+            self.http.set_session(data.get('secret'))
+
+            cached, checked_at = self._load_profile()
+            if cached:
+                self.current_user = cached
+                self.profile_checked_at = checked_at
+                return True
             
             try:
-                self.current_user = self.account.get()
+                self.current_user = self.http.request("GET", "/account")
+                self._save_profile(self.current_user)
                 return True
             except:
                 self.current_user = None
@@ -104,19 +154,63 @@ class DBManager:
         except:
             return False
 
+    def profile_is_fresh(self):
+        return time.time() - self.profile_checked_at < PROFILE_CACHE_TTL
+
+    def validate_session_async(self, on_invalid=None, force=True):
+        """
+        Confirms the restored session with the server on a background thread.
+        Only a definite rejection (401) signs the user out and calls on_invalid(); being offline
+        keeps the cached profile. With force=False nothing happens while the profile is fresh.
+        If a validation is already in flight, on_invalid is attached to it instead of starting another.
+        """
+        if not self.current_user or (not force and self.profile_is_fresh()):
+            return False
+        with self._validation_lock:
+            if self._on_invalid is not None:
+                if on_invalid:
+                    self._on_invalid.append(on_invalid)
+                return True
+            self._on_invalid = [on_invalid] if on_invalid else []
+        epoch = self._auth_epoch
+
+        def validate():
+            rejected = False
+            try:
+                user = self.http.request("GET", "/account")
+                if epoch == self._auth_epoch:
+                    self.current_user = user
+                    self._save_profile(user)
+            except Exception as e:
+                if getattr(e, 'code', 0) == 401 and epoch == self._auth_epoch:
+                    logging.error("Session expired or revoked; signing out")
+                    self._forget_session()
+                    rejected = True
+            finally:
+                with self._validation_lock:
+                    callbacks, self._on_invalid = self._on_invalid, None
+            if rejected:
+                for callback in callbacks:
+                    callback()
+
+        threading.Thread(target=validate, name="session-validate", daemon=True).start()
+        return True
+
     def login(self, email, password):
         try:
-            url = f"{self.endpoint}/account/sessions/email"
             payload = {"email": email, "password": password}
-            headers = {"X-Appwrite-Project": self.project_id, "Content-Type": "application/json"}
             
-            session_req = requests.post(url, json=payload, headers=headers)
-            if session_req.status_code >= 400:
-                return False, "Login Failed. Check credentials."
+            self.http.clear_auth()
+            try:
+                session_req = self.http.request("POST", "/account/sessions/email", json_body=payload, raw=True)
+            except Exception as e:
+                if getattr(e, 'code', 0):
+                    return False, "Login Failed. Check credentials."
+                raise
             
             cookie_parts = [f"{c.name}={c.value}" for c in session_req.cookies]
             cookie_header_val = "; ".join(cookie_parts)
-            self.client.add_header('Cookie', cookie_header_val)
+            self.http.set_cookie(cookie_header_val)
             
             secret_found = None
             try:
@@ -126,40 +220,52 @@ class DBManager:
                         sdata = json.loads(base64.b64decode(cv).decode('utf-8'))
                         if 'secret' in sdata:
                             secret_found = sdata['secret']
-                            self.client.set_session(secret_found)
+                            self.http.set_session(secret_found)
                             break
             except: pass
 
             self._save_session_data(cookie_header_val, secret_found)
-            self.current_user = self.account.get()
+            self._auth_epoch += 1
+            self.current_user = self.http.request("GET", "/account")
+            self._save_profile(self.current_user)
+            self._restore_failed_at = None
+            self.outbox.flush_now()
             return True, f"Welcome, {self.current_user['name']}"
         except Exception as e:
             return False, f"Auth Error: {str(e)}"
 
     def register(self, email, password, name):
         try:
-            self.account.create(ID.unique(), email, password, name)
+            self.http.request("POST", "/account", json_body={
+                "userId": _unique_id(), "email": email, "password": password, "name": name
+            })
             return self.login(email, password)
         except Exception as e:
             return False, f"Registration Failed: {str(e)}"
             
     def logout(self):
         try:
-            self.account.delete_session('current')
-            self.current_user = None
-            if os.path.exists(self.session_file):
-                os.remove(self.session_file)
+            self.http.request("DELETE", "/account/sessions/current")
+            self._auth_epoch += 1
+            self._forget_session()
             return True
         except:
             return False
 
     def get_current_user(self):
-        if not self.current_user:
-             self.load_session()
+        """In-memory user; never blocks on the network while a profile is known"""
+        if self.current_user:
+            # Past the TTL: re-check in the background, keep serving the cached profile
+            self.validate_session_async(force=False)
+            return self.current_user
+        if self._restore_failed_at and time.time() - self._restore_failed_at < SESSION_RETRY_INTERVAL:
+            return None
+        if not self.load_session():
+            self._restore_failed_at = time.time()
         return self.current_user
 
     def log_scan(self, files_scanned, threats_found, location, details=""):
-        """Syncs scan results with exact camelCase mapping and robust user check"""
+        """Queues scan results for sync with exact camelCase mapping and robust user check"""
         user = self.get_current_user()
         if not user: 
             logging.error("Sync failed: No active user session.")
@@ -175,27 +281,50 @@ class DBManager:
                 "location": str(location),
                 "details": str(details)[:1000]
             }
-            
-            self.databases.create_document(
-                database_id=self.db_id, 
-                collection_id=self.collection_history, 
-                document_id=ID.unique(), 
-                data=data
-            )
+            # Durable + non-blocking: the outbox worker uploads it (with retry) in the background
+            self.outbox.enqueue(data)
             return True
         except Exception as e:
             logging.error(f"Sync Issue for user {user.get('$id')}: {e}")
             return False
 
-    def get_history(self):
+    def _create_history_document(self, data, document_id):
+        """Outbox sender: one Appwrite document per (possibly coalesced) scan event"""
+        self.http.request("POST", self._documents_path(), json_body={
+            "documentId": document_id,
+            "data": data
+        })
+
+    def _documents_path(self):
+        return f"/databases/{self.db_id}/collections/{self.collection_history}/documents"
+
+    def _list_history_documents(self, queries):
+        result = self.http.request("GET", self._documents_path(), params={"queries[]": queries})
+        return result['documents']
+
+    def cached_history(self, limit=None, offset=0):
+        """Locally stored history, newest first (`limit` rows from `offset`). No network."""
+        if not self.current_user: return []
+        return self.history.cached(self.current_user['$id'], limit, offset)
+
+    def refresh_history(self):
+        """Fetches only documents newer than the cached ones. Returns how many arrived."""
+        if not self.get_current_user(): return 0
+        try:
+            return self.history.refresh(self.current_user['$id'])
+        except Exception as e:
+            logging.error(f"History Fetch Error: {e}")
+            return 0
+
+    def load_older_history(self):
+        """Next page of older documents (newest first), [] when there are no more"""
         if not self.get_current_user(): return []
+        if not self.history.has_older(self.current_user['$id']): return []
         try:
-            result = self.databases.list_documents(
-                database_id=self.db_id, 
-                collection_id=self.collection_history,
-                queries=[Query.order_desc("$createdAt"), Query.limit(50)]
-            )
-            return result['documents']
+            return self.history.load_older(self.current_user['$id'])
         except Exception as e:
             logging.error(f"History Fetch Error: {e}")
             return []
+
+    def has_older_history(self):
+        return bool(self.current_user) and self.history.has_older(self.current_user['$id'])
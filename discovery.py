@@ -0,0 +1,88 @@
+import os
+import re
+
+from scan_config import SCAN_EXTENSIONS, SCAN_EXCLUDE_DIRS
+
+# Our own files (installer, updates, quarantine tooling) are never scanned
+SELF_MARKER = "threatviper"
+
+class DiscoveryFilter:
+    """
+    Precompiled include/exclude rules for the file walker.
+    One case-insensitive regex per check replaces the repeated .lower() calls of the old os.walk loop.
+    """
+    def __init__(self, extensions=None, exclude_dirs=None, self_marker=SELF_MARKER):
+        extensions = extensions if extensions is not None else SCAN_EXTENSIONS
+        exclude_dirs = exclude_dirs if exclude_dirs is not None else SCAN_EXCLUDE_DIRS
+        self.extensions = tuple(e.lower() if e.startswith('.') else '.' + e.lower() for e in extensions)
+
+        alternation = "|".join(re.escape(e[1:]) for e in self.extensions) or r"(?!)"
+        self._ext_re = re.compile(rf"\.(?:{alternation})\Z", re.IGNORECASE)
+        self._self_re = re.compile(re.escape(self_marker), re.IGNORECASE) if self_marker else None
+
+        # Bare names match a folder anywhere; anything with a separator is an absolute path prefix
+        self._skip_names = frozenset(d.lower() for d in exclude_dirs if not ('/' in d or '\\' in d))
+        self._skip_prefixes = tuple(
+            os.path.normcase(os.path.normpath(d)) for d in exclude_dirs if '/' in d or '\\' in d
+        )
+
+    def accept_file(self, name):
+        if not self._ext_re.search(name):
+            return False
+        # Already quarantined files end in .locked and never reach here via the extension check
+        if self._self_re and self._self_re.search(name):
+            return False
+        return True
+
+    def accept_dir(self, name, path):
+        if name.lower() in self._skip_names:
+            return False
+        if self._skip_prefixes and os.path.normcase(path).startswith(self._skip_prefixes):
+            return False
+        return True
+
+def _sorted_entries(folder):
+    try:
+        with os.scandir(folder) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []  # Permission denied, vanished folder, etc.
+
+def walk_files(root, flt=None, resume_after=None):
+    """
+    os.scandir based walker. Yields (path, stat_result) for every file passing the filter.
+    The stat comes from the DirEntry (free on Windows, one call on POSIX) and travels with the
+    path, so later stages (verdict cache, size checks, the engine) never stat the file again.
+    Symlinked folders are not followed, same as os.walk.
+
+    Depth-first with every folder's entries sorted by name, so the order is stable between runs:
+    with `resume_after` (a path yielded by an earlier walk of the same root) the walk continues
+    right after it, skipping whole subtrees that sort before it without listing them.
+    """
+    flt = flt or DiscoveryFilter()
+    cursor = tuple(os.path.relpath(resume_after, root).split(os.sep)) if resume_after else None
+    stack = [iter(_sorted_entries(root))]
+    parts = []
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            if parts:
+                parts.pop()
+            continue
+        try:
+            key = (*parts, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                if not flt.accept_dir(entry.name, entry.path):
+                    continue
+                # Every file below sorts before the cursor: done in an earlier run
+                if cursor and key < cursor[:len(key)]:
+                    continue
+                stack.append(iter(_sorted_entries(entry.path)))
+                parts.append(entry.name)
+            elif flt.accept_file(entry.name):
+                if cursor and key <= cursor:
+                    continue
+                yield entry.path, entry.stat()
+        except OSError:
+            continue  # Broken symlink or file removed mid-walk
@@ -0,0 +1,51 @@
+import math
+from collections import Counter
+
+# Vectorized histogram when NumPy is present (desktop builds), pure-Python fallback otherwise (Android)
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+def byte_histogram(data):
+    """
+    Counts of each byte value (0-255) in a single pass over `data`.
+    Accepts bytes, bytearray, memoryview or mmap slices.
+    """
+    if HAS_NUMPY:
+        return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    # Counter's C counting loop is one pass; 256 x bytes.count() was 256 passes
+    counts = [0] * 256
+    for value, n in Counter(memoryview(data).cast('B')).items():
+        counts[value] = n
+    return counts
+
+def entropy_from_histogram(counts, length):
+    """Shannon entropy (bits per byte, 0.0 - 8.0) from a byte histogram"""
+    if not length:
+        return 0.0
+    if HAS_NUMPY and isinstance(counts, np.ndarray):
+        p = counts[counts > 0] / float(length)
+        return float(-(p * np.log2(p)).sum())
+    entropy = 0.0
+    for n in counts:
+        if n:
+            p_x = n / length
+            entropy -= p_x * math.log2(p_x)
+    return entropy
+
+def shannon_entropy(data, start=0, end=None):
+    """
+    Shannon entropy of data[start:end] without copying the slice.
+    Used for whole-file entropy and per-section PE entropy alike.
+    """
+    view = memoryview(data)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast('B')
+    if start or end is not None:
+        view = view[start:end]
+    length = len(view)
+    if not length:
+        return 0.0
+    return entropy_from_histogram(byte_histogram(view), length)
@@ -0,0 +1,118 @@
+import os
+import json
+import sqlite3
+import threading
+
+from scan_config import get_base_dir
+
+# Documents per cloud request (initial page, each catch-up page and each "load older" page)
+HISTORY_PAGE_SIZE = 25
+
+class HistoryStore:
+    """
+    Local copy of the cloud scan history, per user (SQLite).
+    The history screen renders from here instantly; refresh() then downloads only the documents
+    newer than the newest one already stored (cursor-paginated), and load_older() pages further
+    back on demand instead of stopping at a fixed limit.
+
+    `fetch_page(queries)` performs one list-documents call and returns its "documents" list.
+    """
+    def __init__(self, fetch_page, db_path=None, page_size=HISTORY_PAGE_SIZE):
+        self.fetch_page = fetch_page
+        self.db_path = db_path or os.path.join(get_base_dir(), ".history_cache.db")
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        # One refresh / older-page download at a time per store
+        self._net_lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "owner TEXT, id TEXT, created_at TEXT, doc TEXT, PRIMARY KEY (owner, id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_by_time ON history (owner, created_at)")
+        # exhausted = 1 once load_older() reached the first document ever written
+        self._conn.execute("CREATE TABLE IF NOT EXISTS history_meta (owner TEXT PRIMARY KEY, exhausted INTEGER)")
+        self._conn.commit()
+
+    # --- LOCAL READS (never touch the network) ---
+
+    def cached(self, owner, limit=None, offset=0):
+        """Stored documents, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc FROM history WHERE owner=? ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                (owner, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def has_older(self, owner):
+        with self._lock:
+            row = self._conn.execute("SELECT exhausted FROM history_meta WHERE owner=?", (owner,)).fetchone()
+        return not (row and row[0])
+
+    def _edge(self, owner, newest):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, created_at FROM history WHERE owner=? ORDER BY created_at {0}, id {0} LIMIT 1"
+                .format("DESC" if newest else "ASC"), (owner,)
+            ).fetchone()
+
+    def _store(self, owner, docs):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO history (owner, id, created_at, doc) VALUES (?, ?, ?, ?)",
+                [(owner, d['$id'], d.get('$createdAt', ''), json.dumps(d)) for d in docs]
+            )
+            self._conn.commit()
+
+    def _mark_exhausted(self, owner):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO history_meta (owner, exhausted) VALUES (?, 1)", (owner,))
+            self._conn.commit()
+
+    # --- NETWORK ---
+
+    def refresh(self, owner):
+        """Downloads documents newer than the newest stored one. Returns how many were new."""
+        from appwrite.query import Query as Q
+        with self._net_lock:
+            newest = self._edge(owner, newest=True)
+            if newest is None:
+                # Empty cache: only the latest page; older pages come from load_older()
+                docs = self.fetch_page([Q.order_desc("$createdAt"), Q.limit(self.page_size)])
+                self._store(owner, docs)
+                if len(docs) < self.page_size:
+                    self._mark_exhausted(owner)
+                return len(docs)
+
+            newest_id, newest_ts = newest
+            # >= (not >): documents sharing the newest timestamp are re-read and deduplicated by id
+            base = [Q.greater_than_equal("$createdAt", newest_ts), Q.order_asc("$createdAt"), Q.limit(self.page_size)]
+            added = 0
+            cursor = None
+            while True:
+                docs = self.fetch_page(base + ([Q.cursor_after(cursor)] if cursor else []))
+                fresh = [d for d in docs if d['$id'] != newest_id]
+                self._store(owner, fresh)
+                added += len(fresh)
+                if len(docs) < self.page_size:
+                    return added
+                cursor = docs[-1]['$id']
+
+    def load_older(self, owner):
+        """Downloads the page of documents just before the oldest stored one. Returns them, newest first."""
+        from appwrite.query import Query as Q
+        with self._net_lock:
+            oldest = self._edge(owner, newest=False)
+            if oldest is None:
+                return []
+            docs = self.fetch_page([Q.order_desc("$createdAt"), Q.cursor_after(oldest[0]), Q.limit(self.page_size)])
+            self._store(owner, docs)
+            if len(docs) < self.page_size:
+                self._mark_exhausted(owner)
+            return docs
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,13 +1,10 @@
 # FINAL PRODUCTION VERSION
 import flet as ft
 import os
-import time
 import threading
-import shutil
 import logging
 import warnings
 from datetime import datetime
-import concurrent.futures
 
 # --- GLOBAL WARNING SILENCE ---
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -73,19 +70,28 @@ def main(page: ft.Page):
         loading_screen.content.controls[1].value = "Loading Threat Engine..."
         page.update()
         
-        global db, threat_engine
+        global db, engine_warmup
         # Initialize inside main so we don't block the Python process before Flet starts
-        from db_manager import DBManager
-        from threat_engine import ThreatEngine
+        from app_boot import boot
+        from scan_backend import create_backend, ThreadScanBackend
+        from scan_pipeline import ScanPipeline
+        from scan_checkpoint import ScanCheckpoint
+        from scan_governor import governor_for
+        from progress_reporter import ProgressReporter
+        from quarantine import quarantine_file as quarantine
+        from discovery import DiscoveryFilter, walk_files
+        from shield_watcher import create_watcher, SettleQueue
+        from scan_config import SHIELD_EXTENSIONS, SCAN_RESUME, SCAN_GOVERNOR
         
-        db = DBManager()
-        threat_engine = ThreatEngine()
+        # OPTIMIZATION: the threat engine (NumPy, pefile, YARA rules, verdict cache) warms up on a
+        # background thread; scans and the shield wait for it only if they start before it is ready
+        db, engine_warmup, boot_timer = boot()
         
         # Step 2: Session
         loading_screen.content.controls[1].value = "Restoring Session..."
         page.update()
         
-        # Load session is now non-fatal and non-blocking
+        # Non-fatal and offline-friendly: restores from the cached profile without a network round-trip
         db.load_session()
         
     except Exception as e:
@@ -108,6 +114,7 @@ def main(page: ft.Page):
 
     # State & Caching
     scan_running = False
+    active_pipeline = None
     shield_active = False
     cached_views = {}
     
@@ -265,7 +272,13 @@ def main(page: ft.Page):
         
         def run_scan(e):
             nonlocal scan_running
-            if scan_running: return
+            if scan_running:
+                # Second tap stops the running scan right away
+                if active_pipeline and not active_pipeline.cancelled:
+                    active_pipeline.cancel()
+                    status_text.value = "Stopping scan..."
+                    page.update()
+                return
             scan_running = True
             scan_progress.visible = True
             status_text.value = "Initializing Scan..."
@@ -274,8 +287,31 @@ def main(page: ft.Page):
             page.update()
             threading.Thread(target=perform_scan).start()
         
+        def engine_or_none():
+            """Waits for the background engine warm-up; None (with a message) if it failed"""
+            if not engine_warmup.ready:
+                try:
+                    current_file_text.value = "Loading threat engine..."
+                    page.update()
+                except: pass
+            try:
+                return engine_warmup.get()
+            except Exception as e:
+                page.open(ft.SnackBar(ft.Text(f"Threat engine unavailable: {e}"), bgcolor="red400"))
+                page.update()
+                return None
+
         def perform_scan():
-            nonlocal scan_running
+            nonlocal scan_running, active_pipeline
+            threat_engine = engine_or_none()
+            if threat_engine is None:
+                scan_running = False
+                scan_progress.visible = False
+                status_text.value = "System Protected"
+                status_text.color = "green400"
+                current_file_text.value = ""
+                page.update()
+                return
             # ADAPTATION: Use Windows paths or user home
             # ADAPTATION: Platform-specific paths
             if page.platform == ft.PagePlatform.ANDROID:
@@ -295,7 +331,6 @@ def main(page: ft.Page):
                     os.path.join(user_home, "Telegram/Telegram Documents"),
                     os.path.join(user_home, "Android/data/org.telegram.messenger/files/Telegram/Telegram Documents")
                 ]
-                all_files = []
             else:
                 # Windows/Desktop Paths
                 user_home = os.path.expanduser("~")
@@ -316,61 +351,78 @@ def main(page: ft.Page):
                     os.path.join(user_home, "Pictures"),
                     os.path.join(os.getenv('TEMP'), '') if os.getenv('TEMP') else "C:\\Temp"
                 ] + drives 
-                all_files = []
             
-            # Dangerous Extensions only (Protect User Data)
-            # REMOVED .dll to reduce file count (User Request for optimization).
-            # DLLs are libraries and rarely primary threats for end-users compared to EXEs/APKs.
-            dangerous_exts = ('.exe', '.msi', '.apk', '.bat', '.ps1', '.vbs', '.scr')
-
-            # OPTIMIZATION: Skip System & Heavy Dev Folders to speed up initialization
-            # Case-insensitive Set for proper matching on Windows
-            skip_dirs = {s.lower() for s in {
-                'Windows', 'Program Files', 'Program Files (x86)', 'ProgramData', 'Common Files',
-                'System Volume Information', '$RECYCLE.BIN', 'Config.Msi',
-                'node_modules', '.git', '.gradle', '.idea', 'Android', 'AppData', 'Library',
-                'Steam', 'Epic Games', 'Origin', 'Ubisoft'
-            }}
-
-            # Parallel File Discovery (The Fix for Slow Init)
-            # We scan each root path in a separate thread so C:\ doesn't block F:\
-            def collect_files_from_path(root_path):
-                local_files = []
-                if not os.path.exists(root_path): return []
+            # Streaming Discovery (The Fix for Slow Init)
+            # Each root path is walked in its own thread so C:\ doesn't block F:\, and every
+            # file found goes straight to the scanners through a bounded queue.
+            # Extensions and skipped folders come from scan_config (THREATVIPER_SCAN_EXTENSIONS / _EXCLUDE_DIRS).
+            discovery_filter = DiscoveryFilter()
+            def collect_files_from_path(root_path, resume_after=None):
+                return walk_files(root_path, discovery_filter, resume_after)
+
+            # Resumable: an interrupted scan of the same roots continues from its last checkpoint
+            checkpoint = (ScanCheckpoint.load(paths) if SCAN_RESUME else None) or ScanCheckpoint(paths)
+            # Fixed-size tally (counts, worst threats, last threat lines) whatever the drive size
+            summary = checkpoint.summary
+            if checkpoint.resumed:
                 try:
-                    for root, dirs, files in os.walk(root_path):
-                        if not scan_running: break
-                        
-                        # Prune the search tree (Optimization)
-                        # Case-insensitive check
-                        dirs[:] = [d for d in dirs if d.lower() not in skip_dirs]
-                        
-                        for f in files:
-                            # 1. Skip ThreatViper itself
-                            if "threatviper" in f.lower(): continue
-                            # 2. Skip already locked files
-                            if f.endswith(".locked"): continue
-                            # 3. STRICT EXTENSION FILTER
-                            if not f.lower().endswith(dangerous_exts): continue
-                            
-                            local_files.append(os.path.join(root, f))
+                    status_text.value = f"Resuming scan ({summary.files} files already checked)..."
+                    page.update()
                 except: pass
-                return local_files
+            if threat_engine.cache: threat_engine.cache.reset_stats()
+            if threat_engine.profiler: threat_engine.profiler.reset()
+            
+            # PERFORMANCE: Adaptive Threading
+            # Android CPUs can't handle 50 threads comfortably (thread backend uses 10 there).
+            # THREATVIPER_SCAN_BACKEND=process moves CPU-bound analysis off the GIL on desktop.
+            # The thread count is only a ceiling: the governor sizes the window to what the disk/CPU deliver
+            backend = create_backend(threat_engine)
+            governor = governor_for(backend) if SCAN_GOVERNOR else None
+            pipeline = active_pipeline = ScanPipeline(
+                backend, lambda root: checkpoint.walk(root, collect_files_from_path), checkpoint.pending_roots(),
+                governor=governor
+            )
+
+            # OPTIMIZATION: the scan thread never talks to Flet. It publishes counters; the reporter's
+            # ticker redraws a few times per second and batches threats into one snackbar per tick.
+            def render_progress(state):
+                if pipeline.cancelled: return
+                # No total up front: report discovered-so-far vs scanned-so-far
+                more = "" if pipeline.discovery_done else "+"
+                status_text.value = f"Found {pipeline.discovered}{more} · Scanned {state.get('scanned', 0)}..."
+                current_file_text.value = f"Analyzing: {os.path.basename(state.get('current', ''))[-40:]}"
+                page.update()
 
-            # Execute Discovery in Parallel (20 workers for finding files)
-            with concurrent.futures.ThreadPoolExecutor(max_workers=20) as discovery_executor:
-                future_to_path = {discovery_executor.submit(collect_files_from_path, p): p for p in paths}
-                for future in concurrent.futures.as_completed(future_to_path):
-                    if not scan_running: break
+            def notify_threats(count, names):
+                if count == 1:
+                    message = f"🚨 Threat Quarantined: {names[0]}"
+                else:
+                    more = f" and {count - len(names)} more" if count > len(names) else ""
+                    message = f"🚨 {count} Threats Quarantined: {', '.join(names)}{more}"
+                page.open(ft.SnackBar(ft.Text(message), bgcolor="red400"))
+
+            reporter = ProgressReporter(render_progress, notify_threats).start()
+            try:
+                for fp_orig, res in pipeline.results():
                     try:
-                        all_files.extend(future.result())
-                        # Update UI incrementally during discovery
-                        status_text.value = f"Found {len(all_files)} files..."
-                        page.update()
+                        if summary.add(fp_orig, res):
+                            quarantine_file(fp_orig)
+                            reporter.threat(os.path.basename(fp_orig))
                     except: pass
-            
-            total_files = len(all_files)
-            if total_files == 0:
+                    checkpoint.done(fp_orig)
+                    reporter.publish(scanned=summary.files, current=fp_orig)
+            finally:
+                # Cancels whatever is still queued if the user stopped the scan
+                backend.shutdown(cancel=True)
+                active_pipeline = None
+                reporter.stop()
+                # Stopped (or crashed): keep the position for next time. Finished: nothing to resume.
+                if pipeline.cancelled or checkpoint.pending_roots():
+                    checkpoint.save()
+                else:
+                    checkpoint.clear()
+
+            if pipeline.discovered == 0 and not checkpoint.resumed and scan_running:
                 scan_running = False
                 try:
                     status_text.value = "No executable threats found to scan."
@@ -378,58 +430,40 @@ def main(page: ft.Page):
                     page.update()
                 except: pass
                 return
-
-            files_scanned = 0
-            threats_found = 0
-            details_log = []
-            
-            # PERFORMANCE: Adaptive Threading
-            # Android CPUs can't handle 50 threads comfortably.
-            worker_count = 10 if page.platform == ft.PagePlatform.ANDROID else 50
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=worker_count) as executor:
-                # ADAPTATION: Submit only filepath
-                futures = {executor.submit(threat_engine.scan_file, fp): fp for fp in all_files}
-                for future in concurrent.futures.as_completed(futures):
-                    if not scan_running: 
-                        executor.shutdown(wait=False, cancel_futures=True)
-                        break
-                    files_scanned += 1
-                    fp_orig = futures[future]
-                    if files_scanned % 10 == 0: 
-                        try:
-                            status_text.value = f"Scanned {files_scanned}/{total_files}..."
-                            current_file_text.value = f"Analyzing: {os.path.basename(fp_orig)[-40:]}"
-                            page.update()
-                        except: pass
-                    try:
-                        res = future.result()
-                        # ADAPTATION: Our engine uses lowercase 'critical'/'high', new code checks uppercase
-                        sev = res.get('severity', '').upper()
-                        if sev in ['CRITICAL', 'HIGH']:
-                            threats_found += 1
-                            score = res.get('risk_score', 0) # key is 'risk_score' not 'score'
-                            details_log.append(f"{sev}: {os.path.basename(fp_orig)} (Score: {score})")
-                            quarantine_file(fp_orig)
-                            try:
-                                page.open(ft.SnackBar(ft.Text(f"🚨 Threat Quarantined: {os.path.basename(fp_orig)}"), bgcolor="red400"))
-                            except: pass
-                    except: pass
                             
             scan_running = False
+            cache_note = ""
+            if threat_engine.cache:
+                threat_engine.cache.flush()
+                stats = threat_engine.cache.stats()
+                print(f"Verdict cache: {stats['hits']} hits / {stats['misses']} misses")
+                if stats['hits']: cache_note = f" ({stats['hits']} unchanged)"
+            if threat_engine.profiler:
+                print(threat_engine.profiler.format_summary())
+            if governor:
+                g = governor.summary()
+                capped = f", capped: {g['cap_reason']}" if g['cap_reason'] else ""
+                print(f"Scan concurrency: settled at {g['level']} of {g['max']} after {len(g['changes'])} changes{capped}")
             try:
                 scan_progress.visible = False
                 current_file_text.value = ""
-                db.log_scan(files_scanned, threats_found, "Full Scan", "\n".join(details_log))
-                if threats_found == 0:
-                    status_text.value = f"Scan Complete. {files_scanned} files safe."
+                # A stopped scan is logged once, when its resumed run finishes
+                if not pipeline.cancelled:
+                    db.log_scan(summary.files, summary.threats, "Full Scan", summary.log_text())
+                if pipeline.cancelled:
+                    status_text.value = f"Scan Stopped. {summary.files} files checked, {summary.threats} threats. Tap to resume."
+                    status_text.color = "orange400" if summary.threats == 0 else "red400"
+                elif summary.threats == 0:
+                    status_text.value = f"Scan Complete. {summary.files} files safe.{cache_note}"
                     status_text.color = "green400"
                 else:
-                    status_text.value = f"⚠️ {threats_found} Threats Neutralized."
+                    status_text.value = f"⚠️ {summary.threats} Threats Neutralized."
                     status_text.color = "red400"
                 page.update()
             except: pass
 
+        shield_watcher = None
+
         def toggle_shield(e):
             nonlocal shield_active
             shield_active = e.control.value
@@ -437,9 +471,13 @@ def main(page: ft.Page):
                 threading.Thread(target=shield_monitor, daemon=True).start()
                 page.open(ft.SnackBar(ft.Text("Active Defense Enabled"), bgcolor="green400"))
             else:
+                if shield_watcher: shield_watcher.stop()
                 page.open(ft.SnackBar(ft.Text("Defense Disabled"), bgcolor="red400"))
 
         def shield_monitor():
+            nonlocal shield_watcher
+            threat_engine = engine_or_none()
+            if threat_engine is None: return
             # ADAPTATION: Monitor Paths based on Platform
             if page.platform == ft.PagePlatform.ANDROID:
                  user_home = "/storage/emulated/0"
@@ -452,6 +490,7 @@ def main(page: ft.Page):
                     os.path.join(user_home, "WhatsApp/Media/WhatsApp Documents"),
                     os.path.join(user_home, "Telegram/Telegram Documents"),
                  ]
+                 top_level_only = set()
             else:
                 user_home = os.path.expanduser("~")
                 
@@ -470,90 +509,54 @@ def main(page: ft.Page):
                     os.path.join(user_home, "Pictures"),
                     os.getcwd() # Monitor the App folder itself (for testing)
                 ] + drives # Add C:\, F:\, etc. to the list
+                # Whole drives are only watched at the top level (as before); user folders recursively
+                top_level_only = set(drives) | {os.getcwd()}
             
-            dangerous_exts = ('.exe', '.msi', '.apk', '.bat', '.ps1', '.vbs', '.scr', '.com')
-            
-            last_state = {p: set(os.listdir(p)) for p in monitored_paths if os.path.exists(p)}
-            while shield_active:
-                time.sleep(2)
-                for p in monitored_paths:
-                    if not os.path.exists(p): continue
-                    try:
-                        current = set(os.listdir(p))
-                        new_files = current - last_state[p]
-                        for nf in new_files:
-                            if "threatviper" in nf.lower(): continue
-                            if nf.endswith(".locked"): continue
-                            if not nf.lower().endswith(dangerous_exts): continue
-                            
-                            fp = os.path.join(p, nf)
-                            # ADAPTATION: scan_file takes 1 arg
-                            res = threat_engine.scan_file(fp)
-                            sev = res.get('severity', '').upper()
-                            if sev == "CRITICAL" or (sev == "HIGH" and nf.lower().endswith('.apk')):
-                                quarantine_file(fp)
-                                db.log_scan(1, 1, "Real-time Shield", f"Quarantined {nf}")
-                                try:
-                                    page.open(ft.SnackBar(ft.Text(f"🛡️ Shield blocked: {nf}"), bgcolor="red400"))
-                                    page.update()
-                                except: pass
-                        last_state[p] = current
-                    except: pass
-
-        def quarantine_file(filepath):
-            try:
-                # LOCAL FOLDER QUARANTINE (User Request)
-                # Create a 'Quarantine' folder in the SAME directory as the threat.
-                # This avoids cross-drive move errors while keeping the folder clean.
-                
-                parent_dir = os.path.dirname(filepath)
-                q_dir = os.path.join(parent_dir, "Quarantine")
-                
-                if not os.path.exists(q_dir):
-                    os.makedirs(q_dir)
-                if not os.path.exists(q_dir):
-                    os.makedirs(q_dir)
-                    # Folder is visible so users can verify their files are safe (User Request)
-
-                filename = os.path.basename(filepath)
-                # Ensure unique name to prevent overwrite errors (timestamp)
-                new_name = f"{filename}_{int(time.time())}.locked"
-                dest_path = os.path.join(q_dir, new_name)
-
-                # Check if already locked (edge case)
-                if filepath.endswith(".locked"): return
-
-                # Move operation (safe because it's same drive/partition)
-                shutil.move(filepath, dest_path)
-                print(f"🔒 Quarantined (Local Folder): {filepath} -> {dest_path}")
-            except Exception as e:
-                print(f"Quarantine Move Error: {e}")
-                
-                # ACTIVE REMEDIATION: Handle "File in Use" / Running Virus
-                if "used by another process" in str(e) or "WinError 32" in str(e):
-                    # Only attempt taskkill on Windows
-                    if page.platform != ft.PagePlatform.ANDROID:
-
-                        print(f"⚠️ Threat is RUNNING! Attempting to kill: {filename}")
-                        try:
-                            # Force kill the process by name
-                            import subprocess
-                            subprocess.run(f'taskkill /F /IM "{filename}"', shell=True, timeout=3)
-                            time.sleep(1) # Allow Windows to release the file lock
-                            
-                            # Retrying Quarantine
-                            shutil.move(filepath, dest_path)
-                            print(f"💀 Process Killed & Quarantined: {filepath}")
-                            return
-                        except Exception as k_err:
-                            print(f"Kill Failed: {k_err}")
-
-                # Fallback: In-place rename if folder creation fails
+            # Event-driven watcher (inotify on Linux/Android, folder-mtime polling elsewhere)
+            roots = [(p, p not in top_level_only) for p in monitored_paths]
+            shield_filter = DiscoveryFilter(extensions=SHIELD_EXTENSIONS)
+
+            # Settled files are scanned in small parallel batches; one history entry per batch
+            shield_backend = ThreadScanBackend(threat_engine, workers=4)
+
+            def scan_settled(batch):
+                if not shield_active: return
+                blocked = []
+                for fp, res in shield_backend.scan_many(batch):
+                    nf = os.path.basename(fp)
+                    sev = res.get('severity', '').upper()
+                    if sev == "CRITICAL" or (sev == "HIGH" and nf.lower().endswith('.apk')):
+                        quarantine_file(fp)
+                        blocked.append(nf)
+                if not blocked: return
+                db.log_scan(len(blocked), len(blocked), "Real-time Shield", "Quarantined " + ", ".join(blocked))
                 try:
-                    os.rename(filepath, filepath + ".locked")
-                    print(f"🔒 Quarantined (Fallback): {filepath} -> .locked")
+                    msg = f"🛡️ Shield blocked: {blocked[0]}" if len(blocked) == 1 else f"🛡️ Shield blocked {len(blocked)} files"
+                    page.open(ft.SnackBar(ft.Text(msg), bgcolor="red400"))
+                    page.update()
                 except: pass
 
+            # Events wait here until the file is fully written (close-write / stable size+mtime)
+            settle_queue = SettleQueue(scan_settled)
+            watcher = create_watcher(roots, settle_queue.push, shield_filter)
+            shield_watcher = watcher
+            if not shield_active:
+                # Switched off while we were setting up: run() never starts, so release the watch handles here
+                watcher.close()
+                shield_backend.shutdown()
+                return
+            print(f"🛡️ Shield watching {len(roots)} locations ({watcher.name})")
+            threading.Thread(target=settle_queue.run, daemon=True).start()
+            try:
+                watcher.run()
+            finally:
+                settle_queue.stop()
+                shield_backend.shutdown()
+
+        def quarantine_file(filepath):
+            # Only attempt taskkill on Windows
+            return quarantine(filepath, kill_running=page.platform != ft.PagePlatform.ANDROID)
+
         shield_switch.on_change = toggle_shield
 
         v = ft.View(
@@ -602,49 +605,102 @@ def main(page: ft.Page):
         cached_views["/dashboard"] = v
         return v
 
+    def history_card(d):
+        threats = int(d.get('threatsFound', 0))
+        # If threatsFound is 0 but 'details' contains threat info, we adjust
+        details = d.get('details', '')
+        if threats == 0 and "CRITICAL" in details.upper():
+            threats = 1 # Fallback for legacy logs
+        
+        color = "red400" if threats > 0 else "green400"
+        icon = ft.Icons.GPP_BAD if threats > 0 else ft.Icons.GPP_GOOD
+        
+        status_text = "THREATS NEUTRALIZED" if threats > 0 else "SYSTEM SAFE"
+        
+        ts = d.get('timestamp', '')
+        try: 
+            dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+            ts_display = dt.strftime("%b %d, %H:%M")
+        except: ts_display = ts
+        
+        return ft.Container(
+            padding=10, border_radius=10, bgcolor="#1a1a1a", margin=ft.margin.only(bottom=10),
+            content=ft.Column([
+                ft.Row([
+                    ft.Icon(icon, color=color, size=24),
+                    ft.Column([
+                        ft.Text(f"{d.get('location', 'Manual Scan').upper()}", weight="bold", size=14),
+                        ft.Text(f"{ts_display}", size=11, color="grey500"),
+                    ], spacing=0, expand=True),
+                    ft.Text(status_text, color=color, size=11, weight="bold")
+                ]),
+                ft.Divider(color="grey900", height=10),
+                ft.Row([
+                    ft.Text(f"Files: {d.get('filesScanned', 0)}", size=12, color="grey300"),
+                    ft.Text(f"Threats: {threats}", size=12, color=color, weight="bold"),
+                ], alignment="spaceBetween"),
+                ft.Text(details[:200] + "..." if len(details) > 200 else details, size=10, color="grey600", italic=True) if details else ft.Container()
+            ])
+        )
+
     def history_view():
-        docs = db.get_history()
-        controls = []
-        if not docs:
-             controls.append(ft.ListTile(title=ft.Text("No scan history found.", color="grey")))
-        else:
-            for d in docs:
-                threats = int(d.get('threatsFound', 0))
-                # If threatsFound is 0 but 'details' contains threat info, we adjust
-                details = d.get('details', '')
-                if threats == 0 and "CRITICAL" in details.upper():
-                    threats = 1 # Fallback for legacy logs
-                
-                color = "red400" if threats > 0 else "green400"
-                icon = ft.Icons.GPP_BAD if threats > 0 else ft.Icons.GPP_GOOD
-                
-                status_text = "THREATS NEUTRALIZED" if threats > 0 else "SYSTEM SAFE"
-                
-                ts = d.get('timestamp', '')
-                try: 
-                    dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                    ts_display = dt.strftime("%b %d, %H:%M")
-                except: ts_display = ts
-                
-                controls.append(ft.Container(
-                    padding=10, border_radius=10, bgcolor="#1a1a1a", margin=ft.margin.only(bottom=10),
-                    content=ft.Column([
-                        ft.Row([
-                            ft.Icon(icon, color=color, size=24),
-                            ft.Column([
-                                ft.Text(f"{d.get('location', 'Manual Scan').upper()}", weight="bold", size=14),
-                                ft.Text(f"{ts_display}", size=11, color="grey500"),
-                            ], spacing=0, expand=True),
-                            ft.Text(status_text, color=color, size=11, weight="bold")
-                        ]),
-                        ft.Divider(color="grey900", height=10),
-                        ft.Row([
-                            ft.Text(f"Files: {d.get('filesScanned', 0)}", size=12, color="grey300"),
-                            ft.Text(f"Threats: {threats}", size=12, color=color, weight="bold"),
-                        ], alignment="spaceBetween"),
-                        ft.Text(details[:200] + "..." if len(details) > 200 else details, size=10, color="grey600", italic=True) if details else ft.Container()
-                    ])
-                ))
+        # OPTIMIZATION: stale-while-revalidate. Render the first page of the local copy instantly, then
+        # fetch only newer documents in the background. Scrolling pages through the local copy first
+        # and only asks the cloud for older documents once that runs out.
+        history_list = ft.ListView(padding=20, expand=True, on_scroll_interval=100)
+        sync_bar = ft.ProgressBar(color="cyan400", bgcolor="#1a1a1a", height=2)
+        page_size = db.history.page_size
+        paging = {"loading": False, "shown": 0, "end": False}
+
+        def render(docs):
+            paging["shown"] = len(docs)
+            if docs:
+                history_list.controls = [history_card(d) for d in docs]
+            else:
+                history_list.controls = [ft.ListTile(title=ft.Text("No scan history found.", color="grey"))]
+
+        def still_open():
+            return page.route == "/history"
+
+        def revalidate():
+            try:
+                added = db.refresh_history()
+                if added and still_open():
+                    # New documents go on top; keep as many older rows as were already shown
+                    render(db.cached_history(limit=max(paging["shown"], page_size) + added))
+            finally:
+                sync_bar.visible = False
+                if still_open():
+                    page.update()
+
+        def load_older():
+            try:
+                # Next page of the local copy first; the cloud only once it has nothing more
+                older = db.cached_history(limit=page_size, offset=paging["shown"])
+                if not older:
+                    older = db.load_older_history()
+                if not older:
+                    paging["end"] = not db.has_older_history()
+                    return
+                if still_open():
+                    if not paging["shown"]:
+                        history_list.controls.clear()
+                    paging["shown"] += len(older)
+                    history_list.controls.extend(history_card(d) for d in older)
+                    page.update()
+            finally:
+                paging["loading"] = False
+
+        def on_scroll(e):
+            # Near the bottom: the next older page (one at a time)
+            if paging["loading"] or paging["end"] or sync_bar.visible or e.pixels < e.max_scroll_extent - 300:
+                return
+            paging["loading"] = True
+            threading.Thread(target=load_older, daemon=True).start()
+
+        history_list.on_scroll = on_scroll
+        render(db.cached_history(limit=page_size))
+        threading.Thread(target=revalidate, daemon=True).start()
         return ft.View(
             "/history",
             bgcolor="#111111",
@@ -653,7 +709,8 @@ def main(page: ft.Page):
                     title=ft.Text("Scan Logs & Quarantine"), bgcolor="#1a1a1a",
                     leading=ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda _: page.go("/dashboard"))
                 ),
-                ft.ListView(controls=controls, padding=20, expand=True)
+                sync_bar,
+                history_list
             ]
         )
 
@@ -692,9 +749,25 @@ def main(page: ft.Page):
     page.on_route_change = route_change
     page.on_view_pop = view_pop
     
+    def session_rejected():
+        # Background validation found the restored session revoked/expired
+        cached_views.clear()
+        page.views.clear()
+        page.go("/login")
+        try:
+            page.open(ft.SnackBar(ft.Text("Session expired. Please sign in again."), bgcolor="orange400"))
+            page.update()
+        except: pass
+
+    # Routed from the cached profile; the server confirms the session in the background
     user = db.get_current_user()
     if user: page.go("/dashboard")
     else: page.go("/login")
+    boot_timer.mark("first_view")
+    if user: db.validate_session_async(on_invalid=session_rejected)
 
 if __name__ == "__main__":
+    # Required for the process scan backend inside the frozen (PyInstaller) executable
+    import multiprocessing
+    multiprocessing.freeze_support()
     ft.app(target=main, assets_dir="assets")
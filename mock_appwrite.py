@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Appwrite REST endpoints ThreatViper uses.
+Lets cloud sync (outbox, pooled sessions, history paging) be exercised without a real project.
+
+Usage:
+    python mock_appwrite.py [--port 8787] [--latency 0.05]
+    APPWRITE_ENDPOINT=http://127.0.0.1:8787/v1 APPWRITE_PROJECT_ID=mock python main.py
+
+Control endpoints (not part of Appwrite):
+    GET  /__mock/stats                  request counts, TCP connections, stored documents
+    POST /__mock/config {"offline": true, "latency": 0.2, "fail_next": 3, "drop_next": 1}
+    (drop_next: the next document writes are stored, but answered with a 503 as if the response was lost)
+"""
+
+import re
+import sys
+import json
+import time
+import base64
+import uuid
+import argparse
+import threading
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+def _now_iso(offset_us=0):
+    return (datetime.now(timezone.utc) + timedelta(microseconds=offset_us)).isoformat(timespec='microseconds').replace('+00:00', 'Z')
+
+class MockState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = {}       # email -> user dict (+ password)
+        self.sessions = {}    # secret -> email
+        self.documents = []   # history documents, oldest first
+        self.requests = {}    # "METHOD /route" -> count
+        self.connections = 0  # TCP connections accepted (keep-alive reuse keeps this low)
+        self.offline = False
+        self.latency = 0.0
+        self.fail_next = 0
+        self.drop_next = 0
+        self._seq = 0
+
+    def next_seq(self):
+        self._seq += 1
+        return self._seq
+
+def _parse_queries(values):
+    """Accepts the JSON query format of current SDKs and the legacy 'method(args)' strings"""
+    parsed = []
+    for q in values:
+        try:
+            data = json.loads(q)
+            parsed.append((data.get('method'), data.get('attribute'), data.get('values') or []))
+            continue
+        except ValueError:
+            pass
+        m = re.match(r'(\w+)\((.*)\)$', q)
+        if m:
+            args = [a.strip().strip('"\'') for a in m.group(2).split(',') if a.strip()]
+            attribute = args[0] if m.group(1) not in ('limit', 'offset', 'cursorAfter', 'cursorBefore') else None
+            vals = args[1:] if attribute else args
+            parsed.append((m.group(1), attribute, vals))
+    return parsed
+
+class MockAppwriteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # --- plumbing ---
+
+    def _send(self, code, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or []):
+            self.send_header(k, v)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _error(self, code, message, err_type="general_error"):
+        self._send(code, {"message": message, "code": code, "type": err_type, "version": "mock"})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def _current_email(self):
+        secret = self.headers.get("X-Appwrite-Session")
+        if not secret:
+            for part in (self.headers.get("Cookie") or "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name.startswith("a_session_") and not name.endswith("_legacy") and value:
+                    try:
+                        secret = json.loads(base64.b64decode(value + '=' * (-len(value) % 4)))['secret']
+                    except (ValueError, KeyError):
+                        secret = None
+        return self.state.sessions.get(secret)
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        path = url.path
+        route = re.sub(r'/databases/[^/]+/collections/[^/]+/', '/databases/{db}/collections/{col}/', path)
+        body = self._body() if method in ("POST", "PATCH", "PUT", "DELETE") else {}
+
+        if path.startswith("/__mock/"):
+            return self._control(method, path, body)
+
+        with self.state.lock:
+            self.state.requests[f"{method} {route}"] = self.state.requests.get(f"{method} {route}", 0) + 1
+            latency, offline = self.state.latency, self.state.offline
+            failing = self.state.fail_next > 0
+            if failing:
+                self.state.fail_next -= 1
+        if latency:
+            time.sleep(latency)
+        if offline or failing:
+            return self._error(503, "Mock server is offline", "general_service_disabled")
+
+        handler = {
+            ("POST", "/v1/account/sessions/email"): self._create_session,
+            ("GET", "/v1/account"): self._get_account,
+            ("POST", "/v1/account"): self._create_account,
+            ("DELETE", "/v1/account/sessions/current"): self._delete_session,
+        }.get((method, path))
+        if handler:
+            return handler(body)
+        if route == "/v1/databases/{db}/collections/{col}/documents":
+            if method == "POST":
+                return self._create_document(body)
+            if method == "GET":
+                return self._list_documents(parse_qs(url.query))
+        return self._error(404, f"Route not found: {method} {path}", "general_route_not_found")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    # --- mock control ---
+
+    def _control(self, method, path, body):
+        with self.state.lock:
+            if path == "/__mock/stats":
+                return self._send(200, {
+                    "requests": dict(self.state.requests),
+                    "connections": self.state.connections,
+                    "documents": len(self.state.documents),
+                })
+            if path == "/__mock/config" and method == "POST":
+                for key in ("offline", "latency", "fail_next", "drop_next"):
+                    if key in body:
+                        setattr(self.state, key, body[key])
+                return self._send(200, {"ok": True})
+        return self._error(404, "Unknown mock control route")
+
+    # --- account ---
+
+    def _user_doc(self, user):
+        return {k: v for k, v in user.items() if k != "password"}
+
+    def _create_account(self, body):
+        email = body.get("email")
+        with self.state.lock:
+            if email in self.state.users:
+                return self._error(409, "A user with the same email already exists", "user_already_exists")
+            now = _now_iso()
+            self.state.users[email] = {
+                "$id": body.get("userId") if body.get("userId") not in (None, "unique()") else uuid.uuid4().hex[:20],
+                "$createdAt": now, "$updatedAt": now, "name": body.get("name", ""), "registration": now,
+                "status": True, "labels": [], "passwordUpdate": now, "email": email, "phone": "",
+                "emailVerification": False, "phoneVerification": False, "mfa": False, "prefs": {},
+                "targets": [], "accessedAt": now, "password": body.get("password"),
+            }
+            return self._send(201, self._user_doc(self.state.users[email]))
+
+    def _create_session(self, body):
+        with self.state.lock:
+            user = self.state.users.get(body.get("email"))
+            if not user or user["password"] != body.get("password"):
+                return self._error(401, "Invalid credentials", "user_invalid_credentials")
+            secret = uuid.uuid4().hex
+            self.state.sessions[secret] = user["email"]
+        project = self.headers.get("X-Appwrite-Project", "mock")
+        cookie = base64.b64encode(json.dumps({"id": user["$id"], "secret": secret}).encode()).decode().rstrip("=")
+        self._send(201, {"$id": uuid.uuid4().hex[:20], "userId": user["$id"], "secret": ""}, headers=[
+            ("Set-Cookie", f"a_session_{project}={cookie}; path=/; httponly"),
+            ("Set-Cookie", f"a_session_{project}_legacy={cookie}; path=/; httponly"),
+        ])
+
+    def _get_account(self, body):
+        with self.state.lock:
+            email = self._current_email()
+            if not email:
+                return self._error(401, "User (role: guests) missing scope (account)", "general_unauthorized_scope")
+            return self._send(200, self._user_doc(self.state.users[email]))
+
+    def _delete_session(self, body):
+        with self.state.lock:
+            secret = self.headers.get("X-Appwrite-Session")
+            self.state.sessions.pop(secret, None)
+        self._send(204)
+
+    # --- documents ---
+
+    def _create_document(self, body):
+        with self.state.lock:
+            if not self._current_email():
+                return self._error(401, "Unauthorized", "user_unauthorized")
+            # Distinct, strictly increasing timestamps so cursor/createdAt paging is deterministic
+            seq = self.state.next_seq()
+            now = _now_iso(seq)
+            doc_id = body.get("documentId") if body.get("documentId") not in (None, "unique()") else uuid.uuid4().hex[:20]
+            if any(d["$id"] == doc_id for d in self.state.documents):
+                return self._error(409, "Document with the requested ID already exists", "document_already_exists")
+            doc = dict(body.get("data") or {})
+            doc.update({
+                "$id": doc_id,
+                "$sequence": seq, "$collectionId": "history", "$databaseId": "mock",
+                "$createdAt": now, "$updatedAt": now, "$permissions": [],
+            })
+            self.state.documents.append(doc)
+            if self.state.drop_next > 0:
+                self.state.drop_next -= 1
+                return self._error(503, "Mock response lost", "general_service_disabled")
+            return self._send(201, doc)
+
+    def _list_documents(self, query):
+        with self.state.lock:
+            email = self._current_email()
+            if not email:
+                return self._error(401, "Unauthorized", "user_unauthorized")
+            docs = list(self.state.documents)
+        descending = False
+        limit = 25
+        for method, attribute, values in _parse_queries(query.get("queries[]", [])):
+            if method == "orderDesc":
+                descending = True
+            elif method == "orderAsc":
+                descending = False
+            elif method == "limit" and values:
+                limit = int(values[0])
+            elif method == "greaterThan" and attribute and values:
+                docs = [d for d in docs if str(d.get(attribute, "")) > str(values[0])]
+            elif method == "greaterThanEqual" and attribute and values:
+                docs = [d for d in docs if str(d.get(attribute, "")) >= str(values[0])]
+            elif method == "lessThan" and attribute and values:
+                docs = [d for d in docs if str(d.get(attribute, "")) < str(values[0])]
+            elif method == "equal" and attribute:
+                docs = [d for d in docs if str(d.get(attribute)) in [str(v) for v in values]]
+        if descending:
+            docs.reverse()
+        for method, _attribute, values in _parse_queries(query.get("queries[]", [])):
+            if method in ("cursorAfter", "cursorBefore") and values:
+                ids = [d["$id"] for d in docs]
+                if values[0] in ids:
+                    i = ids.index(values[0])
+                    docs = docs[i + 1:] if method == "cursorAfter" else docs[:i]
+        total = len(docs)
+        self._send(200, {"total": total, "documents": docs[:limit]})
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.0):
+    """Starts the mock in a background thread. Returns (server, endpoint_url)."""
+    handler = type("Handler", (MockAppwriteHandler,), {"state": MockState()})
+    handler.state.latency = latency
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Appwrite stand-in for ThreatViper")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API call")
+    args = parser.parse_args(argv)
+
+    server, url = start_mock_server(args.host, args.port, args.latency)
+    print(f"🧪 Mock Appwrite listening on {url}")
+    print(f"   APPWRITE_ENDPOINT={url} APPWRITE_PROJECT_ID=mock")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+import json
+import sys
+
+from scan_config import get_base_dir
+
+# Below this many patterns a plain C-level `in` scan beats walking an automaton in Python
+LINEAR_SCAN_LIMIT = 64
+
+class SubstringMatcher:
+    """
+    Case-insensitive "does any pattern occur in this text" test, compiled once.
+    Large pattern sets use an Aho-Corasick automaton: O(len(text)) per lookup no matter how many
+    vendor entries the whitelist holds. Small sets keep a lowercased tuple for a linear scan.
+    Same semantics as the old `any(p.lower() in text.lower() for p in patterns)`.
+    """
+    def __init__(self, patterns):
+        self.patterns = tuple(dict.fromkeys(p.lower() for p in patterns if p))
+        self._goto = None
+        if len(self.patterns) > LINEAR_SCAN_LIMIT:
+            self._build()
+
+    def _build(self):
+        goto = [{}]       # state -> {char: next_state}
+        fail = [0]
+        out = [False]     # state ends (or its fail chain ends) a pattern
+        for pattern in self.patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append(False)
+                state = nxt
+            out[state] = True
+
+        # Breadth-first failure links (depth-1 states fail to the root)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] or out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text):
+        """True if any pattern is a substring of text (case-insensitive)"""
+        text = text.lower()
+        if self._goto is None:
+            return any(p in text for p in self.patterns)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                return True
+        return False
+
+    def __len__(self):
+        return len(self.patterns)
+
+def resolve_data_file(name):
+    """
+    Data files ship inside the PyInstaller bundle or next to the app. The working directory is never
+    searched: the headless scanner runs inside folders it scans, which must not whitelist themselves.
+    """
+    if os.path.isabs(name):
+        return name if os.path.exists(name) else None
+    candidates = []
+    if hasattr(sys, '_MEIPASS'):
+        candidates.append(os.path.join(sys._MEIPASS, name))
+    candidates.append(os.path.join(get_base_dir(), name))
+    candidates.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), name))
+    for c in candidates:
+        if os.path.exists(c):
+            return c
+    return None
+
+def load_whitelist(name='whitelist.json'):
+    """Returns (filename_patterns, path_patterns) from the whitelist data file, or None if it is missing/broken"""
+    path = resolve_data_file(name)
+    if not path:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return list(data.get('filenames', [])), list(data.get('paths', []))
+    except (OSError, ValueError) as e:
+        print(f"Whitelist Load Error: {e}")
+        return None
@@ -0,0 +1,89 @@
+import threading
+
+from scan_config import UI_UPDATES_PER_SECOND
+
+# Threat names listed in one coalesced notification ("... and N more" after that)
+NOTIFY_NAMES = 3
+
+class ProgressReporter:
+    """
+    Keeps scan speed independent of UI speed.
+    The scan thread publishes counters and reports threats (a dict update under a lock, never a UI
+    call); a ticker thread renders the latest state at most `rate` times per second and folds every
+    threat found since the previous tick into a single notification.
+
+    `render(state)` receives the last published counters; `notify(count, names)` the threats of one
+    interval (names holds at most NOTIFY_NAMES entries). Both run on the ticker thread.
+
+    Usage:
+        reporter = ProgressReporter(render, notify).start()
+        for fp, res in results:
+            reporter.publish(scanned=n, current=fp)
+        reporter.stop()  # one last render/notify with whatever is pending
+    """
+    def __init__(self, render, notify=None, rate=None):
+        self.render = render
+        self.notify = notify
+        self.interval = 1.0 / (rate or UI_UPDATES_PER_SECOND)
+        self.renders = 0
+        self._state = {}
+        self._version = 0
+        self._rendered = 0
+        self._threats = 0
+        self._names = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- SCAN THREAD ---
+
+    def publish(self, **state):
+        with self._lock:
+            self._state.update(state)
+            self._version += 1
+
+    def threat(self, name):
+        with self._lock:
+            self._threats += 1
+            if len(self._names) < NOTIFY_NAMES:
+                self._names.append(name)
+
+    # --- TICKER ---
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="progress-ticker", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._tick()
+
+    def _tick(self):
+        with self._lock:
+            changed = self._version != self._rendered
+            self._rendered = self._version
+            state = dict(self._state)
+            threats, names = self._threats, self._names
+            self._threats, self._names = 0, []
+        # The page may be gone (window closed mid-scan); a failed frame must not kill the ticker
+        if changed:
+            try:
+                self.render(state)
+                self.renders += 1
+            except Exception:
+                pass
+        if threats and self.notify:
+            try:
+                self.notify(threats, names)
+            except Exception:
+                pass
+
+    def stop(self):
+        """Stops the ticker and flushes the final state and any pending threats"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._tick()
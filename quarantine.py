@@ -0,0 +1,55 @@
+import os
+import time
+import shutil
+import subprocess
+
+def quarantine_file(filepath, kill_running=False):
+    """
+    Moves a threat into a 'Quarantine' folder next to it as <name>_<timestamp>.locked.
+    Returns the new path, or None if the file could not be moved or renamed.
+    With kill_running (Windows) a file that is in use is treated as a running threat: its
+    process is killed by name and the move retried.
+    """
+    # Check if already locked (edge case)
+    if filepath.endswith(".locked"):
+        return None
+
+    # LOCAL FOLDER QUARANTINE (User Request)
+    # Create a 'Quarantine' folder in the SAME directory as the threat.
+    # This avoids cross-drive move errors while keeping the folder clean.
+    # Folder is visible so users can verify their files are safe (User Request)
+    filename = os.path.basename(filepath)
+    q_dir = os.path.join(os.path.dirname(filepath), "Quarantine")
+    # Ensure unique name to prevent overwrite errors (timestamp)
+    dest_path = os.path.join(q_dir, f"{filename}_{int(time.time())}.locked")
+    try:
+        os.makedirs(q_dir, exist_ok=True)
+        # Move operation (safe because it's same drive/partition)
+        shutil.move(filepath, dest_path)
+        print(f"🔒 Quarantined (Local Folder): {filepath} -> {dest_path}")
+        return dest_path
+    except Exception as e:
+        print(f"Quarantine Move Error: {e}")
+
+        # ACTIVE REMEDIATION: Handle "File in Use" / Running Virus
+        if kill_running and ("used by another process" in str(e) or "WinError 32" in str(e)):
+            print(f"⚠️ Threat is RUNNING! Attempting to kill: {filename}")
+            try:
+                # Force kill the process by name
+                subprocess.run(f'taskkill /F /IM "{filename}"', shell=True, timeout=3)
+                time.sleep(1) # Allow Windows to release the file lock
+
+                # Retrying Quarantine
+                shutil.move(filepath, dest_path)
+                print(f"💀 Process Killed & Quarantined: {filepath}")
+                return dest_path
+            except Exception as k_err:
+                print(f"Kill Failed: {k_err}")
+
+    # Fallback: In-place rename if folder creation fails
+    try:
+        os.rename(filepath, filepath + ".locked")
+        print(f"🔒 Quarantined (Fallback): {filepath} -> .locked")
+        return filepath + ".locked"
+    except Exception:
+        return None
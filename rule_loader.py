@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+
+from scan_config import get_base_dir, RULES_CACHE_DIR, RULES_RELOAD_INTERVAL
+
+try:
+    import yara
+    HAS_YARA = True
+except ImportError:
+    HAS_YARA = False
+
+def resolve_rules_path(rules_path):
+    """
+    Finds the .yar source: an absolute path as given, else inside the PyInstaller bundle or next to
+    the app. Never the working directory, where a scanned folder could plant its own rules.
+    """
+    if os.path.isabs(rules_path):
+        return rules_path
+    candidates = []
+    if hasattr(sys, '_MEIPASS'):
+        candidates.append(os.path.join(sys._MEIPASS, rules_path))
+    candidates.append(os.path.join(get_base_dir(), rules_path))
+    candidates.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), rules_path))
+    for c in candidates:
+        if os.path.exists(c):
+            return c
+    return rules_path
+
+def source_digest(source):
+    return hashlib.sha256(source).hexdigest()[:16]
+
+def compiled_name(rules_path, digest):
+    """Compiled artifacts are keyed by the source hash: yara_rules.yar -> yara_rules-<hash>.yarc"""
+    stem = os.path.splitext(os.path.basename(rules_path))[0]
+    return f"{stem}-{digest}.yarc"
+
+def load_or_compile(rules_path, cache_dir=None):
+    """
+    Returns (compiled_rules, digest).
+    A precompiled artifact matching the source hash is loaded with yara.load (bundled copy first,
+    then the app-owned cache); otherwise the source is compiled once and saved to the cache.
+    Artifacts lying next to the source are not trusted.
+    """
+    cache_dir = cache_dir or RULES_CACHE_DIR
+    with open(rules_path, 'rb') as f:
+        source = f.read()
+    digest = source_digest(source)
+    name = compiled_name(rules_path, digest)
+
+    search = [cache_dir]
+    if hasattr(sys, '_MEIPASS'):
+        search.insert(0, sys._MEIPASS)
+    for folder in search:
+        candidate = os.path.join(folder, name)
+        if os.path.exists(candidate):
+            try:
+                return yara.load(candidate), digest
+            except yara.Error:
+                pass  # Built by another libyara version: recompile below
+
+    rules = yara.compile(source=source.decode('utf-8', 'ignore'))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = os.path.join(cache_dir, name + ".tmp")
+        rules.save(tmp_path)
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+        # Drop artifacts of older revisions of the same rule file
+        stem = os.path.splitext(os.path.basename(rules_path))[0]
+        for old in os.listdir(cache_dir):
+            if old != name and old.startswith(stem + "-") and old.endswith(".yarc"):
+                os.remove(os.path.join(cache_dir, old))
+    except (OSError, yara.Error) as e:
+        print(f"Rules Cache Warning: {e}")
+    return rules, digest
+
+def precompile(rules_path, out_dir):
+    """Compiles rules into out_dir for shipping inside a build. Returns the artifact path."""
+    with open(rules_path, 'rb') as f:
+        source = f.read()
+    out_path = os.path.join(out_dir, compiled_name(rules_path, source_digest(source)))
+    os.makedirs(out_dir, exist_ok=True)
+    yara.compile(source=source.decode('utf-8', 'ignore')).save(out_path)
+    return out_path
+
+class RuleSet:
+    """Compiled YARA rules that hot-reload when the .yar file's mtime changes"""
+    def __init__(self, rules_path, reload_interval=None, cache_dir=None):
+        self.path = resolve_rules_path(rules_path)
+        self.reload_interval = RULES_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self.cache_dir = cache_dir
+        self.rules = None
+        self.digest = None
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not HAS_YARA:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            self.rules, self.digest = load_or_compile(self.path, self.cache_dir)
+            self._mtime = mtime
+            return True
+        except (OSError, yara.Error) as e:
+            # Keep serving the previous rule set if an edited file fails to compile
+            print(f"YARA Rules Error: {e}")
+            return False
+
+    def check_reload(self):
+        """Cheap, throttled mtime check. Returns True when a new rule set was swapped in."""
+        if not self.reload_interval:
+            return False
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        with self._lock:
+            if now < self._next_check:
+                return False
+            self._next_check = now + self.reload_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime == self._mtime:
+                return False
+            old_digest = self.digest
+            if not self._load():
+                self._mtime = mtime  # Don't retry a broken file every interval; wait for the next edit
+                return False
+            return self.digest != old_digest
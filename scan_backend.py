@@ -0,0 +1,177 @@
+import os
+import concurrent.futures
+
+from scan_config import is_android, SCAN_BACKEND, SCAN_WORKERS, SCAN_CHUNK_SIZE
+
+# --- PROCESS WORKER SIDE ---
+# Each worker process builds its own engine (and compiled rules) exactly once, in the initializer.
+_worker_engine = None
+
+def _worker_init(rules_path, disabled_analyzers=None, early_exit=None, timings=False):
+    global _worker_engine
+    from threat_engine import ThreatEngine
+    _worker_engine = ThreatEngine(rules_path, disabled_analyzers=disabled_analyzers, early_exit=early_exit,
+                                  timings=timings)
+
+def _worker_scan_batch(items):
+    """
+    Scans a chunk of (path, stat_result) pairs; the parent already stat'ed them for its cache lookup.
+    Returns compact (score, severity, details, timings) tuples to keep IPC small.
+    """
+    out = []
+    for fp, st in items:
+        res = _worker_engine.scan_file(fp, st)
+        out.append((res.get('score', 0), res.get('severity', 'SAFE'), res.get('details', []), res.get('timings')))
+    return out
+
+def _expand(filepath, compact):
+    score, severity, details, _timings = compact
+    return {
+        "filename": os.path.basename(filepath),
+        "score": score,
+        "severity": severity,
+        "details": list(details),
+        "risk_score": score
+    }
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _results(futures):
+    """Results of finished futures; a failed chunk is logged and skipped, not fatal for the scan"""
+    for future in futures:
+        try:
+            yield from future.result()
+        except concurrent.futures.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Scan Batch Error: {e}")
+
+def _windowed(submit, chunks, window):
+    """
+    Submits chunks while keeping at most `window` of them in flight and yields results in
+    completion order. Bookkeeping stays the same size however many files there are; closing
+    the generator early cancels whatever is still pending.
+    """
+    in_flight = set()
+    try:
+        for chunk in chunks:
+            in_flight.add(submit(chunk))
+            if len(in_flight) >= window:
+                done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                yield from _results(done)
+        while in_flight:
+            done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            yield from _results(done)
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+def _as_item(item):
+    """Accepts a bare path or a (path, stat_result) pair"""
+    if isinstance(item, tuple):
+        return item
+    return item, None
+
+class ThreadScanBackend:
+    """Shared ThreatEngine on a thread pool. Cheap to start; I/O-bound scans overlap well."""
+    name = "thread"
+    chunk_size = 1
+
+    def __init__(self, engine, workers=None):
+        self.engine = engine
+        self.workers = workers or (10 if is_android() else 50)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+
+    def _scan_chunk(self, items):
+        return [(fp, self.engine.scan_file(fp, st)) for fp, st in items]
+
+    def submit(self, items):
+        """Schedules a list of paths (or (path, stat) pairs); the Future resolves to [(path, result), ...]"""
+        return self._executor.submit(self._scan_chunk, [_as_item(i) for i in items])
+
+    def scan_many(self, items, chunk_size=1):
+        """Yields (path, result) as files finish, in completion order"""
+        yield from _windowed(self.submit, _chunks(items, chunk_size), self.workers * 2)
+
+    def shutdown(self, cancel=False):
+        self._executor.shutdown(wait=not cancel, cancel_futures=cancel)
+
+class ProcessScanBackend:
+    """
+    Process pool for CPU-bound analysis (entropy, pefile) that the GIL serializes in threads.
+    Files travel in chunks to amortize IPC; the verdict cache stays in the parent, so only
+    cache misses are shipped to workers.
+    """
+    name = "process"
+
+    def __init__(self, engine, workers=None, chunk_size=None):
+        self.engine = engine
+        self.workers = workers or os.cpu_count() or 2
+        self.chunk_size = chunk_size or SCAN_CHUNK_SIZE
+        rules_path = engine.ruleset.path if engine.ruleset else engine.rules_path
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_worker_init,
+            initargs=(rules_path, engine.disabled_analyzers(), engine.early_exit, engine.timings)
+        )
+        # Process futures can't run parent-side code; a small thread pool resolves cache hits
+        # and stores fresh verdicts around each worker call.
+        # Two relays per worker keep the next chunk queued while the current one runs.
+        self._relay = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers * 2)
+
+    def _scan_chunk(self, items):
+        results = []
+        misses = []
+        for fp, st in items:
+            if st is None:
+                try:
+                    st = os.stat(fp)
+                except OSError:
+                    results.append((fp, self.engine.scan_file(fp)))
+                    continue
+            cached = self.engine.cached_verdict(fp, st)
+            if cached is not None:
+                results.append((fp, cached))
+            else:
+                misses.append((fp, st))
+        if misses:
+            compact = self._executor.submit(_worker_scan_batch, misses).result()
+            for (fp, st), c in zip(misses, compact):
+                res = _expand(fp, c)
+                self.engine.remember_verdict(fp, st, res)
+                # Added after caching: timings describe this run, not the verdict
+                if c[3]:
+                    res['timings'] = c[3]
+                results.append((fp, res))
+        return results
+
+    def submit(self, items):
+        return self._relay.submit(self._scan_chunk, [_as_item(i) for i in items])
+
+    def scan_many(self, items, chunk_size=None):
+        yield from _windowed(self.submit, _chunks(items, chunk_size or self.chunk_size), self.workers * 2)
+
+    def shutdown(self, cancel=False):
+        self._relay.shutdown(wait=not cancel, cancel_futures=cancel)
+        self._executor.shutdown(wait=not cancel, cancel_futures=cancel)
+
+def create_backend(engine, kind=None, workers=None, chunk_size=None):
+    """
+    Builds the configured scan backend (THREATVIPER_SCAN_BACKEND).
+    Android always uses threads: the app process there can't fork worker interpreters reliably.
+    """
+    kind = (kind or SCAN_BACKEND).lower()
+    workers = workers or SCAN_WORKERS or None
+    if kind == "process" and not is_android():
+        try:
+            return ProcessScanBackend(engine, workers, chunk_size)
+        except (OSError, NotImplementedError) as e:
+            print(f"Process backend unavailable ({e}), using threads")
+    return ThreadScanBackend(engine, workers)
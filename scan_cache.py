@@ -0,0 +1,100 @@
+import os
+import json
+import sqlite3
+import threading
+
+from scan_config import SCAN_CACHE_PATH
+
+class VerdictCache:
+    """
+    Persistent per-file verdict store (SQLite).
+    A verdict is reused only while the file's path, size, mtime and inode are unchanged
+    AND the engine signature (engine version + rules + whitelists) matches the one it was stored under.
+    """
+    def __init__(self, db_path=None, commit_every=256):
+        self.db_path = db_path or SCAN_CACHE_PATH
+        self.commit_every = commit_every
+        self.signature = None
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        parent = os.path.dirname(self.db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        # One shared connection; scanner threads serialize on self._lock
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass  # Some Android/SD storage refuses WAL; the default journal still works
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, result TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def bind(self, signature):
+        """Attach to an engine signature. Verdicts stored under any other signature are dropped."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key='signature'").fetchone()
+            if not row or row[0] != signature:
+                self._conn.execute("DELETE FROM verdicts")
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,))
+                self._conn.commit()
+                self._pending = 0
+            self.signature = signature
+
+    def lookup(self, path, st):
+        """Returns the cached result dict for an unchanged file, else None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, result FROM verdicts WHERE path=?", (path,)
+            ).fetchone()
+            # inode 0 means "unknown" (Windows DirEntry.stat() doesn't fill it) and matches any file-id
+            if row and row[0] == st.st_size and row[1] == st.st_mtime_ns and (
+                    row[2] == st.st_ino or not row[2] or not st.st_ino):
+                self.hits += 1
+                return json.loads(row[3])
+            self.misses += 1
+            return None
+
+    def store(self, path, st, result):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (path, size, mtime_ns, inode, result) VALUES (?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, json.dumps(result))
+            )
+            self._pending += 1
+            # Batch commits: one fsync per N verdicts instead of per file
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+
+from scan_config import get_base_dir, SCAN_CHECKPOINT_INTERVAL
+from scan_summary import ScanSummary
+
+CHECKPOINT_VERSION = 1
+
+class ScanCheckpoint:
+    """
+    Saved position of a multi-root scan, so an interrupted "Full Scan" (app closed, Android
+    killing the process, user stop) continues where it was instead of starting over.
+
+    Per root it keeps the walker cursor: the last file such that it and everything before it in
+    walk order has a verdict. Files finished out of order just past the cursor are remembered too
+    (a scan-window's worth at most) so they are not counted twice. Finished roots and the running
+    ScanSummary are saved with it. Written atomically every SCAN_CHECKPOINT_INTERVAL seconds.
+
+    Usage:
+        checkpoint = ScanCheckpoint.load(roots) or ScanCheckpoint(roots)
+        pipeline = ScanPipeline(backend, lambda r: checkpoint.walk(r, walker), checkpoint.pending_roots())
+        for fp, res in pipeline.results():
+            checkpoint.summary.add(fp, res)
+            checkpoint.done(fp)
+        checkpoint.clear() if finished else checkpoint.save()
+    `walker(root, resume_after)` must walk in a stable order (discovery.walk_files does).
+    """
+    def __init__(self, roots, path=None, interval=None):
+        self.path = path or os.path.join(get_base_dir(), ".scan_checkpoint.json")
+        self.interval = SCAN_CHECKPOINT_INTERVAL if interval is None else interval
+        self.roots = list(roots)
+        self.summary = ScanSummary()
+        self.completed = set()
+        self.cursors = {}
+        self.resumed = False
+        self._skip = {}           # root -> paths finished past the cursor in earlier runs, not yet walked past
+        self._pending = {}        # root -> OrderedDict(path -> finished?) in discovery order
+        self._owner = {}          # path -> deque of roots it was discovered under
+        self._walked = set()      # roots whose walk ran to the end in this run
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, roots, path=None, interval=None):
+        """The saved checkpoint for exactly these roots, else None"""
+        checkpoint = cls(roots, path, interval)
+        try:
+            with open(checkpoint.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != CHECKPOINT_VERSION or state.get("roots") != checkpoint.roots:
+            return None
+        checkpoint.completed = set(state.get("completed", []))
+        checkpoint.cursors = dict(state.get("cursors", {}))
+        checkpoint._skip = {root: set(paths) for root, paths in state.get("finished_ahead", {}).items()}
+        checkpoint.summary.restore(state.get("summary", {}))
+        checkpoint.resumed = True
+        return checkpoint
+
+    def pending_roots(self):
+        return [r for r in self.roots if r not in self.completed]
+
+    # --- DISCOVERY SIDE (walker threads) ---
+
+    def walk(self, root, walker):
+        """Wraps walker(root, resume_after) so every path it yields is tracked until done()"""
+        with self._lock:
+            self._pending[root] = OrderedDict()
+            # Stays on the instance until walked past: a run stopped before reaching these files
+            # must still save them, or the next resume would scan and count them again
+            skip = self._skip.setdefault(root, set())
+        try:
+            for item in walker(root, self.cursors.get(root)):
+                path = item[0] if isinstance(item, tuple) else item
+                # Tracked before it is handed on: the verdict can arrive before the next line runs
+                with self._lock:
+                    if path in skip:
+                        # Already has a verdict: finished in place, so the cursor can move past it
+                        skip.discard(path)
+                        self._pending[root][path] = True
+                        self._advance(root)
+                        continue
+                    self._pending[root][path] = False
+                    self._owner.setdefault(path, deque()).append(root)
+                yield item
+            with self._lock:
+                self._walked.add(root)
+                # Whatever is left was deleted or moved since
+                self._skip.pop(root, None)
+        finally:
+            with self._lock:
+                self._finish_root(root)
+
+    # --- RESULT SIDE (scan thread) ---
+
+    def done(self, path):
+        """Marks one file's verdict as recorded; saves if the interval has passed"""
+        with self._lock:
+            owners = self._owner.get(path)
+            if not owners:
+                return
+            root = owners.popleft()
+            if not owners:
+                del self._owner[path]
+            self._pending[root][path] = True
+            self._advance(root)
+            self._finish_root(root)
+            due = time.monotonic() - self._saved_at >= self.interval
+        if due:
+            self.save()
+
+    def _advance(self, root):
+        # Caller holds the lock. Moves the cursor over the finished prefix.
+        pending = self._pending[root]
+        while pending:
+            first, finished = next(iter(pending.items()))
+            if not finished:
+                break
+            pending.popitem(last=False)
+            self.cursors[root] = first
+
+    def _finish_root(self, root):
+        # Caller holds the lock. A walk stopped half-way (cancelled scan) leaves the root pending.
+        if root in self._walked and not self._pending.get(root):
+            self.completed.add(root)
+            self.cursors.pop(root, None)
+
+    # --- STORAGE ---
+
+    def save(self):
+        with self._lock:
+            state = {
+                "version": CHECKPOINT_VERSION,
+                "roots": self.roots,
+                "completed": sorted(self.completed),
+                "cursors": dict(self.cursors),
+                "finished_ahead": {},
+                "updated": time.time(),
+            }
+            # Finished in this run past the cursor, plus those of earlier runs not reached yet
+            for root in self.roots:
+                ahead = set(self._skip.get(root, ()))
+                ahead.update(p for p, finished in self._pending.get(root, {}).items() if finished)
+                if ahead:
+                    state["finished_ahead"][root] = sorted(ahead)
+            self._saved_at = time.monotonic()
+        state["summary"] = self.summary.state()
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Checkpoint Save Error: {e}")
+
+    def clear(self):
+        """The scan finished: nothing to resume"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+ThreatViper Headless Scanner
+Runs the scan engine without the dashboard (servers, build agents, file shares) and streams one
+JSON object per scanned file: {"path", "verdict", "score", "details", "timings"}, plus
+"quarantined" (new path or null) for threats when quarantine is on. "timings" are per-stage
+milliseconds; they are empty for verdicts served from the verdict cache.
+
+Folders are walked with the same discovery filter as the app (THREATVIPER_SCAN_EXTENSIONS /
+_EXCLUDE_DIRS), and so are paths read from stdin. Files named on the command line are always scanned.
+
+Usage:
+    python scan_cli.py PATH [PATH ...] [--output results.jsonl]
+    find /srv/share -type f | python scan_cli.py - --report-only
+    python scan_cli.py D:\\Builds --workers 8 --backend process --no-cache
+
+Exit status: 0 no threats, 1 threats found, 2 engine failed to start, 130 interrupted.
+Never imports flet or appwrite.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from scan_config import SCAN_CACHE_ENABLED, SCAN_GOVERNOR
+from discovery import DiscoveryFilter, walk_files
+from scan_backend import create_backend
+from scan_pipeline import ScanPipeline
+from scan_governor import governor_for
+from scan_summary import ScanSummary
+from quarantine import quarantine_file
+from app_boot import build_engine
+
+# Root name that stands for "paths listed on stdin, one per line"
+STDIN_ROOT = "-"
+
+def _walk_path(path, flt, explicit):
+    if os.path.isdir(path):
+        yield from walk_files(path, flt)
+        return
+    if not explicit and not flt.accept_file(os.path.basename(path)):
+        return
+    try:
+        yield path, os.stat(path)
+    except OSError as e:
+        print(f"Discovery Error ({path}): {e}")
+
+def make_walker(flt):
+    """ScanPipeline walker: folders, single files, or STDIN_ROOT for a streamed file list"""
+    def walk(root):
+        if root != STDIN_ROOT:
+            yield from _walk_path(root, flt, explicit=True)
+            return
+        for line in sys.stdin:
+            path = line.rstrip("\r\n")
+            if path:
+                yield from _walk_path(path, flt, explicit=False)
+    return walk
+
+def open_output(path):
+    """
+    The JSON lines stream. On stdout, file descriptor 1 is first pointed at stderr so the engine's
+    and quarantine's console messages (in worker processes too) can't interleave with results.
+    """
+    if path and path != "-":
+        return open(path, 'w', encoding='utf-8')
+    sys.stdout.flush()
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return out
+
+def record(filepath, result):
+    return {
+        "path": filepath,
+        "verdict": result.get('severity', 'SAFE'),
+        "score": result.get('score', 0),
+        "details": result.get('details', []),
+        "timings": {stage: round(ms, 3) for stage, ms in result.get('timings', {}).items()},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ThreatViper headless scanner (JSON lines output)")
+    parser.add_argument("paths", nargs="+", help=f"Folders or files to scan; {STDIN_ROOT} reads paths from stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSON lines file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Scan workers (default: THREATVIPER_SCAN_WORKERS / backend default)")
+    parser.add_argument("-b", "--backend", choices=("thread", "process"), default=None,
+                        help="Scan backend (default: THREATVIPER_SCAN_BACKEND)")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument("--cache", dest="cache", action="store_true", default=SCAN_CACHE_ENABLED,
+                       help="Reuse verdicts of unchanged files (default: THREATVIPER_SCAN_CACHE)")
+    cache.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--cache-path", default=None, help="Verdict cache database (default: THREATVIPER_SCAN_CACHE_PATH)")
+    parser.add_argument("--report-only", action="store_true", help="Only report threats, never quarantine them")
+    parser.add_argument("--rules", default=None, help="YARA rules file (default: the rules shipped with the app)")
+    args = parser.parse_args(argv)
+    # Explicitly given rules are taken as-is; the default is only looked up in the app's own folders
+    rules_path = os.path.abspath(args.rules) if args.rules else "yara_rules.yar"
+
+    out = open_output(args.output)
+    try:
+        engine = build_engine(rules_path, cache=args.cache, cache_path=args.cache_path, timings=True)
+    except Exception as e:
+        print(f"Threat Engine Error: {e}", file=sys.stderr)
+        out.close()
+        return 2
+
+    backend = create_backend(engine, args.backend, args.workers or None)
+    governor = governor_for(backend) if SCAN_GOVERNOR else None
+    pipeline = ScanPipeline(backend, make_walker(DiscoveryFilter()), args.paths, governor=governor)
+    summary = ScanSummary()
+    interrupted = False
+    started = time.perf_counter()
+    try:
+        for filepath, result in pipeline.results():
+            line = record(filepath, result)
+            if summary.add(filepath, result) and not args.report_only:
+                line["quarantined"] = quarantine_file(filepath)
+            out.write(json.dumps(line) + "\n")
+    except KeyboardInterrupt:
+        interrupted = True
+        pipeline.cancel()
+    finally:
+        backend.shutdown(cancel=True)
+        if engine.cache:
+            engine.cache.flush()
+        out.close()
+
+    elapsed = time.perf_counter() - started
+    counts = ", ".join(f"{sev} {n}" for sev, n in sorted(summary.severities.items()))
+    print(f"Scanned {summary.files} files in {elapsed:.1f}s: {summary.threats} threats"
+          f"{f' ({counts})' if counts else ''}{' [interrupted]' if interrupted else ''}", file=sys.stderr)
+    if interrupted:
+        return 130
+    return 1 if summary.threats else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import os
+import sys
+
+# Scanner configuration shared by the dashboard, the shield and the engine.
+# Every knob can be overridden from the environment (or the .env file loaded by db_manager).
+
+def is_android():
+    # Robust check for Android
+    return os.path.exists('/system/bin/app_process') or "ANDROID_ROOT" in os.environ
+
+# Helper to find files in EXE vs Source vs Android
+def get_base_dir():
+    if is_android():
+        # On Android, the home directory is usually the most reliable writable path
+        return os.path.expanduser("~")
+
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+# Pick up THREATVIPER_* overrides from the same .env the cloud settings live in
+try:
+    from dotenv import load_dotenv
+    _env_path = os.path.join(get_base_dir(), ".env")
+    if os.path.exists(_env_path):
+        load_dotenv(_env_path)
+except ImportError:
+    pass
+
+def _env_flag(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('0', 'false', 'no', 'off', '')
+
+# --- Verdict Cache ---
+# Re-scans skip files whose path/size/mtime/inode are unchanged since the last scan.
+SCAN_CACHE_ENABLED = _env_flag("THREATVIPER_SCAN_CACHE", True)
+SCAN_CACHE_PATH = os.getenv("THREATVIPER_SCAN_CACHE_PATH") or os.path.join(get_base_dir(), ".scan_cache.db")
+
+# --- YARA Rules ---
+# Compiled rule sets are cached here as <name>-<source hash>.yarc and loaded with yara.load on later starts
+RULES_CACHE_DIR = os.getenv("THREATVIPER_RULES_CACHE_DIR") or os.path.join(get_base_dir(), ".rules_cache")
+# How often (seconds) the engine checks the .yar file's mtime for hot reload. 0 disables hot reload.
+RULES_RELOAD_INTERVAL = float(os.getenv("THREATVIPER_RULES_RELOAD_INTERVAL", "5"))
+
+# --- Scan Execution Backend ---
+# "thread": one engine shared by a thread pool (default; required on Android)
+# "process": a process pool, each worker with its own engine + compiled rules (escapes the GIL on desktop)
+SCAN_BACKEND = os.getenv("THREATVIPER_SCAN_BACKEND", "thread").strip().lower()
+# 0 = choose automatically per backend/platform
+SCAN_WORKERS = int(os.getenv("THREATVIPER_SCAN_WORKERS", "0"))
+# Files handed to a process worker per task (amortizes IPC)
+SCAN_CHUNK_SIZE = int(os.getenv("THREATVIPER_SCAN_CHUNK_SIZE", "32"))
+
+# --- Streaming Pipeline ---
+# Discovered paths waiting to be scanned. Walkers block when it is full, so memory stays flat on huge drives.
+SCAN_QUEUE_SIZE = int(os.getenv("THREATVIPER_SCAN_QUEUE_SIZE", "4096"))
+# Parallel directory walkers (one per root path)
+DISCOVERY_WORKERS = int(os.getenv("THREATVIPER_DISCOVERY_WORKERS", "20"))
+# Adaptive concurrency: the scan window grows while throughput improves and shrinks when it drops.
+# Off: a fixed window of twice the backend's workers.
+SCAN_GOVERNOR = _env_flag("THREATVIPER_SCAN_GOVERNOR", True)
+GOVERNOR_INTERVAL = float(os.getenv("THREATVIPER_GOVERNOR_INTERVAL", "1.0"))
+GOVERNOR_MIN_WORKERS = int(os.getenv("THREATVIPER_GOVERNOR_MIN_WORKERS", "2"))
+# Caps while discharging / when the hottest thermal zone reaches the limit (0 disables a cap)
+GOVERNOR_BATTERY_CAP = int(os.getenv("THREATVIPER_GOVERNOR_BATTERY_CAP", "4"))
+GOVERNOR_THERMAL_LIMIT_C = float(os.getenv("THREATVIPER_GOVERNOR_THERMAL_LIMIT_C", "70"))
+GOVERNOR_THERMAL_CAP = int(os.getenv("THREATVIPER_GOVERNOR_THERMAL_CAP", "2"))
+# Print every concurrency change (level, files/s, batch latency, CPU) for tuning
+GOVERNOR_LOG = _env_flag("THREATVIPER_GOVERNOR_LOG", False)
+# Full scans save their position this often (seconds) and continue from it after being interrupted
+SCAN_CHECKPOINT_INTERVAL = float(os.getenv("THREATVIPER_SCAN_CHECKPOINT_INTERVAL", "5"))
+SCAN_RESUME = _env_flag("THREATVIPER_SCAN_RESUME", True)
+# Scan results are tallied, not stored: the N worst threats and the last N threat lines are kept
+SUMMARY_TOP_N = int(os.getenv("THREATVIPER_SUMMARY_TOP_N", "20"))
+SUMMARY_DETAIL_LINES = int(os.getenv("THREATVIPER_SUMMARY_DETAIL_LINES", "200"))
+
+# --- Discovery Filters ---
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+# Dangerous Extensions only (Protect User Data)
+# .dll is left out on purpose: libraries are rarely primary threats for end-users compared to EXEs/APKs.
+SCAN_EXTENSIONS = _env_list("THREATVIPER_SCAN_EXTENSIONS", ['.exe', '.msi', '.apk', '.bat', '.ps1', '.vbs', '.scr'])
+
+# Skip System & Heavy Dev Folders. Plain names match a folder anywhere (case-insensitive);
+# entries containing a path separator are treated as absolute path prefixes (e.g. D:\Backups).
+DEFAULT_EXCLUDE_DIRS = [
+    'Windows', 'Program Files', 'Program Files (x86)', 'ProgramData', 'Common Files',
+    'System Volume Information', '$RECYCLE.BIN', 'Config.Msi',
+    'node_modules', '.git', '.gradle', '.idea', 'Android', 'AppData', 'Library',
+    'Steam', 'Epic Games', 'Origin', 'Ubisoft'
+]
+SCAN_EXCLUDE_DIRS = _env_list("THREATVIPER_EXCLUDE_DIRS", DEFAULT_EXCLUDE_DIRS) + _env_list("THREATVIPER_EXTRA_EXCLUDE_DIRS", [])
+
+# --- Real-time Shield ---
+# The shield also guards .com droppers on top of the scanner's extension list
+SHIELD_EXTENSIONS = _env_list("THREATVIPER_SHIELD_EXTENSIONS", SCAN_EXTENSIONS + ['.com'])
+
+# --- Threat Engine ---
+# Analyzer stages to switch off (apk_policy, extension, entropy, apk_content, yara, pe), e.g. "pe,entropy".
+# Nothing is off by default: every APK is quarantined (APK_MANDATORY_QUARANTINE.md). Listing
+# apk_policy is an explicit opt-out that leaves APK verdicts to apk_content (manifest, dex, payloads).
+DISABLED_ANALYZERS = _env_list("THREATVIPER_DISABLED_ANALYZERS", [])
+# Skip the remaining (more expensive) stages once they can no longer change a file's severity
+EARLY_EXIT = _env_flag("THREATVIPER_EARLY_EXIT", True)
+
+# --- Dashboard ---
+# Progress redraws per second during a scan; threats found in between share one notification
+UI_UPDATES_PER_SECOND = float(os.getenv("THREATVIPER_UI_UPDATES_PER_SECOND", "4"))
+
+# --- Startup ---
+# Off (default): the engine (NumPy, pefile, YARA rules) warms up in the background while the first
+# screen is already interactive. On: build it before the first screen, as older versions did.
+EAGER_ENGINE = _env_flag("THREATVIPER_EAGER_ENGINE", False)
+# Print a boot timing breakdown to the console
+STARTUP_TRACE = _env_flag("THREATVIPER_STARTUP_TRACE", False)
+
+# --- Diagnostics ---
+# Per-stage timing of every scanned file (cache, metadata, read, entropy, yara, pe); the summary
+# with the slowest files is printed after each scan. Off by default: the disabled path is a no-op.
+PROFILE_STAGES = _env_flag("THREATVIPER_PROFILE_STAGES", False)
+PROFILE_TOP_N = int(os.getenv("THREATVIPER_PROFILE_TOP_N", "10"))
@@ -0,0 +1,67 @@
+import os
+import mmap
+
+# Files below this size are read into a single buffer; mapping tiny files costs more than reading them
+MMAP_THRESHOLD = 64 * 1024
+
+class ScanContext:
+    """
+    One open and one view of a file, shared by every analyzer (entropy, YARA, pefile).
+    Large files are memory-mapped (zero copy), small files are read into one buffer.
+
+    Usage:
+        with ScanContext(path, size) as ctx:
+            shannon_entropy(ctx.data, 0, 1024 * 1024)
+            rules.match(data=ctx.data)
+    """
+    def __init__(self, filepath, size=None):
+        self.filepath = filepath
+        self.size = size
+        self.data = b""
+        self._file = None
+        self._mmap = None
+
+    def open(self):
+        self._file = open(self.filepath, 'rb')
+        fileno = self._file.fileno()
+        if self.size is None:
+            self.size = os.fstat(fileno).st_size
+
+        if self.size >= MMAP_THRESHOLD:
+            try:
+                self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                self.data = self._mmap
+            except (ValueError, OSError):
+                # Some filesystems (FUSE, network shares) refuse mmap: fall back to one read
+                self.data = self._file.read()
+        elif self.size:
+            self.data = self._file.read()
+
+        # Small files are fully buffered; no reason to keep the handle open
+        if self._mmap is None:
+            self._file.close()
+            self._file = None
+        return self
+
+    @property
+    def is_mapped(self):
+        return self._mmap is not None
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # An analyzer still holds a view; the map is released once it is collected
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.data = b""
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,184 @@
+import os
+import glob
+import time
+from collections import deque
+
+from scan_config import (
+    GOVERNOR_INTERVAL, GOVERNOR_MIN_WORKERS, GOVERNOR_BATTERY_CAP,
+    GOVERNOR_THERMAL_LIMIT_C, GOVERNOR_THERMAL_CAP, GOVERNOR_LOG,
+)
+
+# Linux / Android power and thermal state (absent on Windows, macOS and in most containers)
+POWER_SUPPLY_GLOB = "/sys/class/power_supply/*"
+THERMAL_ZONE_GLOB = "/sys/class/thermal/thermal_zone*/temp"
+# Device state is re-read this often (seconds); sysfs reads are cheap but not free
+DEVICE_POLL_INTERVAL = 5.0
+
+# Throughput must change by this much between ticks to count as better / worse (noise band)
+GAIN_THRESHOLD = 0.05
+LOSS_THRESHOLD = 0.10
+# Multiplicative decrease factor, and plateau ticks before probing one step higher again
+BACKOFF = 0.75
+PROBE_AFTER = 5
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def on_battery():
+    """True when a battery reports Discharging, False when it doesn't, None without power info"""
+    found = None
+    for supply in glob.glob(POWER_SUPPLY_GLOB):
+        if _read(os.path.join(supply, "type")) != "Battery":
+            continue
+        status = _read(os.path.join(supply, "status"))
+        if status is None:
+            continue
+        found = found or status == "Discharging"
+    return found
+
+def max_temperature_c():
+    """Hottest thermal zone in degrees C, None if no zone is readable"""
+    hottest = None
+    for zone in glob.glob(THERMAL_ZONE_GLOB):
+        raw = _read(zone)
+        try:
+            temp = int(raw) / 1000
+        except (TypeError, ValueError):
+            continue
+        if hottest is None or temp > hottest:
+            hottest = temp
+    return hottest
+
+class ConcurrencyGovernor:
+    """
+    Sizes the scan's in-flight window from what the device actually delivers (AIMD hill-climbing).
+    Every `interval` it compares files/second with the previous level: while throughput improves
+    it adds a worker, when it drops (SD card thrashing, CPU oversubscribed) it backs off by 25%,
+    and on a plateau it holds, probing one step higher now and then. On battery or when the
+    hottest thermal zone is over the limit the level is capped.
+
+    Fed by ScanPipeline: record() per finished batch, tick() from its result loop; `level` is the
+    window it should keep in flight. Every level change is kept in `history` (and printed with
+    THREATVIPER_GOVERNOR_LOG) for tuning.
+    """
+    def __init__(self, min_level=None, max_level=50, start=None, interval=None,
+                 battery_cap=None, thermal_limit_c=None, thermal_cap=None, log=None):
+        self.min_level = max(1, min(min_level or GOVERNOR_MIN_WORKERS, max_level))
+        self.max_level = max_level
+        self._cap = None
+        self._cap_reason = None
+        self.level = self._clamp(start or (os.cpu_count() or 2) * 2)
+        self.interval = interval or GOVERNOR_INTERVAL
+        self.battery_cap = GOVERNOR_BATTERY_CAP if battery_cap is None else battery_cap
+        self.thermal_limit_c = GOVERNOR_THERMAL_LIMIT_C if thermal_limit_c is None else thermal_limit_c
+        self.thermal_cap = GOVERNOR_THERMAL_CAP if thermal_cap is None else thermal_cap
+        self.log = GOVERNOR_LOG if log is None else log
+        self.history = deque(maxlen=512)
+
+        self._files = 0
+        self._latency = 0.0
+        self._batches = 0
+        self._window_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._prev_rate = None
+        self._plateau = 0
+        self._stepped_up = False
+        self._lowered = False
+        self._device_checked = 0.0
+
+    def _clamp(self, level):
+        cap = self.max_level if self._cap is None else min(self.max_level, self._cap)
+        return max(self.min_level, min(cap, int(level)))
+
+    # --- INPUTS ---
+
+    def record(self, files, latency_s):
+        """One finished batch: how many files and how long it spent in flight"""
+        self._files += files
+        self._latency += latency_s
+        self._batches += 1
+
+    def _device_cap(self, now):
+        if now - self._device_checked < DEVICE_POLL_INTERVAL:
+            return self._cap, self._cap_reason
+        self._device_checked = now
+        caps = []
+        if self.battery_cap and on_battery():
+            caps.append((self.battery_cap, "battery"))
+        temp = max_temperature_c() if self.thermal_limit_c else None
+        if temp is not None and temp >= self.thermal_limit_c:
+            caps.append((self.thermal_cap, f"thermal {temp:.0f}C"))
+        if not caps:
+            return None, None
+        return min(caps)
+
+    # --- DECISION ---
+
+    def tick(self):
+        """Re-evaluates the level once per interval. Returns the (possibly new) level."""
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed < self.interval:
+            return self.level
+
+        rate = self._files / elapsed
+        latency = self._latency / self._batches if self._batches else 0.0
+        # Share of all CPUs this process kept busy (the engine is CPU-bound once files are in cache)
+        cpu = (time.process_time() - self._cpu_start) / elapsed / (os.cpu_count() or 1)
+        self._files, self._latency, self._batches = 0, 0.0, 0
+        self._window_start = now
+        self._cpu_start = time.process_time()
+
+        self._cap, self._cap_reason = self._device_cap(now)
+        old = self.level
+        reason = None
+        if self._cap is not None and self.level > self._cap:
+            self.level, reason = self._clamp(self._cap), self._cap_reason
+        elif not rate:
+            reason = None  # Nothing finished this interval (huge file, discovery still starting)
+        elif self._lowered:
+            # Fewer workers, lower rate: this interval is the new baseline, not a reason to drop again
+            self._plateau = 0
+        elif self._prev_rate is not None and rate <= self._prev_rate * (1 - LOSS_THRESHOLD):
+            self.level, reason = self._clamp(self.level * BACKOFF), "throughput dropped"
+            self._plateau = 0
+        elif self._prev_rate is None or rate >= self._prev_rate * (1 + GAIN_THRESHOLD):
+            if cpu < 0.95:
+                self.level, reason = self._clamp(self.level + 1), "climbing"
+            self._plateau = 0
+        elif self._stepped_up:
+            # The last extra worker bought nothing: give it back instead of drifting upwards
+            self.level, reason = self._clamp(self.level - 1), "no gain"
+            self._plateau = 0
+        else:
+            self._plateau += 1
+            if self._plateau >= PROBE_AFTER and cpu < 0.95:
+                self.level, reason = self._clamp(self.level + 1), "probing"
+                self._plateau = 0
+        self._stepped_up = self.level > old
+        self._lowered = self.level < old
+        if rate:
+            self._prev_rate = rate
+
+        if self.level != old:
+            entry = {"t": time.time(), "from": old, "to": self.level, "files_per_s": rate,
+                     "batch_latency_ms": latency * 1000, "cpu": cpu, "reason": reason}
+            self.history.append(entry)
+            if self.log:
+                print(f"⚙️ Scan concurrency {old} -> {self.level} ({reason}; {rate:.0f} files/s, "
+                      f"{latency * 1000:.0f} ms/batch, CPU {cpu:.0%})")
+        return self.level
+
+    def summary(self):
+        """Level changes so far plus the final level, for tuning the defaults"""
+        return {"level": self.level, "min": self.min_level, "max": self.max_level,
+                "cap": self._cap, "cap_reason": self._cap_reason, "changes": list(self.history)}
+
+def governor_for(backend):
+    """Governor sized for a scan backend: never more in flight than it can run (process chunks: 2 per worker)"""
+    ceiling = backend.workers * (2 if backend.name == "process" else 1)
+    return ConcurrencyGovernor(max_level=ceiling)
@@ -0,0 +1,156 @@
+import time
+import queue
+import threading
+import os
+import concurrent.futures
+
+from scan_config import SCAN_QUEUE_SIZE, DISCOVERY_WORKERS
+
+def _paths(batch):
+    return [item[0] if isinstance(item, tuple) else item for item in batch]
+
+def _error_result(filepath, error):
+    # Same shape as a ThreatEngine verdict for a file it failed to read
+    return {
+        "filename": os.path.basename(filepath),
+        "score": 0,
+        "severity": "SAFE",
+        "details": [f"Scan Error: {error}"],
+        "risk_score": 0
+    }
+
+class ScanPipeline:
+    """
+    Streaming discovery -> scan pipeline.
+    Walker threads push paths into a bounded queue while the scan backend consumes them right away,
+    so scanning starts with the first file found and memory does not grow with the drive size.
+
+    Usage:
+        pipeline = ScanPipeline(backend, walker, roots)
+        for filepath, result in pipeline.results():
+            ...
+    `walker(root)` is any generator of paths (or (path, stat) pairs) under root.
+    With a ConcurrencyGovernor the in-flight window follows governor.level instead of max_in_flight.
+    """
+    def __init__(self, backend, walker, roots, queue_size=None, discovery_workers=None, max_in_flight=None,
+                 governor=None):
+        self.backend = backend
+        self.walker = walker
+        self.roots = list(roots)
+        self.discovery_workers = discovery_workers or DISCOVERY_WORKERS
+        # In-flight batches submitted to the backend; enough to keep every worker busy, no more
+        self.max_in_flight = max_in_flight or max(2, backend.workers * 2)
+        self.batch_size = getattr(backend, 'chunk_size', 1)
+        self.governor = governor
+
+        self.discovered = 0
+        self.scanned = 0
+        self._queue = queue.Queue(maxsize=queue_size or SCAN_QUEUE_SIZE)
+        self._cancel = threading.Event()
+        self._stopped = False  # cancel() was called (the event is also set when a scan just ends)
+        self._count_lock = threading.Lock()
+        self._walkers_left = len(self.roots)
+
+    # --- PRODUCERS ---
+
+    def _walk_root(self, root):
+        try:
+            for item in self.walker(root):
+                if not self._offer(item):
+                    break
+                with self._count_lock:
+                    self.discovered += 1
+        except Exception as e:
+            print(f"Discovery Error ({root}): {e}")
+        finally:
+            with self._count_lock:
+                self._walkers_left -= 1
+
+    def _offer(self, item):
+        """Blocking put that gives up as soon as the scan is cancelled"""
+        while not self._cancel.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # --- CONSUMER ---
+
+    def _take_batch(self, block):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=0.1) if block else self._queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _discovery_finished(self):
+        with self._count_lock:
+            return self._walkers_left == 0
+
+    def results(self):
+        """Yields (path, result) as soon as each file is scanned. Runs until discovery and scanning are both done."""
+        discovery = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(self.discovery_workers, len(self.roots) or 1)))
+        for root in self.roots:
+            discovery.submit(self._walk_root, root)
+
+        in_flight = set()
+        submitted = {}  # future -> (submit time, batch)
+        try:
+            while not self._cancel.is_set():
+                window = self.governor.tick() if self.governor else self.max_in_flight
+                # Top up the in-flight window from the queue
+                while len(in_flight) < window:
+                    batch = self._take_batch(block=not in_flight)
+                    if not batch:
+                        break
+                    future = self.backend.submit(batch)
+                    in_flight.add(future)
+                    submitted[future] = (time.perf_counter(), batch)
+
+                if not in_flight:
+                    if self._discovery_finished() and self._queue.empty():
+                        break
+                    continue
+
+                done, in_flight = concurrent.futures.wait(
+                    in_flight, timeout=0.05, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    started, batch = submitted.pop(future)
+                    if self.governor:
+                        self.governor.record(len(batch), time.perf_counter() - started)
+                    try:
+                        batch_results = future.result()
+                    except concurrent.futures.CancelledError:
+                        continue
+                    except Exception as e:
+                        print(f"Scan Batch Error: {e}")
+                        # Still one result per file, so summaries and checkpoints account for all of them
+                        batch_results = [(path, _error_result(path, e)) for path in _paths(batch)]
+                    for filepath, result in batch_results:
+                        self.scanned += 1
+                        yield filepath, result
+        finally:
+            # Normal end, cancel() or the caller breaking out of the loop: stop the walkers either way
+            self._cancel.set()
+            for future in in_flight:
+                future.cancel()
+            discovery.shutdown(wait=False, cancel_futures=True)
+
+    def cancel(self):
+        """Safe from any thread (e.g. the UI): results() stops within ~0.1 s and drops queued work"""
+        self._stopped = True
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._stopped
+
+    @property
+    def discovery_done(self):
+        return self._discovery_finished()
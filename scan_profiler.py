@@ -0,0 +1,158 @@
+import time
+import heapq
+import bisect
+import threading
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class _NullClock:
+    """Stand-in used when profiling is off: every call is a no-op"""
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+    def finish(self):
+        pass
+
+NULL_CLOCK = _NullClock()
+
+class StageClock:
+    """Times consecutive stages of one file's scan; hands the laps to the profiler on finish()"""
+    __slots__ = ("profiler", "path", "stages", "_start", "_last")
+
+    def __init__(self, profiler, path):
+        self.profiler = profiler
+        self.path = path
+        self.stages = {}
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """Charges the time since the previous lap (or start) to `stage`"""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self):
+        if self.profiler is not None:
+            self.profiler.record(self.path, self.stages, self._last - self._start)
+
+    def laps_ms(self):
+        """Stage laps so far in milliseconds, with the elapsed time under 'total'"""
+        laps = {stage: s * 1000 for stage, s in self.stages.items()}
+        laps["total"] = (self._last - self._start) * 1000
+        return laps
+
+class _StageStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (histogram estimate)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+class ScanProfiler:
+    """
+    Opt-in per-stage timing for ThreatEngine.scan_file.
+    Each scanned file reports how long its cache lookup, metadata checks, read, entropy, YARA and
+    PE stages took. The profiler keeps a fixed-size histogram per stage plus the top-N slowest
+    files, so memory stays constant however many files a scan touches. Thread-safe.
+    """
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.files = 0
+            self.total = _StageStats()
+            self.stages = {}
+            self._slowest = []  # min-heap of (total_ms, seq, path, stages_ms)
+            self._seq = 0
+            self.started = time.time()
+
+    def record(self, path, stages, total_s):
+        stages_ms = {k: v * 1000 for k, v in stages.items()}
+        total_ms = total_s * 1000
+        with self._lock:
+            self.files += 1
+            self.total.add(total_ms)
+            for stage, ms in stages_ms.items():
+                stats = self.stages.get(stage)
+                if stats is None:
+                    stats = self.stages[stage] = _StageStats()
+                stats.add(ms)
+            self._seq += 1
+            entry = (total_ms, self._seq, path, stages_ms)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, entry)
+            elif total_ms > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def summary(self):
+        """Structured results: per-stage totals/percentiles/histograms and the slowest files"""
+        with self._lock:
+            def describe(stats):
+                return {
+                    "count": stats.count,
+                    "total_ms": stats.total,
+                    "mean_ms": stats.total / stats.count if stats.count else 0.0,
+                    "p50_ms": stats.quantile(0.50),
+                    "p90_ms": stats.quantile(0.90),
+                    "p99_ms": stats.quantile(0.99),
+                    "max_ms": stats.max,
+                    "histogram": [[b, n] for b, n in zip(list(BUCKETS_MS) + [None], stats.buckets) if n],
+                }
+            slowest = sorted(self._slowest, reverse=True)
+            return {
+                "files": self.files,
+                "wall_s": time.time() - self.started,
+                "per_file": describe(self.total),
+                "stages": {name: describe(s) for name, s in
+                           sorted(self.stages.items(), key=lambda kv: -kv[1].total)},
+                "slowest": [{
+                    "path": path,
+                    "total_ms": total_ms,
+                    "slowest_stage": max(stages, key=stages.get) if stages else None,
+                    "stages_ms": stages,
+                } for total_ms, _seq, path, stages in slowest],
+            }
+
+    def format_summary(self):
+        return format_summary(self.summary())
+
+def format_summary(s):
+    """Human-readable version of a ScanProfiler.summary() for the console"""
+    lines = [f"Stage timing over {s['files']} files:"]
+    lines.append(f"  {'stage':<10}{'share':>7}{'total ms':>11}{'mean':>9}{'p90':>9}{'max':>10}")
+    grand = sum(st["total_ms"] for st in s["stages"].values()) or 1.0
+    for name, st in s["stages"].items():
+        lines.append(f"  {name:<10}{st['total_ms'] / grand:>7.1%}{st['total_ms']:>11.1f}"
+                     f"{st['mean_ms']:>9.2f}{st['p90_ms']:>9.2f}{st['max_ms']:>10.1f}")
+    if s["slowest"]:
+        lines.append(f"  Slowest {len(s['slowest'])} files:")
+        for f in s["slowest"]:
+            lines.append(f"    {f['total_ms']:>9.1f} ms  {f['slowest_stage'] or '-':<9} {f['path']}")
+    return "\n".join(lines)
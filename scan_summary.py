@@ -0,0 +1,85 @@
+import os
+import heapq
+import threading
+from collections import deque
+
+from scan_config import SUMMARY_TOP_N, SUMMARY_DETAIL_LINES
+
+THREAT_SEVERITIES = ('CRITICAL', 'HIGH')
+
+class ScanSummary:
+    """
+    Constant-memory tally of a scan: files per severity, the N highest-scoring threats and the most
+    recent threat lines. Replaces the per-file lists the dashboard used to keep, so a
+    multi-million-file drive costs the same memory as a folder. Thread-safe.
+    """
+    def __init__(self, top_n=None, detail_lines=None):
+        self.top_n = top_n or SUMMARY_TOP_N
+        self.files = 0
+        self.threats = 0
+        self.severities = {}
+        self._top = []  # min-heap of (score, seq, path, severity)
+        self._seq = 0
+        self._recent = deque(maxlen=detail_lines or SUMMARY_DETAIL_LINES)
+        self._lock = threading.Lock()
+
+    def add(self, filepath, result):
+        """Counts one scanned file. Returns True if it is a threat (CRITICAL/HIGH)."""
+        # ADAPTATION: Our engine uses lowercase 'critical'/'high', new code checks uppercase
+        sev = result.get('severity', '').upper()
+        is_threat = sev in THREAT_SEVERITIES
+        with self._lock:
+            self.files += 1
+            self.severities[sev or 'SAFE'] = self.severities.get(sev or 'SAFE', 0) + 1
+            if is_threat:
+                self.threats += 1
+                score = result.get('risk_score', 0) # key is 'risk_score' not 'score'
+                self._recent.append(f"{sev}: {os.path.basename(filepath)} (Score: {score})")
+                self._seq += 1
+                entry = (score, self._seq, filepath, sev)
+                if len(self._top) < self.top_n:
+                    heapq.heappush(self._top, entry)
+                elif score > self._top[0][0]:
+                    heapq.heapreplace(self._top, entry)
+        return is_threat
+
+    def top_threats(self):
+        """[(score, path, severity)], highest score first"""
+        with self._lock:
+            return [(score, path, sev) for score, _seq, path, sev in sorted(self._top, reverse=True)]
+
+    def recent(self):
+        with self._lock:
+            return list(self._recent)
+
+    def state(self):
+        """JSON-able snapshot (for scan checkpoints)"""
+        with self._lock:
+            return {
+                "files": self.files, "threats": self.threats, "severities": dict(self.severities),
+                "top": [[score, path, sev] for score, _seq, path, sev in self._top],
+                "recent": list(self._recent),
+            }
+
+    def restore(self, state):
+        """Continues counting from a state() snapshot"""
+        with self._lock:
+            self.files = state.get("files", 0)
+            self.threats = state.get("threats", 0)
+            self.severities = dict(state.get("severities", {}))
+            self._top = []
+            for score, path, sev in state.get("top", [])[:self.top_n]:
+                self._seq += 1
+                heapq.heappush(self._top, (score, self._seq, path, sev))
+            self._recent.clear()
+            self._recent.extend(state.get("recent", []))
+        return self
+
+    def log_text(self):
+        """Threat lines for the scan history: the most recent ones, with a note if older ones were dropped"""
+        with self._lock:
+            lines = list(self._recent)
+            dropped = self.threats - len(lines)
+        if dropped > 0:
+            lines.insert(0, f"... {dropped} earlier threats not listed")
+        return "\n".join(lines)
@@ -0,0 +1,356 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+
+from discovery import DiscoveryFilter
+
+# Event kinds handed to the shield callback
+CREATED = "created"    # A new name appeared (file may still be being written)
+MODIFIED = "modified"  # Content was written / the writer closed the file
+MOVED_IN = "moved"     # Renamed or moved into a watched folder (complete file)
+
+class WatcherBase:
+    """
+    Pluggable file-system watcher for the Real-time Shield.
+    `roots` is a list of (path, recursive) pairs; `on_event(path, kind)` is called from the
+    watcher thread for every file that passes the discovery filter.
+    Subclasses implement _run(); register them with register_backend().
+    """
+    name = "base"
+
+    def __init__(self, roots, on_event, flt=None):
+        self.roots = [(r, rec) for r, rec in roots if os.path.isdir(r)]
+        self.on_event = on_event
+        self.flt = flt or DiscoveryFilter()
+        self._stop = threading.Event()
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def run(self):
+        """Blocks until stop() is called"""
+        try:
+            self._run()
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        pass
+
+    def _emit(self, path, kind):
+        try:
+            self.on_event(path, kind)
+        except Exception as e:
+            print(f"Shield Handler Error: {e}")
+
+# --- INOTIFY (Linux / Android) ---
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+def _load_libc():
+    import ctypes
+    import ctypes.util
+    for name in (ctypes.util.find_library('c'), 'libc.so.6', 'libc.so'):
+        if not name:
+            continue
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            if hasattr(libc, 'inotify_init1'):
+                return libc
+        except OSError:
+            continue
+    return None
+
+class InotifyWatcher(WatcherBase):
+    """Kernel push notifications: zero CPU while idle and millisecond detection latency"""
+    name = "inotify"
+
+    def __init__(self, roots, on_event, flt=None):
+        super().__init__(roots, on_event, flt)
+        import ctypes
+        self._ctypes = ctypes
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}  # wd -> (folder, recursive)
+        self._limit_warned = False
+        for root, recursive in self.roots:
+            self._add_watch(root, recursive)
+
+    @classmethod
+    def available(cls):
+        return sys.platform.startswith('linux') and _load_libc() is not None
+
+    def _add_watch(self, folder, recursive):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            if err == errno.ENOSPC and not self._limit_warned:
+                self._limit_warned = True
+                print("⚠️ Shield: inotify watch limit reached (fs.inotify.max_user_watches); deeper folders unwatched")
+            return
+        self._watches[wd] = (folder, recursive)
+        if not recursive:
+            return
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False) and self.flt.accept_dir(entry.name, entry.path):
+                        self._add_watch(entry.path, True)
+        except OSError:
+            pass
+
+    def _new_folder(self, folder):
+        """A folder created/moved into a watched tree: watch it, then report files that beat the watch"""
+        self._add_watch(folder, True)
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_file() and self.flt.accept_file(entry.name):
+                        self._emit(entry.path, CREATED)
+        except OSError:
+            pass
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        while not self._stop.is_set():
+            if not poller.poll(500):
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self._dispatch(data)
+
+    def _dispatch(self, data):
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                print("⚠️ Shield: inotify queue overflow, some events were dropped")
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            watch = self._watches.get(wd)
+            if not watch or not name:
+                continue
+            folder, recursive = watch
+            path = os.path.join(folder, name)
+
+            if mask & IN_ISDIR:
+                if recursive and mask & (IN_CREATE | IN_MOVED_TO) and self.flt.accept_dir(name, path):
+                    self._new_folder(path)
+                continue
+            if not self.flt.accept_file(name):
+                continue
+            if mask & IN_MOVED_TO:
+                self._emit(path, MOVED_IN)
+            elif mask & IN_CLOSE_WRITE:
+                self._emit(path, MODIFIED)
+            elif mask & IN_CREATE:
+                self._emit(path, CREATED)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+# --- POLLING FALLBACK (Windows / anything without a push backend) ---
+
+class PollingWatcher(WatcherBase):
+    """
+    Fallback for platforms without a push backend.
+    Each folder is re-listed ONLY when its own mtime changed since the last pass, so an idle
+    tree costs one stat per folder instead of a listdir per folder.
+    Limitation: in-place rewrites of an existing file don't touch the folder mtime and are not seen.
+    """
+    name = "polling"
+
+    def __init__(self, roots, on_event, flt=None, interval=2.0):
+        super().__init__(roots, on_event, flt)
+        self.interval = interval
+        self._folders = {}  # folder -> (mtime_ns, names, recursive)
+        for root, recursive in self.roots:
+            self._snapshot(root, recursive, emit=False)
+
+    def _snapshot(self, folder, recursive, emit):
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            self._folders.pop(folder, None)
+            return
+        old = self._folders.get(folder)
+        known = old[1] if old else frozenset()
+        names = frozenset(e.name for e in entries)
+        self._folders[folder] = (mtime, names, recursive)
+        for entry in entries:
+            if entry.name in known:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and self.flt.accept_dir(entry.name, entry.path):
+                        self._snapshot(entry.path, True, emit)
+                elif emit and self.flt.accept_file(entry.name):
+                    self._emit(entry.path, CREATED)
+            except OSError:
+                continue
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for folder, (mtime, _names, recursive) in list(self._folders.items()):
+                if self._stop.is_set():
+                    break
+                try:
+                    current = os.stat(folder).st_mtime_ns
+                except OSError:
+                    self._folders.pop(folder, None)  # Folder deleted
+                    continue
+                if current != mtime:
+                    self._snapshot(folder, recursive, emit=True)
+
+# --- WRITE-COMPLETION SETTLING ---
+
+class SettleQueue:
+    """
+    Holds shield events until each file is complete, then hands settled files over in batches.
+    A file is complete when its writer closed it / it was moved in (inotify), or when its size and
+    mtime stayed unchanged for `settle_time` seconds (polling backends, writers that never close).
+    Repeated events for a path that is still waiting are coalesced, so each finished file is
+    scanned once instead of once per event.
+    """
+    def __init__(self, on_batch, settle_time=2.0, batch_size=16, poll_interval=0.25):
+        self.on_batch = on_batch
+        self.settle_time = settle_time
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._pending = {}   # path -> (size, mtime_ns, stable_since)
+        self._ready = {}     # path -> None (insertion-ordered set)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self.coalesced = 0
+
+    def push(self, path, kind):
+        """Watcher callback: record an event for `path`"""
+        with self._cond:
+            if path in self._ready:
+                self.coalesced += 1
+                return
+            if kind in (MODIFIED, MOVED_IN):
+                # The writer is done (IN_CLOSE_WRITE) or the file arrived whole (rename)
+                if self._pending.pop(path, None) is not None:
+                    self.coalesced += 1
+                self._ready[path] = None
+                self._cond.notify()
+            elif path in self._pending:
+                self.coalesced += 1
+            else:
+                self._pending[path] = (-1, -1, time.monotonic())
+
+    def _check_pending(self):
+        """Moves files whose size+mtime held still for settle_time to the ready set"""
+        now = time.monotonic()
+        with self._cond:
+            items = list(self._pending.items())
+        for path, (size, mtime, since) in items:
+            try:
+                st = os.stat(path)
+            except OSError:
+                with self._cond:
+                    self._pending.pop(path, None)  # Deleted / renamed away before it settled
+                continue
+            with self._cond:
+                if path not in self._pending:
+                    continue  # Settled by a close event meanwhile
+                if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                    self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+                elif now - since >= self.settle_time:
+                    del self._pending[path]
+                    self._ready[path] = None
+
+    def _take_batch(self):
+        with self._cond:
+            batch = list(self._ready)[:self.batch_size]
+            for path in batch:
+                del self._ready[path]
+            return batch
+
+    def run(self):
+        """Settling loop; blocks until stop()"""
+        while not self._stop.is_set():
+            with self._cond:
+                if not self._ready:
+                    self._cond.wait(self.poll_interval)
+            if self._pending:
+                self._check_pending()
+            batch = self._take_batch()
+            while batch and not self._stop.is_set():
+                try:
+                    self.on_batch(batch)
+                except Exception as e:
+                    print(f"Shield Batch Error: {e}")
+                batch = self._take_batch()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def waiting(self):
+        with self._cond:
+            return len(self._pending) + len(self._ready)
+
+# --- BACKEND REGISTRY ---
+
+_BACKENDS = [InotifyWatcher, PollingWatcher]
+
+def register_backend(cls, first=True):
+    """Plug in another watcher (e.g. ReadDirectoryChangesW on Windows). Preferred backends go first."""
+    if first:
+        _BACKENDS.insert(0, cls)
+    else:
+        _BACKENDS.append(cls)
+
+def create_watcher(roots, on_event, flt=None):
+    """First available push backend, polling otherwise"""
+    for cls in _BACKENDS:
+        if cls is PollingWatcher or not cls.available():
+            continue
+        try:
+            return cls(roots, on_event, flt)
+        except OSError as e:
+            print(f"Shield backend {cls.name} unavailable: {e}")
+    return PollingWatcher(roots, on_event, flt)
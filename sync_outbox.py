@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import random
+import uuid
+import sqlite3
+import logging
+import threading
+
+from scan_config import get_base_dir
+
+class SyncOutbox:
+    """
+    Durable, asynchronous outbox for cloud sync.
+    Scan events are appended to a local SQLite table and returned immediately; a worker thread
+    flushes them in batches through `send_fn(data, document_id)`, retrying with exponential backoff
+    while offline. Events survive app restarts and are delivered on the next start.
+    Bursts of events for the same user and a coalescing location (the Real-time Shield) are
+    merged into one history document per flush.
+    A document's id is stored with its rows before the first attempt, so a retry after a lost
+    response re-sends the same document (the server answers 409) instead of creating a duplicate.
+    """
+    def __init__(self, send_fn, owner_fn, db_path=None, batch_size=20, flush_interval=2.0,
+                 base_backoff=2.0, max_backoff=300.0, coalesce_locations=("Real-time Shield",)):
+        self.send_fn = send_fn
+        # Only the signed-in user's events are sent with their session
+        self.owner_fn = owner_fn
+        self.db_path = db_path or os.path.join(get_base_dir(), ".sync_outbox.db")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.coalesce_locations = set(coalesce_locations)
+
+        self.sent = 0
+        self.failures = 0
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, owner TEXT, payload TEXT, attempts INTEGER DEFAULT 0, created REAL, doc_id TEXT)"
+        )
+        # Outboxes written by older versions lack doc_id: their rows get one on the next attempt
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        if "doc_id" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN doc_id TEXT")
+        self._conn.commit()
+
+    # --- PRODUCER SIDE (any thread, never blocks on the network) ---
+
+    def enqueue(self, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (owner, payload, created) VALUES (?, ?, ?)",
+                (data.get('userId'), json.dumps(data), time.time())
+            )
+            self._conn.commit()
+        self._wake.set()
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    # --- WORKER ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sync-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def flush_now(self):
+        """Skip the current backoff and try to deliver right away (e.g. after login / network back)"""
+        self._retry_at = 0.0
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Short wait lets a burst of shield events pile up and be coalesced into one document
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if time.monotonic() < self._retry_at:
+                continue
+            try:
+                while self._flush_batch():
+                    pass
+            except Exception as e:
+                logging.error(f"Outbox Flush Error: {e}")
+
+    def _flush_batch(self):
+        """Sends one batch. Returns True if more rows may be waiting."""
+        owner = self.owner_fn()
+        if not owner:
+            return False
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts, doc_id FROM outbox WHERE owner=? ORDER BY id LIMIT ?",
+                (owner, self.batch_size)
+            ).fetchall()
+        if not rows:
+            return False
+
+        for ids, data, doc_id in self._coalesce(rows):
+            if doc_id is None:
+                doc_id = self._assign_doc_id(ids)
+            try:
+                self.send_fn(data, doc_id)
+            except Exception as e:
+                code = getattr(e, 'code', None)
+                if code == 409:
+                    # Already exists: an earlier attempt was stored but its response never arrived
+                    pass
+                elif isinstance(code, int) and 400 <= code < 500 and code not in (401, 408, 429):
+                    # The server rejected the document itself; retrying can never succeed
+                    logging.error(f"Outbox: dropping rejected event ({code}): {e}")
+                    self._delete(ids)
+                    continue
+                else:
+                    self._schedule_retry(ids, e)
+                    return False
+            self._delete(ids)
+            self.sent += 1
+            self._consecutive_failures = 0
+        return len(rows) == self.batch_size
+
+    def _coalesce(self, rows):
+        """
+        [(ids, data, doc_id)]: shield events of one flush merged into one document, others sent as-is.
+        Rows already attempted keep their document: they only merge with rows of the same doc_id.
+        """
+        out = []
+        merged = {}
+        for row_id, payload, _attempts, doc_id in rows:
+            data = json.loads(payload)
+            if data.get('location') not in self.coalesce_locations:
+                out.append(([row_id], data, doc_id))
+                continue
+            key = (data.get('userId'), data.get('location'), doc_id)
+            if key not in merged:
+                merged[key] = ([row_id], dict(data), doc_id)
+                out.append(merged[key])
+                continue
+            ids, doc, _doc_id = merged[key]
+            ids.append(row_id)
+            doc['filesScanned'] = int(doc.get('filesScanned', 0)) + int(data.get('filesScanned', 0))
+            doc['threatsFound'] = int(doc.get('threatsFound', 0)) + int(data.get('threatsFound', 0))
+            doc['timestamp'] = data.get('timestamp', doc.get('timestamp'))
+            doc['details'] = (str(doc.get('details', '')) + "\n" + str(data.get('details', '')))[:1000]
+        return out
+
+    def _assign_doc_id(self, ids):
+        doc_id = uuid.uuid4().hex[:20]
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET doc_id=? WHERE id=?", [(doc_id, i) for i in ids])
+            self._conn.commit()
+        return doc_id
+
+    def _delete(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id=?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def _schedule_retry(self, ids, error):
+        self.failures += 1
+        self._consecutive_failures += 1
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (self._consecutive_failures - 1)))
+        delay *= random.uniform(0.5, 1.0)  # Jitter: many devices coming back online don't retry in lockstep
+        self._retry_at = time.monotonic() + delay
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE id=?", [(i,) for i in ids])
+            self._conn.commit()
+        logging.error(f"Sync offline ({error}); retrying in {delay:.0f}s")
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
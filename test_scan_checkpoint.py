@@ -0,0 +1,87 @@
+import os
+import time
+import random
+import shutil
+import tempfile
+import unittest
+
+from discovery import DiscoveryFilter, walk_files
+from scan_backend import ThreadScanBackend
+from scan_checkpoint import ScanCheckpoint
+from scan_pipeline import ScanPipeline
+
+class _SlowEngine:
+    """Verdicts in random order: files finish past the checkpoint cursor"""
+    def __init__(self, seed):
+        self._random = random.Random(seed)
+
+    def scan_file(self, filepath, st=None):
+        time.sleep(self._random.random() * 0.004)
+        return {"filename": os.path.basename(filepath), "score": 0, "severity": "SAFE", "details": []}
+
+class ScanCheckpointResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.roots = []
+        self.total = 0
+        for r in range(2):
+            root = os.path.join(self.tmp, f"root{r}")
+            for d in range(6):
+                folder = os.path.join(root, f"d{d}")
+                os.makedirs(folder)
+                for f in range(16):
+                    with open(os.path.join(folder, f"f{f:02}.exe"), "wb") as fh:
+                        fh.write(b"MZ")
+                    self.total += 1
+            self.roots.append(root)
+        self.path = os.path.join(self.tmp, "checkpoint.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _run(self, stop_after, seed):
+        """One app session: scans until `stop_after` verdicts (None: to the end). Returns the checkpoint."""
+        checkpoint = ScanCheckpoint.load(self.roots, self.path, interval=3600) or \
+            ScanCheckpoint(self.roots, self.path, interval=3600)
+        flt = DiscoveryFilter(extensions=['.exe'], exclude_dirs=[])
+        walker = lambda root, resume_after=None: walk_files(root, flt, resume_after)
+        backend = ThreadScanBackend(_SlowEngine(seed), workers=8)
+        pipeline = ScanPipeline(backend, lambda root: checkpoint.walk(root, walker), checkpoint.pending_roots(),
+                                discovery_workers=2)
+        try:
+            for fp, res in pipeline.results():
+                checkpoint.summary.add(fp, res)
+                checkpoint.done(fp)
+                self.scanned.append(fp)
+                if stop_after is not None and len(self.scanned) - self.before >= stop_after:
+                    pipeline.cancel()
+        finally:
+            backend.shutdown(cancel=True)
+            if pipeline.cancelled or checkpoint.pending_roots():
+                checkpoint.save()
+            else:
+                checkpoint.clear()
+        return checkpoint
+
+    def test_repeated_stop_and_resume_counts_every_file_once(self):
+        self.scanned = []
+        resumes = 0
+        # Stopped every few files until one run happens to reach the end (or 20 sessions)
+        while resumes < 20:
+            self.before = len(self.scanned)
+            checkpoint = self._run(stop_after=7, seed=resumes)
+            if not os.path.exists(self.path):
+                break
+            resumes += 1
+        else:
+            self.before = len(self.scanned)
+            checkpoint = self._run(stop_after=None, seed=99)
+
+        self.assertGreater(resumes, 5)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(set(self.scanned)), self.total)
+        self.assertEqual(len(self.scanned), self.total)
+        self.assertEqual(checkpoint.summary.files, self.total)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import urllib.request
+
+from cloud_http import AppwriteHttp
+from mock_appwrite import start_mock_server
+from sync_outbox import SyncOutbox
+
+DOCUMENTS = "/databases/mock/collections/history/documents"
+
+class SyncOutboxMockServerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.server, self.endpoint = start_mock_server()
+        self.http = AppwriteHttp(self.endpoint, "mock")
+        user = self.http.request("POST", "/account", json_body={
+            "userId": "u1", "email": "a@b.c", "password": "secret123", "name": "A"})
+        self.user_id = user["$id"]
+        # The session cookie stays on the pooled requests session
+        self.http.request("POST", "/account/sessions/email", json_body={"email": "a@b.c", "password": "secret123"})
+        self.outbox = SyncOutbox(self._send, owner_fn=lambda: self.user_id,
+                                 db_path=os.path.join(self.tmp, "outbox.db"),
+                                 flush_interval=0.05, base_backoff=0.05, max_backoff=0.2)
+
+    def tearDown(self):
+        self.outbox.close()
+        self.http.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _send(self, data, document_id):
+        self.http.request("POST", DOCUMENTS, json_body={"documentId": document_id, "data": data})
+
+    def _mock(self, path, body=None):
+        url = self.endpoint[:-len("/v1")] + path
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(url, data=data, method="POST" if body is not None else "GET",
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return json.loads(resp.read())
+
+    def _event(self, location, n):
+        return {"userId": self.user_id, "timestamp": f"2026-01-01T00:00:0{n}Z", "filesScanned": 1,
+                "threatsFound": 0, "location": location, "details": f"event {n}"}
+
+    def _wait_delivered(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while self.outbox.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_offline_events_flush_when_back_online(self):
+        self._mock("/__mock/config", {"offline": True})
+        for n in range(3):
+            self.outbox.enqueue(self._event(f"/data/{n}", n))
+        self.outbox.start()
+        deadline = time.monotonic() + 5
+        while self.outbox.failures < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertGreaterEqual(self.outbox.failures, 2)
+        self.assertEqual(self.outbox.pending_count(), 3)
+        self.assertEqual(self._mock("/__mock/stats")["documents"], 0)
+
+        self._mock("/__mock/config", {"offline": False})
+        self.outbox.flush_now()
+        self._wait_delivered()
+        self.assertEqual(self._mock("/__mock/stats")["documents"], 3)
+
+    def test_retried_post_creates_no_duplicate_documents(self):
+        # First POST fails outright; the second is stored but its response is lost
+        self._mock("/__mock/config", {"fail_next": 1, "drop_next": 1})
+        self.outbox.enqueue(self._event("/data/a", 1))
+        for n in range(2, 5):
+            self.outbox.enqueue(self._event("Real-time Shield", n))
+        self.outbox.start()
+        self._wait_delivered()
+
+        docs = self.server.RequestHandlerClass.state.documents
+        self.assertEqual(len(docs), 2)
+        self.assertEqual(len({d["$id"] for d in docs}), 2)
+        shield = [d for d in docs if d["location"] == "Real-time Shield"]
+        self.assertEqual(shield[0]["filesScanned"], 3)
+        self.assertGreaterEqual(self.outbox.failures, 2)
+
+if __name__ == "__main__":
+    unittest.main()
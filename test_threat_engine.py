@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import zipfile
+import unittest
+from unittest import mock
+
+from path_matcher import resolve_data_file
+from rule_loader import resolve_rules_path
+from scan_cache import VerdictCache
+from scan_context import ScanContext
+from threat_engine import ThreatEngine
+
+class UnreadableFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "locked.exe")
+        with open(self.path, "wb") as f:
+            f.write(b"MZ" + os.urandom(128 * 1024))
+        self.engine = ThreatEngine(cache=VerdictCache(os.path.join(self.tmp, "cache.db")))
+
+    def tearDown(self):
+        self.engine.cache.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_unreadable_file_is_reported_and_not_cached(self):
+        with mock.patch.object(ScanContext, "open", side_effect=PermissionError(13, "Permission denied")):
+            locked = self.engine.scan_file(self.path)
+        self.assertTrue(any(d.startswith("Scan Error") for d in locked["details"]))
+        self.assertIsNone(self.engine.cached_verdict(self.path, os.stat(self.path)))
+
+        # Unlocked: analyzed for real, not served the unscanned verdict
+        unlocked = self.engine.scan_file(self.path)
+        self.assertFalse(any(d.startswith("Scan Error") for d in unlocked["details"]))
+        self.assertTrue(any(d.startswith("High Entropy") for d in unlocked["details"]))
+
+class ApkContentTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "update.apk")
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("AndroidManifest.xml", b"\x03\x00\x08\x00" + "android.permission.SEND_SMS".encode("utf-16-le"))
+            zf.writestr("classes.dex", b"dex\n035\0" + bytes(0x70))
+            zf.writestr("assets/payload.dex", b"dex\n035\0")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_default_config_reports_apk_findings(self):
+        engine = ThreatEngine()
+        self.assertTrue(engine.early_exit)
+        self.assertEqual(engine.disabled_analyzers(), [])
+        result = engine.scan_file(self.path)
+        self.assertEqual(result["severity"], "CRITICAL")
+        self.assertEqual(result["score"], 100)  # apk_policy decided it; apk_content adds no points
+        self.assertIn("Critical: Unauthorized APK Package", result["details"])
+        self.assertIn("APK: Malformed DEX header (classes.dex)", result["details"])
+        self.assertTrue(any(d.startswith("APK: Embedded code payload") for d in result["details"]))
+        self.assertIn("APK: Sensitive permission SEND_SMS", result["details"])
+
+class DataFileLookupTest(unittest.TestCase):
+    def test_working_directory_cannot_plant_a_whitelist(self):
+        tmp = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            with open(os.path.join(tmp, "whitelist.json"), "w") as f:
+                f.write('{"paths": ["%s"]}' % tmp)
+            os.chdir(tmp)
+            found = resolve_data_file("whitelist.json")
+            self.assertNotEqual(os.path.dirname(os.path.realpath(found or "")), os.path.realpath(tmp))
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_working_directory_cannot_plant_rules(self):
+        tmp = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            with open(os.path.join(tmp, "yara_rules.yar"), "w") as f:
+                f.write("rule planted { condition: false }\n")
+            os.chdir(tmp)
+            found = resolve_rules_path("yara_rules.yar")
+            self.assertNotEqual(os.path.dirname(os.path.realpath(found)), os.path.realpath(tmp))
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
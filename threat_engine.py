@@ -1,44 +1,275 @@
 import os
-import math
 import hashlib
 import re
 
-# Dependency Imports (Graceful failover)
-try:
-    import yara
-    HAS_YARA = True
-except ImportError:
-    HAS_YARA = False
+from entropy import shannon_entropy
+from scan_context import ScanContext
+from rule_loader import RuleSet, HAS_YARA
+from path_matcher import SubstringMatcher, load_whitelist
+from scan_profiler import NULL_CLOCK, StageClock
+from scan_config import DISABLED_ANALYZERS, EARLY_EXIT
+from apk_analyzer import inspect_apk, score_apk, APK_CONTENT_MAX_SCORE
 
 try:
     import pefile
     HAS_PEFILE = True
+    _IMPORT_DIRECTORY = [pefile.DIRECTORY_ENTRY['IMAGE_DIRECTORY_ENTRY_IMPORT']]
 except ImportError:
     HAS_PEFILE = False
 
+BAD_IMPORTS = ('WriteProcessMemory', 'CreateRemoteThread', 'VirtualAllocEx')
+
+# Bump whenever scoring logic changes so cached verdicts from older builds are discarded
+ENGINE_VERSION = "3.3.2"
+
+# Severity bands, highest first: (minimum score, severity)
+SEVERITY_BANDS = ((85, "CRITICAL"), (60, "HIGH"), (30, "MEDIUM"))
+
+def severity_for(score):
+    # Increased SAFE threshold slightly to be more tolerant
+    for minimum, severity in SEVERITY_BANDS:
+        if score >= minimum:
+            return severity
+    return "SAFE"
+
+def yara_points(risk):
+    return 50 if risk == 'Critical' else (30 if risk == 'High' else 10)
+
+EXECUTABLE_EXTENSIONS = ('.exe', '.dll', '.sys')
+
+# --- ANALYZERS ---
+# One stage of the engine pipeline each. `cost` orders them (cheapest first) and max_score()
+# is the most a stage can add to a given file's score: 0 means it does not apply to that file.
+
+class Analyzer:
+    name = None
+    cost = 0
+    # True: run() receives the shared file view (the file is only opened if such a stage runs)
+    needs_data = False
+    # True: still runs once early exit has decided the severity, for its details only (points are dropped)
+    always_report = False
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.enabled = True
+
+    def max_score(self, filename):
+        return 0
+
+    def run(self, filename, data, result):
+        """Adds this stage's points and details to `result`"""
+        raise NotImplementedError
+
+class ApkPolicyAnalyzer(Analyzer):
+    """USER POLICY: Zero Tolerance for APKs on Windows"""
+    name = "apk_policy"
+
+    def max_score(self, filename):
+        return 100 if filename.endswith('.apk') else 0
+
+    def run(self, filename, data, result):
+        result['score'] += 100
+        result['details'].append("Critical: Unauthorized APK Package")
+
+class ApkContentAnalyzer(Analyzer):
+    """What is inside the APK: manifest, dex headers/entropy, embedded payloads (see apk_analyzer)"""
+    name = "apk_content"
+    cost = 15
+    needs_data = True
+    # apk_policy alone decides every APK; the findings are what tells users why
+    always_report = True
+
+    def max_score(self, filename):
+        return APK_CONTENT_MAX_SCORE if filename.endswith('.apk') else 0
+
+    def run(self, filename, data, result):
+        points, details = score_apk(inspect_apk(data))
+        result['score'] += points
+        result['details'].extend(details)
+
+class ExtensionAnalyzer(Analyzer):
+    """Script/screensaver extensions are risky on their own (safe paths were already skipped)"""
+    name = "extension"
+
+    def max_score(self, filename):
+        return 20 if filename.endswith(('.scr', '.bat', '.ps1', '.vbs')) else 0
+
+    def run(self, filename, data, result):
+        result['score'] += 20
+
+class EntropyAnalyzer(Analyzer):
+    """Randomness of the first MB: packed or encrypted executables"""
+    name = "entropy"
+    cost = 10
+    needs_data = True
+
+    def max_score(self, filename):
+        # Installers often have high entropy, so only executables that are not common installer names
+        # count (don't flag random data files that passed the filter). Others skip the computation.
+        if filename.endswith(EXECUTABLE_EXTENSIONS) and not any(x in filename for x in ['setup', 'install', 'update']):
+            return 20
+        return 0
+
+    def run(self, filename, data, result):
+        entropy = self.engine._get_entropy(data)
+        if entropy > 7.2:
+            result['score'] += 20 # Reduced from 30
+            result['details'].append(f"High Entropy ({entropy:.2f})")
+
+class YaraAnalyzer(Analyzer):
+    """Pattern matching with the loaded rule set"""
+    name = "yara"
+    cost = 20
+    needs_data = True
+
+    def max_score(self, filename):
+        # Every rule matching at once (each rule reports at most one match per file)
+        return self.engine.yara_max_score if self.engine.rules else 0
+
+    def run(self, filename, data, result):
+        try:
+            matches = self.engine.rules.match(data=data)
+            for match in matches:
+                risk = match.meta.get('severity', 'Medium')
+                result['score'] += yara_points(risk)
+                result['details'].append(f"YARA Match: {match.rule} [{risk}]")
+        except Exception as e:
+            print(f"YARA Scan Error: {e}")
+
+class PeAnalyzer(Analyzer):
+    """PE Structure Analysis (Windows Executables): packed sections and injection imports"""
+    name = "pe"
+    cost = 30
+    needs_data = True
+
+    def max_score(self, filename):
+        return 30 if HAS_PEFILE and filename.endswith(EXECUTABLE_EXTENSIONS) else 0
+
+    def run(self, filename, data, result):
+        pe_issues = self.engine._analyze_pe(data)
+        if pe_issues:
+            # Cap PE score to prevent legitimate packed apps from triggers
+            result['score'] += min(30, len(pe_issues) * 10)
+            result['details'].extend(pe_issues)
+
+DEFAULT_ANALYZERS = (ApkPolicyAnalyzer, ExtensionAnalyzer, EntropyAnalyzer, ApkContentAnalyzer, YaraAnalyzer, PeAnalyzer)
+
 class ThreatEngine:
-    def __init__(self, rules_path='yara_rules.yar'):
+    def __init__(self, rules_path='yara_rules.yar', cache=None, disabled_analyzers=None, early_exit=None,
+                 timings=False):
         self.rules = None
-        # Expanded Whitelist (Process Names)
-        self.whitelist = [
-            'chrome.exe', 'explorer.exe', 'svchost.exe', 'firefox.exe',
-            'wix', 'msbuild', 'python', 'pip', 'node', 'git', 'visual studio',
-            'nvidia', 'amd', 'intel', 'setup', 'installer', 'postgres', 'pg_ctl',
-            'java', 'jdk', 'jre', 'android', 'studio64', 'adb', 'emulator',
-            'dart', 'flutter', 'code', 'cursor', 'antigravity', 'fd', 'rg', 'bat'
-        ]
-        
-        # Whitelisted Paths (Developer Tools & System)
-        self.safe_paths = [
-            r'Windows\System32', r'Program Files', r'Program Files (x86)',
-            r'Android\Android Studio', r'PostgreSQL', r'Microsoft VS Code',
-            r'Antigravity', r'Flutter', r'Dart'
-        ]
-        
-    def scan_file(self, filepath):
+        self.rules_path = rules_path
+        # Compiled once (or loaded precompiled), then hot-reloaded when the .yar changes
+        self.ruleset = RuleSet(rules_path) if HAS_YARA else None
+        if self.ruleset:
+            self.rules = self.ruleset.rules
+        self.yara_max_score = self._yara_max_score()
+        # Whitelists live in whitelist.json (vendor list can grow to thousands of entries);
+        # the built-in defaults below are only used if the data file is missing.
+        loaded = load_whitelist()
+        if loaded:
+            self.whitelist, self.safe_paths = loaded
+        else:
+            # Expanded Whitelist (Process Names)
+            self.whitelist = [
+                'chrome.exe', 'explorer.exe', 'svchost.exe', 'firefox.exe',
+                'wix', 'msbuild', 'python', 'pip', 'node', 'git', 'visual studio',
+                'nvidia', 'amd', 'intel', 'setup', 'installer', 'postgres', 'pg_ctl',
+                'java', 'jdk', 'jre', 'android', 'studio64', 'adb', 'emulator',
+                'dart', 'flutter', 'code', 'cursor', 'antigravity', 'fd', 'rg', 'bat'
+            ]
+            
+            # Whitelisted Paths (Developer Tools & System)
+            self.safe_paths = [
+                r'Windows\System32', r'Program Files', r'Program Files (x86)',
+                r'Android\Android Studio', r'PostgreSQL', r'Microsoft VS Code',
+                r'Antigravity', r'Flutter', r'Dart'
+            ]
+        self.compile_whitelists()
+
+        # Analyzer pipeline, cheapest first. Stop once the verdict can no longer change (early_exit).
+        self.analyzers = sorted((cls(self) for cls in DEFAULT_ANALYZERS), key=lambda a: a.cost)
+        self.early_exit = EARLY_EXIT if early_exit is None else early_exit
+        for name in (DISABLED_ANALYZERS if disabled_analyzers is None else disabled_analyzers):
+            try:
+                self.analyzer(name).enabled = False
+            except KeyError:
+                print(f"⚠️ Unknown analyzer in disabled list: {name}")
+
+        # Per-stage timing (optional, see attach_profiler); `timings` also puts each file's laps in its result
+        self.profiler = None
+        self.timings = timings
+
+        # Persistent verdict cache (optional)
+        self.cache = None
+        self.signature = self._compute_signature()
+        if cache is not None:
+            self.attach_cache(cache)
+
+    def _compute_signature(self):
+        """Fingerprint of everything that influences a verdict: engine version, rule source and whitelists"""
+        h = hashlib.sha256(ENGINE_VERSION.encode())
+        # Rules only influence verdicts when YARA is actually loaded
+        h.update(f"yara:{self.ruleset.digest if self.ruleset else 'off'}".encode())
+        h.update("\0".join(self.whitelist + self.safe_paths).encode('utf-8'))
+        h.update(f"off:{','.join(self.disabled_analyzers())}".encode())
+        return h.hexdigest()[:16]
+
+    def _yara_max_score(self):
+        """Upper bound of the YARA stage: the points of every loaded rule added together"""
+        if not self.rules:
+            return 0
+        try:
+            return sum(yara_points(rule.meta.get('severity', 'Medium')) for rule in self.rules)
+        except Exception:
+            # Rule set can't be enumerated: never skip stages on account of YARA
+            return float('inf')
+
+    def analyzer(self, name):
+        for analyzer in self.analyzers:
+            if analyzer.name == name:
+                return analyzer
+        raise KeyError(name)
+
+    def disabled_analyzers(self):
+        return [a.name for a in self.analyzers if not a.enabled]
+
+    def set_analyzer_enabled(self, name, enabled=True):
+        """Switches one pipeline stage on/off. Cached verdicts made with the other setting are dropped."""
+        self.analyzer(name).enabled = bool(enabled)
+        self.signature = self._compute_signature()
+        if self.cache is not None:
+            self.cache.bind(self.signature)
+
+    def compile_whitelists(self):
+        """(Re)build the matchers after changing self.whitelist / self.safe_paths"""
+        self._whitelist_matcher = SubstringMatcher(self.whitelist)
+        self._safe_path_matcher = SubstringMatcher(self.safe_paths)
+
+    def attach_cache(self, cache):
+        """Use a VerdictCache for repeat scans. Stale verdicts from another engine/rules version are dropped."""
+        cache.bind(self.signature)
+        self.cache = cache
+
+    def attach_profiler(self, profiler):
+        """Record per-stage timings of every scan into a ScanProfiler (None switches it off)"""
+        self.profiler = profiler
+
+    def reload_rules_if_changed(self):
+        """Swaps in the new rule set when the .yar file was edited. Cached verdicts are invalidated."""
+        if self.ruleset and self.ruleset.check_reload():
+            self.rules = self.ruleset.rules
+            self.yara_max_score = self._yara_max_score()
+            self.signature = self._compute_signature()
+            if self.cache is not None:
+                self.cache.bind(self.signature)
+            print(f"🔄 YARA rules reloaded ({self.ruleset.digest})")
+
+    def scan_file(self, filepath, st=None):
         """
         Deep Scan a single file using Hybrid Analysis (Metadata + Content + Rules).
-        Returns dict with severity, score, and details.
+        Returns dict with severity, score, and details (plus per-stage "timings" in ms when enabled;
+        never for a cached verdict). `st` may carry an os.stat_result the caller already has, so the file is not stat'ed twice.
         """
         result = {
             "filename": os.path.basename(filepath),
@@ -47,9 +278,52 @@ class ThreatEngine:
             "details": []
         }
 
-        if not os.path.exists(filepath):
-            return result
+        self.reload_rules_if_changed()
+        # Profiling off: a shared no-op clock, so the stage laps below cost next to nothing
+        clock = StageClock(self.profiler, filepath) if self.profiler or self.timings else NULL_CLOCK
+
+        if st is None:
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                return result
+
+        # Unchanged since the last scan? Reuse the verdict instead of reading the file.
+        cached = self.cached_verdict(filepath, st)
+        clock.lap("cache")
+        if cached is not None:
+            clock.finish()
+            return cached
+
+        result = self._analyze(filepath, result, st.st_size, clock)
+        self.remember_verdict(filepath, st, result)
+        clock.lap("store")
+        clock.finish()
+        if self.timings:
+            result['timings'] = clock.laps_ms()
+        return result
+
+    def cached_verdict(self, filepath, st):
+        """Cached result for an unchanged file, else None (always None without a cache)"""
+        if self.cache is None:
+            return None
+        return self.cache.lookup(filepath, st)
+
+    def remember_verdict(self, filepath, st, result):
+        # Transient failures (locked file, I/O error) are not cached so the next scan retries them
+        if self.cache is not None and not any(d.startswith("Scan Error") for d in result['details']):
+            self.cache.store(filepath, st, result)
 
+    def _analyze(self, filepath, result, size=None, clock=NULL_CLOCK):
+        """
+        Runs the analyzer pipeline on a file that is not in the cache.
+        Analyzers run cheapest first and each declares the most it can add to this file's score;
+        once no remaining analyzer could move the score into another severity band the rest are
+        skipped, except always_report stages, which still add their details but no points (an APK is
+        CRITICAL from apk_policy alone; apk_content then says what is inside). The severity is the
+        same as running every stage, the score and details only cover the stages that counted.
+        """
+        ctx = None
         try:
             # 1. METADATA ANALYSIS (Fast)
             # ---------------------------
@@ -57,116 +331,110 @@ class ThreatEngine:
             file_path_lower = filepath.lower()
 
             # USER POLICY: Zero Tolerance for APKs on Windows
-            # We check this FIRST. If it is an APK, we do NOT whitelist it, even if it is in a "Safe Path".
-            if filename.endswith('.apk'):
-                result['score'] += 100
-                result['details'].append("Critical: Unauthorized APK Package")
-                # We can return 'result' later, allowing further analysis if needed, 
-                # but with +100 score it is already Critical.
-                # proceed to Entropy check? No need.
-            
-            else:
+            # APKs are never whitelisted, even if they sit in a "Safe Path".
+            if not filename.endswith('.apk'):
                 # Global Whitelist: Skip known Safe Paths (ONLY for non-APKs)
                 # This protects postgres.exe, studio.bat, node.exe etc.
-                if any(sp.lower() in file_path_lower for sp in self.safe_paths):
+                if self._safe_path_matcher.search(file_path_lower):
+                    clock.lap("metadata")
                     return result
 
                 # Whitelist Check (Filename) for tools in random paths
-                if any(safe in filename for safe in self.whitelist):
+                if self._whitelist_matcher.search(filename):
+                    clock.lap("metadata")
                     return result
-            
-            # Extension Risk (Non-APK)
-            if filename.endswith(('.scr', '.bat', '.ps1', '.vbs')):
-                # Only penalize if NOT in a safe path (already checked above)
-                result['score'] += 20
-            elif filename.endswith('.exe'):
-                # Standard EXE - No penalty by default, rely on YARA/PE
-                pass
-            
-            # Entropy (Randomness) Check
-            entropy = self._get_entropy(filepath)
-            if entropy > 7.2:
-                # Installers often have high entropy, so we only add points if it's not a common installer name
-                # AND it's an executable (don't flag random data files that passed filter)
-                if filename.endswith(('.exe', '.dll', '.sys')) and not any(x in filename for x in ['setup', 'install', 'update']):
-                    result['score'] += 20 # Reduced from 30
-                    result['details'].append(f"High Entropy ({entropy:.2f})")
-
-            # 2. CONTENT ANALYSIS (Deep)
-            # --------------------------
-            
-            # YARA Scanning (Pattern Matching)
-            if self.rules:
-                try:
-                    matches = self.rules.match(filepath)
-                    for match in matches:
-                        risk = match.meta.get('severity', 'Medium')
-                        points = 50 if risk == 'Critical' else (30 if risk == 'High' else 10)
-                        result['score'] += points
-                        result['details'].append(f"YARA Match: {match.rule} [{risk}]")
-                except Exception as e:
-                    print(f"YARA Scan Error: {e}")
-
-            # PE Structure Analysis (Windows Executables)
-            if HAS_PEFILE and filename.endswith(('.exe', '.dll', '.sys')):
-                pe_issues = self._analyze_pe(filepath)
-                if pe_issues:
-                    # Cap PE score to prevent legitimate packed apps from triggers
-                    pe_score = min(30, len(pe_issues) * 10) 
-                    result['score'] += pe_score
-                    result['details'].extend(pe_issues)
+
+            plan = []
+            for analyzer in self.analyzers:
+                most = analyzer.max_score(filename) if analyzer.enabled else 0
+                if most:
+                    plan.append((analyzer, most))
+            remaining = sum(most for _a, most in plan)
+            clock.lap("metadata")
+
+            # 2. ANALYZER PIPELINE (cheapest first)
+            # -------------------------------------
+            opened = False
+            decided_score = None
+            for analyzer, most in plan:
+                if decided_score is None and self.early_exit and \
+                        severity_for(result['score']) == severity_for(result['score'] + remaining):
+                    decided_score = result['score']
+                if decided_score is not None and not analyzer.always_report:
+                    continue
+                remaining -= most
+                data = None
+                if analyzer.needs_data:
+                    if not opened:
+                        # Open + map the file ONCE; entropy, YARA and pefile all share this view
+                        ctx = self._open_context(filepath, size, result)
+                        opened = True
+                        clock.lap("read")
+                    if not ctx:
+                        continue
+                    data = ctx.data
+                analyzer.run(filename, data, result)
+                if decided_score is not None:
+                    result['score'] = decided_score
+                clock.lap(analyzer.name)
 
             # 3. VERDICT
             # ----------
-            # Increased SAFE threshold slightly to be more tolerant
-            if result['score'] >= 85:
-                result['severity'] = "CRITICAL"
-            elif result['score'] >= 60:
-                result['severity'] = "HIGH"
-            elif result['score'] >= 30:
-                result['severity'] = "MEDIUM"
-            else:
-                result['severity'] = "SAFE"
+            result['severity'] = severity_for(result['score'])
 
         except Exception as e:
             result['details'].append(f"Scan Error: {str(e)}")
+        finally:
+            if ctx: ctx.close()
         
         # Add risk_score for main.py compatibility
         result['risk_score'] = result['score']
         return result
 
-    def _get_entropy(self, filepath):
+    def _open_context(self, filepath, size=None, result=None):
+        """
+        Opens the shared file view; None if the file cannot be read (locked, permissions).
+        The failure is noted in `result` as a "Scan Error" so the partial verdict is never cached.
+        """
+        try:
+            return ScanContext(filepath, size).open()
+        except OSError as e:
+            print(f"Read Error: {e}")
+            if result is not None:
+                result['details'].append(f"Scan Error: {e}")
+            return None
+
+    def _get_entropy(self, data):
         """Calculates Shannon Entropy of the file content"""
-        # Read first 1MB only for speed
+        # First 1MB only for speed (zero-copy slice of the shared view)
         try:
-            with open(filepath, 'rb') as f:
-                data = f.read(1024 * 1024)
-            if not data: return 0.0
-            
-            entropy = 0
-            for x in range(256):
-                p_x = float(data.count(x)) / len(data)
-                if p_x > 0:
-                    entropy += - p_x * math.log(p_x, 2)
-            return entropy
+            return shannon_entropy(data, 0, 1024 * 1024)
         except: return 0.0
 
-    def _analyze_pe(self, filepath):
+    def _analyze_pe(self, data):
         """Checks for suspicious PE characteristics"""
         issues = []
         try:
-            pe = pefile.PE(filepath)
-            # Check sections for high entropy (packing)
+            # OPTIMIZATION: headers + section table only, then just the import directory
+            # (a full parse also walks resources, relocations, debug info, ... that we never look at)
+            pe = pefile.PE(data=data, fast_load=True)
+            # Check sections for high entropy (packing), straight off the shared view
             for section in pe.sections:
-                if section.get_entropy() > 7.4:
+                if shannon_entropy(data, *_section_span(section)) > 7.4:
                     issues.append(f"Packed Section: {section.Name.decode('utf-8', 'ignore').strip()}")
-            
+
             # Check suspicious imports
-            bad_imports = ['WriteProcessMemory', 'CreateRemoteThread', 'VirtualAllocEx']
+            pe.parse_data_directories(directories=_IMPORT_DIRECTORY)
             if hasattr(pe, 'DIRECTORY_ENTRY_IMPORT'):
                 for entry in pe.DIRECTORY_ENTRY_IMPORT:
                     for imp in entry.imports:
-                        if imp.name and imp.name.decode('utf-8', 'ignore') in bad_imports:
+                        if imp.name and imp.name.decode('utf-8', 'ignore') in BAD_IMPORTS:
                             issues.append(f"Suspicious API: {imp.name.decode('utf-8', 'ignore')}")
         except: pass
         return issues
+
+def _section_span(section):
+    """(start, end) of a section's raw data in the file, exactly what section.get_data() would copy"""
+    start = section.get_PointerToRawData_adj()
+    end = start + section.SizeOfRawData
+    return start, min(end, section.PointerToRawData + section.SizeOfRawData)